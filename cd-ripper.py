@@ -4,11 +4,40 @@ Enhanced CD Ripper with Audio and Data Extraction
 Automates CD ripping to FLAC with metadata and enhanced content extraction
 """
 
+import argparse
+import asyncio
+import base64
+import collections
+import fcntl
+import grp
+import hashlib
+import json
+import math
+import mmap
 import os
-import subprocess
+import re
+import shlex
+import shutil
+import socket
+import sqlite3
+import stat
+import struct
 import sys
+import tarfile
+import tempfile
+import threading
 import time
-from pathlib import Path
+import urllib.parse
+import urllib.request
+import zlib
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import numpy as np
+except ImportError:  # checksums fall back to a pure-Python loop; no loudness analysis
+    np = None
 
 class Colors:
     """ANSI color codes for terminal output"""
@@ -22,12 +51,1574 @@ class Colors:
     BOLD = '\033[1m'
     UNDERLINE = '\033[4m'
 
+class ScanCache:
+    """Size-bounded on-disk LRU cache of parsed disc analysis, keyed by disc fingerprint"""
+    VERSION = 1
+    
+    def __init__(self, cache_dir, max_entries=500, max_bytes=20 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+    
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def get(self, key):
+        """Return the cached entry for key, or None on a miss or stale entry"""
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        if entry.get('version') != self.VERSION:
+            self.invalidate(key)
+            return None
+        
+        # Touch the entry so eviction sees it as recently used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return entry.get('data')
+    
+    def put(self, key, data):
+        """Store an entry atomically, then evict the least recently used ones"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{self._path(key)}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'version': self.VERSION, 'data': data}, f)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            return
+        self.evict()
+    
+    def invalidate(self, key):
+        """Drop a single entry"""
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+    
+    def evict(self):
+        """Remove oldest entries until the cache is within its count and size limits"""
+        try:
+            entries = [e for e in os.scandir(self.cache_dir) if e.name.endswith('.json')]
+        except OSError:
+            return
+        entries = sorted(((e.stat().st_mtime, e.stat().st_size, e.path) for e in entries), reverse=True)
+        
+        total = 0
+        for count, (_, size, path) in enumerate(entries, 1):
+            total += size
+            if count > self.max_entries or total > self.max_bytes:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+class Telemetry:
+    """Structured progress events from the external tools
+    
+    Events are dicts (stage, item, percent, fps, avg_fps, eta_seconds, bytes,
+    ...). Each one is appended to an optional JSON-lines log, folded into an
+    optional Prometheus textfile (for node_exporter's textfile collector) and
+    rendered as a compact single progress line covering every active job.
+    """
+    
+    def __init__(self, prefix, jsonl_path=None, prom_path=None):
+        self.prefix = prefix
+        self.jsonl_path = jsonl_path
+        self.prom_path = prom_path
+        self.active = {}
+        self.latest = {}
+        self.lock = threading.Lock()
+        self.last_prom_write = 0
+        self.show_line = sys.stdout.isatty()
+    
+    def emit(self, event):
+        """Record one progress event"""
+        event = dict(event, ts=round(time.time(), 3))
+        key = (event.get('device', ''), event['stage'], event['item'])
+        with self.lock:
+            # Keep the last known value of every metric for the textfile
+            self.latest[key] = dict(self.latest.get(key, {}), **event)
+            if event.get('state', 'running') == 'running':
+                self.active[key] = event
+            else:
+                self.active.pop(key, None)
+            
+            if self.jsonl_path:
+                with open(self.jsonl_path, 'a') as f:
+                    f.write(json.dumps(event) + '\n')
+            
+            # Textfile collectors only need a fresh snapshot every second or so
+            if self.prom_path and (event.get('state') != 'running' or time.time() - self.last_prom_write > 1):
+                self.write_prometheus()
+                self.last_prom_write = time.time()
+            
+            self.render()
+    
+    def write_prometheus(self):
+        lines = []
+        metrics = sorted(set(k for e in self.latest.values() for k, v in e.items()
+                             if isinstance(v, (int, float)) and not isinstance(v, bool) and k != 'ts'))
+        for metric in metrics:
+            name = f"{self.prefix}_{metric}"
+            lines.append(f"# TYPE {name} gauge")
+            for (device, stage, item), event in sorted(self.latest.items()):
+                if metric in event:
+                    labels = f'device="{device}",stage="{stage}",item="{item}",state="{event.get("state", "running")}"'
+                    lines.append(f"{name}{{{labels}}} {event[metric]}")
+        tmp_path = f"{self.prom_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, self.prom_path)
+    
+    def render(self):
+        """Redraw the single progress line (or clear it when nothing is running)"""
+        if not self.show_line:
+            return
+        parts = []
+        for event in self.active.values():
+            part = f"{event['item']} {event.get('percent', 0):.1f}%"
+            if event.get('fps'):
+                part += f" {event['fps']:.0f}fps"
+            if event.get('eta_seconds') is not None:
+                part += f" ETA {int(event['eta_seconds']) // 60}:{int(event['eta_seconds']) % 60:02d}"
+            parts.append(part)
+        line = ' | '.join(parts)
+        width = shutil.get_terminal_size().columns - 1
+        sys.stdout.write(f"\r{line[:width]:<{width}}" if line else f"\r{' ' * width}\r")
+        sys.stdout.flush()
+
+class FfmpegProgress:
+    """Incremental parser for ffmpeg's -progress key=value blocks"""
+    
+    def __init__(self, duration=0):
+        self.duration = duration
+        self.block = {}
+    
+    def feed(self, line):
+        """Feed one line; returns an event dict at the end of each block"""
+        key, _, value = line.strip().partition('=')
+        if not key:
+            return None
+        self.block[key] = value.strip()
+        if key != 'progress':
+            return None
+        
+        block, self.block = self.block, {}
+        event = {}
+        try:
+            position = int(block.get('out_time_us') or block.get('out_time_ms') or 0) / 1e6
+            if block.get('fps'):
+                event['fps'] = float(block['fps'])
+            if block.get('total_size', '').isdigit():
+                event['bytes'] = int(block['total_size'])
+            speed = float(block.get('speed', '0x').rstrip('x') or 0)
+        except ValueError:
+            return None
+        if speed:
+            event['speed'] = speed
+        if self.duration:
+            event['percent'] = round(min(100.0, position / self.duration * 100), 2)
+            if speed:
+                event['eta_seconds'] = round(max(0.0, self.duration - position) / speed)
+        event['state'] = 'running' if value.strip() == 'continue' else 'done'
+        return event
+
+class ContentPool:
+    """Content-addressed store of enhanced-content files on the output volume
+    
+    Files live at <pool>/<size>/<sha256>, so the candidates for a duplicate
+    are found with one directory listing and only same-size files are ever
+    hashed twice. Album folders get hardlinks (or reflinks) to the pooled
+    copy instead of their own copy of the data.
+    """
+    FICLONE = 0x40049409  # Linux reflink ioctl (btrfs, XFS)
+    
+    def __init__(self, pool_dir):
+        self.pool_dir = pool_dir
+    
+    def path(self, size, sha256):
+        return os.path.join(self.pool_dir, str(size), sha256)
+    
+    def candidates(self, size):
+        """SHA-256s of the pooled files of this size"""
+        try:
+            return set(os.listdir(os.path.join(self.pool_dir, str(size))))
+        except OSError:
+            return set()
+    
+    def add(self, tmp_path, size, sha256):
+        """Move a freshly written file into the pool (a copy already there wins)"""
+        pooled = self.path(size, sha256)
+        os.makedirs(os.path.dirname(pooled), exist_ok=True)
+        if os.path.exists(pooled):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, pooled)
+        return pooled
+    
+    def link(self, pooled, dest):
+        """Place a pooled file at dest: hardlink, else reflink, else copy
+        
+        Returns True when no data had to be written.
+        """
+        tmp_path = f"{dest}.link"
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        try:
+            os.link(pooled, tmp_path)
+            shared = True
+        except OSError:
+            # Filesystems without hardlinks (some SMB/NFS shares) may still clone extents
+            with open(pooled, 'rb') as fin, open(tmp_path, 'wb') as fout:
+                try:
+                    fcntl.ioctl(fout.fileno(), self.FICLONE, fin.fileno())
+                    shared = True
+                except OSError:
+                    shutil.copyfileobj(fin, fout, 4 * 1024 * 1024)
+                    shared = False
+        os.replace(tmp_path, dest)
+        return shared
+
+class ContentCopier:
+    """Copies a mounted data session with streaming checksums, a manifest and resume
+    
+    Every file is read through one large page-aligned buffer and hashed as it
+    streams, so the SHA-256 in the manifest costs no extra pass. Re-running a
+    copy skips files whose size and hash already match the manifest, which lets
+    a scratched disc be retried without re-reading what was already saved.
+    
+    With a ContentPool, files are streamed into the pool and linked into
+    dest_dir; a file the pool already holds is linked without being written.
+    """
+    MANIFEST = '.rip-manifest.json'
+    BUFFER_SIZE = 4 * 1024 * 1024
+    
+    def __init__(self, source_dir, dest_dir, on_file=None, pool=None):
+        self.source_dir = source_dir
+        self.dest_dir = dest_dir
+        self.on_file = on_file
+        self.pool = pool
+        self.manifest_path = os.path.join(dest_dir, self.MANIFEST)
+        self.manifest = {}
+        self.buffer = mmap.mmap(-1, self.BUFFER_SIZE)
+        self.view = memoryview(self.buffer)
+        self.stats = {'copied': 0, 'skipped': 0, 'linked': 0, 'failed': [], 'bytes': 0, 'saved': 0,
+                      'seconds': 0.0}
+    
+    def load_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f).get('files', {})
+        except (OSError, ValueError):
+            self.manifest = {}
+    
+    def save_manifest(self):
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'source': self.source_dir, 'files': self.manifest}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+    
+    def hash_file(self, path):
+        digest = hashlib.sha256()
+        with open(path, 'rb', buffering=0) as f:
+            while True:
+                n = f.readinto(self.buffer)
+                if not n:
+                    break
+                digest.update(self.view[:n])
+        return digest.hexdigest()
+    
+    def already_copied(self, rel_path, size, dest):
+        entry = self.manifest.get(rel_path)
+        if not entry or entry['size'] != size:
+            return False
+        try:
+            return os.path.getsize(dest) == size and self.hash_file(dest) == entry['sha256']
+        except OSError:
+            return False
+    
+    def copy_file(self, src, dest):
+        """Stream src to dest through the shared buffer, returning the SHA-256"""
+        digest = hashlib.sha256()
+        tmp_path = f"{dest}.part"
+        try:
+            with open(src, 'rb', buffering=0) as fin, open(tmp_path, 'wb', buffering=0) as fout:
+                while True:
+                    n = fin.readinto(self.buffer)
+                    if not n:
+                        break
+                    chunk = self.view[:n]
+                    digest.update(chunk)
+                    written = 0
+                    while written < n:
+                        written += fout.write(chunk[written:])
+            os.replace(tmp_path, dest)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return digest.hexdigest()
+    
+    def store(self, src, dest, size):
+        """Copy src to dest, through the pool when there is one
+        
+        Returns (sha256, linked); linked means an identical pooled file was
+        linked in and nothing was written. Only when the pool holds files of
+        the same size is the source hashed before copying.
+        """
+        if not self.pool:
+            return self.copy_file(src, dest), False
+        
+        if self.pool.candidates(size):
+            sha256 = self.hash_file(src)
+            if sha256 in self.pool.candidates(size):
+                self.pool.link(self.pool.path(size, sha256), dest)
+                return sha256, True
+        
+        os.makedirs(self.pool.pool_dir, exist_ok=True)
+        incoming = os.path.join(self.pool.pool_dir, f".incoming-{os.getpid()}-{threading.get_ident()}")
+        sha256 = self.copy_file(src, incoming)
+        self.pool.link(self.pool.add(incoming, size, sha256), dest)
+        return sha256, False
+    
+    def walk(self, directory):
+        """Yield every file below directory, dotfiles included"""
+        with os.scandir(directory) as entries:
+            for entry in sorted(entries, key=lambda e: e.name):
+                if entry.is_dir(follow_symlinks=False):
+                    yield from self.walk(entry.path)
+                else:
+                    yield entry
+    
+    def copy(self):
+        """Copy the whole tree, returning the stats dict"""
+        os.makedirs(self.dest_dir, exist_ok=True)
+        self.load_manifest()
+        start = time.time()
+        last_save = start
+        
+        for entry in self.walk(self.source_dir):
+            rel_path = os.path.relpath(entry.path, self.source_dir)
+            dest = os.path.join(self.dest_dir, rel_path)
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            
+            if entry.is_symlink():
+                if not os.path.lexists(dest):
+                    os.symlink(os.readlink(entry.path), dest)
+                continue
+            
+            st = entry.stat(follow_symlinks=False)
+            if self.already_copied(rel_path, st.st_size, dest):
+                self.stats['skipped'] += 1
+                self.report(rel_path, 'skipped', st.st_size, 0)
+                continue
+            
+            file_start = time.time()
+            try:
+                sha256, linked = self.store(entry.path, dest, st.st_size)
+            except OSError as e:
+                self.stats['failed'].append((rel_path, str(e)))
+                self.report(rel_path, 'failed', st.st_size, time.time() - file_start)
+                continue
+            os.utime(dest, ns=(st.st_atime_ns, st.st_mtime_ns))
+            
+            self.manifest[rel_path] = {'size': st.st_size, 'sha256': sha256, 'mtime': int(st.st_mtime)}
+            if linked:
+                self.stats['linked'] += 1
+                self.stats['saved'] += st.st_size
+            else:
+                self.stats['copied'] += 1
+                self.stats['bytes'] += st.st_size
+            self.report(rel_path, 'linked' if linked else 'copied', st.st_size, time.time() - file_start)
+            
+            # Persist progress regularly so an aborted copy can resume
+            if time.time() - last_save > 2:
+                self.save_manifest()
+                last_save = time.time()
+        
+        self.save_manifest()
+        self.stats['seconds'] = time.time() - start
+        return self.stats
+    
+    def report(self, rel_path, status, size, seconds):
+        if self.on_file:
+            self.on_file(rel_path, status, size, seconds)
+
+class ProcessRunner:
+    """Shell-free subprocess supervisor built on asyncio
+    
+    Commands are argv lists, so paths never need quoting. Output is read
+    incrementally and handed to on_line a line at a time (carriage-return
+    progress redraws count as lines), so parsing happens while the tool is
+    still running; unless the caller asks for a capture, only the last
+    lines are kept. stream() runs binary tools instead: stdin is fed from
+    memory and stdout is handed over in raw chunks. Every running child is
+    tracked so cancel() can stop them all, and run_many() supervises
+    several children from one loop.
+    """
+    TAIL_LINES = 20
+    MAX_LINE = 64 * 1024  # Longest partial line held uncaptured; longer ones are cut and marked
+    CHUNK = 1 << 20  # Largest piece of a byte stream handed over or written at once
+    
+    def __init__(self):
+        self.children = set()
+        self.lock = threading.Lock()
+        self.cancelled = False
+    
+    def run(self, argv, on_line=None, capture=False, timeout=None, merge_stderr=True, interactive=False):
+        """Run one command; returns (returncode, stdout, stderr)
+        
+        With capture, stdout is the full output text; otherwise it is None.
+        stderr holds the last lines of stderr (of both streams when merged).
+        Interactive commands inherit the terminal.
+        """
+        return asyncio.run(self.supervise(argv, on_line, capture, timeout, merge_stderr, interactive))
+    
+    def stream(self, argv, on_chunk=None, feed=None, on_line=None, timeout=None):
+        """Run one command over raw bytes; returns (returncode, stderr)
+        
+        feed is written to stdin, which is then closed. stdout goes to
+        on_chunk as it is read, in pieces of up to CHUNK bytes (and is
+        discarded without on_chunk). stderr lines go to on_line, and its
+        last lines are returned.
+        """
+        returncode, _, stderr = asyncio.run(self.supervise(
+            argv, on_line, timeout=timeout, merge_stderr=False, feed=feed,
+            on_chunk=on_chunk or (lambda chunk: None)
+        ))
+        return returncode, stderr
+    
+    def run_many(self, commands, timeout=None):
+        """Run several (argv, on_line) commands concurrently; returns their results in order"""
+        async def gather():
+            return await asyncio.gather(*(self.supervise(argv, on_line, timeout=timeout)
+                                          for argv, on_line in commands))
+        return asyncio.run(gather())
+    
+    def cancel(self):
+        """Kill every running child and refuse to start new ones"""
+        with self.lock:
+            self.cancelled = True
+            children = list(self.children)
+        for proc in children:
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+    
+    async def supervise(self, argv, on_line=None, capture=False, timeout=None, merge_stderr=True,
+                        interactive=False, feed=None, on_chunk=None):
+        if self.cancelled:
+            return 1, None, "cancelled"
+        argv = [str(arg) for arg in argv]
+        pipe = asyncio.subprocess.PIPE
+        try:
+            if interactive:
+                proc = await asyncio.create_subprocess_exec(*argv)
+            else:
+                proc = await asyncio.create_subprocess_exec(
+                    *argv, stdin=asyncio.subprocess.DEVNULL if feed is None else pipe, stdout=pipe,
+                    stderr=asyncio.subprocess.STDOUT if merge_stderr else pipe
+                )
+        except OSError as e:
+            return 127, None, str(e)
+        with self.lock:
+            self.children.add(proc)
+        
+        tail = collections.deque(maxlen=self.TAIL_LINES)
+        captured = [] if capture else None
+        
+        def deliver(raw, keep, tailed, truncated=False):
+            line = raw.decode('utf-8', 'replace')
+            if truncated:
+                line = f"[truncated] {line}"
+            if keep is not None:
+                keep.append(line)
+            if line.strip():
+                if tailed:
+                    tail.append(line)
+                if on_line:
+                    on_line(line)
+        
+        async def pump(stream, keep, tailed):
+            pending, truncated = b'', False
+            while True:
+                chunk = await stream.read(65536)
+                if not chunk:
+                    break
+                *lines, pending = re.split(rb'\r\n|[\r\n]', pending + chunk)
+                for raw in lines:
+                    deliver(raw, keep, tailed, truncated)
+                    truncated = False
+                # Captured lines are kept whole; otherwise only a line's end is held
+                if keep is None and len(pending) > self.MAX_LINE:
+                    pending, truncated = pending[-self.MAX_LINE:], True
+            if pending:
+                deliver(pending, keep, tailed, truncated)
+        
+        async def copy(stream):
+            while True:
+                chunk = await stream.read(self.CHUNK)
+                if not chunk:
+                    break
+                on_chunk(chunk)
+        
+        async def write(data):
+            # A child that exits early (or fails) stops reading; its exit status tells why
+            view = memoryview(data)
+            try:
+                for start in range(0, len(view), self.CHUNK):
+                    proc.stdin.write(view[start:start + self.CHUNK])
+                    await proc.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                proc.stdin.close()
+        
+        waiters = [proc.wait()]
+        if feed is not None:
+            waiters.append(write(feed))
+        if on_chunk:
+            waiters.append(copy(proc.stdout))
+        elif not interactive:
+            # A separate stderr alone feeds the tail, like a captured stderr
+            waiters.append(pump(proc.stdout, captured, merge_stderr))
+        if not interactive and not merge_stderr:
+            waiters.append(pump(proc.stderr, None, True))
+        try:
+            await asyncio.wait_for(asyncio.gather(*waiters), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            tail.append(f"timed out after {timeout}s")
+        except BaseException:
+            # Cancelled, or a chunk callback failed
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+            await proc.wait()
+            raise
+        finally:
+            with self.lock:
+                self.children.discard(proc)
+        
+        stdout = '\n'.join(captured) if captured is not None else None
+        return proc.returncode, stdout, '\n'.join(tail)
+
+class ToolProbe:
+    """What the external tools on this host are, and what they can do
+    
+    Each tool is probed once - its version, plus ffmpeg's encoders and
+    demuxers - and the result is cached on disk keyed on the binary's
+    path and mtime. Later runs only stat the binaries, and an
+    upgraded or replaced tool is probed again automatically.
+    """
+    VERSION = 1
+    # cdrdao has no version flag; its usage text starts with the version
+    VERSION_ARGS = {'ffmpeg': ['-version'], 'ffprobe': ['-version'], 'cdparanoia': ['-V'], 'cdrdao': []}
+    
+    def __init__(self, cache_path, runner):
+        self.cache_path = cache_path
+        self.runner = runner
+        self.tools = None
+        self.lock = threading.Lock()
+    
+    def load(self):
+        if self.tools is None:
+            try:
+                with open(self.cache_path) as f:
+                    cached = json.load(f)
+                self.tools = cached['tools'] if cached.get('version') == self.VERSION else {}
+            except (OSError, ValueError, KeyError):
+                self.tools = {}
+        return self.tools
+    
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'version': self.VERSION, 'tools': self.tools}, f, indent=2)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass
+    
+    def tool(self, name):
+        """Capabilities of a tool on PATH ({'path', 'version', ...}), or None if it isn't installed"""
+        path = shutil.which(name)
+        if not path:
+            return None
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        
+        with self.lock:
+            entry = self.load().get(name)
+            if entry and entry['path'] == path and entry['mtime'] == mtime:
+                return entry
+        
+        entry = dict(self.inspect(name, path), path=path, mtime=mtime)
+        with self.lock:
+            self.load()[name] = entry
+            self.save()
+        return entry
+    
+    def inspect(self, name, path):
+        """Run the tool to learn its version and, for ffmpeg, its encoders"""
+        _, stdout, _ = self.runner.run([path] + self.VERSION_ARGS.get(name, ['--version']),
+                                       capture=True, timeout=30)
+        first = next((line.strip() for line in (stdout or "").split('\n') if line.strip()), "")
+        version = re.search(r'\d+(\.\d+)+\S*', first)
+        info = {'version': version.group(0) if version else (first[:40] or "unknown")}
+        
+        if name == 'ffmpeg':
+            info['encoders'] = self.ffmpeg_list(path, '-encoders')
+            info['demuxers'] = self.ffmpeg_list(path, '-demuxers')
+        return info
+    
+    def ffmpeg_list(self, path, option):
+        """Names from an ffmpeg -encoders/-demuxers table"""
+        _, stdout, _ = self.runner.run([path, '-hide_banner', option], capture=True, timeout=30)
+        names = []
+        table = False
+        for line in (stdout or "").split('\n'):
+            if line.strip().startswith('--'):
+                table = True
+            elif table and len(line.split()) >= 2:
+                names.append(line.split()[1])
+        return names
+    
+    def provides(self, name, key, value):
+        """Whether a tool lists value under key; unknown when the listing couldn't be parsed"""
+        listing = (self.tool(name) or {}).get(key)
+        return value in listing if listing else None
+
+# Linux CD-ROM ioctls (linux/cdrom.h)
+CDROMREADTOCHDR = 0x5305
+CDROMREADTOCENTRY = 0x5306
+CDROM_LBA = 0x01
+CDROM_LEADOUT = 0xAA
+
+def read_toc(device):
+    """Read the table of contents straight from the drive
+    
+    Returns a dict with the track list (number, start LBA, audio flag) and the
+    lead-out LBA, or None if the device cannot report a TOC.
+    """
+    try:
+        fd = os.open(device, os.O_RDONLY | os.O_NONBLOCK)
+    except OSError:
+        return None
+    
+    try:
+        header = fcntl.ioctl(fd, CDROMREADTOCHDR, struct.pack('BB', 0, 0))
+        first, last = struct.unpack('BB', header)
+        
+        def entry(track):
+            buf = struct.pack('BBBxiBxxx', track, 0, CDROM_LBA, 0, 0)
+            number, adr_ctrl, _, lba, _ = struct.unpack('BBBxiBxxx', fcntl.ioctl(fd, CDROMREADTOCENTRY, buf))
+            return {'number': number, 'lba': lba, 'audio': not ((adr_ctrl >> 4) & 0x04)}
+        
+        tracks = [entry(n) for n in range(first, last + 1)]
+        leadout = entry(CDROM_LEADOUT)['lba']
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+    
+    return {'tracks': tracks, 'leadout': leadout}
+
+def toc_fingerprint(toc):
+    """Stable disc ID: SHA-1 over the track offsets and lead-out"""
+    layout = ' '.join(str(t['lba']) for t in toc['tracks'])
+    return hashlib.sha1(f"{layout} {toc['leadout']}".encode()).hexdigest()
+
+CDROM_DRIVE_STATUS = 0x5326
+CDSL_CURRENT = 0x7fffffff
+CDS_DISC_OK = 4
+
+def drive_status(device):
+    """The drive's CDS_* status from the CDROM_DRIVE_STATUS ioctl
+    
+    Opening with O_NONBLOCK neither needs a disc nor closes the tray, so
+    this is cheap enough to poll. Returns None (or 0, CDS_NO_INFO) when the
+    device can't report its status, e.g. an image standing in for a drive.
+    """
+    try:
+        fd = os.open(device, os.O_RDONLY | os.O_NONBLOCK)
+    except OSError:
+        return None
+    try:
+        return fcntl.ioctl(fd, CDROM_DRIVE_STATUS, CDSL_CURRENT)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+def wait_for_drive(device, loaded=True, poll=0.25):
+    """Block until the drive holds a ready disc (or, with loaded=False, until it doesn't)
+    
+    Returns False straight away if the drive can't report its status.
+    """
+    while True:
+        status = drive_status(device)
+        if not status:
+            return False
+        if (status == CDS_DISC_OK) == loaded:
+            return True
+        time.sleep(poll)
+
+GNUDB_URL = "http://gnudb.gnudb.org/~cddb/cddb.cgi"
+MUSICBRAINZ_URL = "https://musicbrainz.org/ws/2"
+
+# Red Book audio: 2352-byte sectors of 16-bit stereo at 44.1 kHz
+SECTOR_BYTES = 2352
+CD_BYTES_PER_SECOND = 176400
+
+def munge_filename(name):
+    """abcde's default mungefilename, so native rips land in the same folders
+    
+    Leading dots are stripped, spaces and slashes become underscores, '*'
+    becomes '+', and quotes, '?' and control characters are dropped.
+    """
+    name = name.lstrip('.').replace(' ', '_').replace('/', '_').replace('*', '+')
+    return ''.join(c for c in name if c not in '\'"?' and ord(c) >= 32 and ord(c) != 127)
+
+def cddb_disc_id(toc):
+    """freedb/CDDB disc ID for a TOC"""
+    def digit_sum(n):
+        return sum(int(d) for d in str(n))
+    
+    tracks = toc['tracks']
+    checksum = sum(digit_sum((t['lba'] + 150) // 75) for t in tracks)
+    total_seconds = (toc['leadout'] + 150) // 75 - (tracks[0]['lba'] + 150) // 75
+    return f"{(checksum % 0xff) << 24 | total_seconds << 8 | len(tracks):08x}"
+
+def audio_track_spans(toc):
+    """(number, first LBA, sector count) for each audio track
+    
+    The last audio track of an enhanced CD ends 11400 sectors before the
+    data session (lead-out + lead-in + pregap of the second session).
+    """
+    tracks = toc['tracks']
+    spans = []
+    for i, track in enumerate(tracks):
+        if not track['audio']:
+            continue
+        if i + 1 < len(tracks):
+            end = tracks[i + 1]['lba'] - (0 if tracks[i + 1]['audio'] else 11400)
+        else:
+            end = toc['leadout']
+        spans.append((track['number'], track['lba'], end - track['lba']))
+    return spans
+
+def write_cue(cue_path, bin_name, toc, paranoia=True):
+    """Write a CUE sheet for a raw little-endian image of the audio tracks
+    
+    REM lines keep what the CUE format can't express (the absolute start of
+    the image, lead-out and data tracks) so disc IDs and AccurateRip keys
+    computed from the image match the disc's.
+    """
+    spans = audio_track_spans(toc)
+    first_lba = spans[0][1]
+    lines = [f"REM FIRSTLBA {first_lba}", f"REM LEADOUT {toc['leadout']}",
+             f"REM READMODE {'paranoia' if paranoia else 'burst'}"]
+    lines += [f"REM DATATRACK {t['number']:02d} {t['lba']}" for t in toc['tracks'] if not t['audio']]
+    lines.append(f'FILE "{bin_name}" BINARY')
+    for number, lba, _ in spans:
+        frames = lba - first_lba
+        lines.append(f"  TRACK {number:02d} AUDIO")
+        lines.append(f"    INDEX 01 {frames // 4500:02d}:{frames // 75 % 60:02d}:{frames % 75:02d}")
+    with open(cue_path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+def read_cue(cue_path):
+    """Load an image written by write_cue: {'bin', 'toc', 'first_lba', 'paranoia'}"""
+    first_lba, leadout, paranoia, bin_path = 0, None, True, None
+    tracks = []
+    with open(cue_path) as f:
+        for line in f:
+            words = line.split()
+            if words[:2] == ['REM', 'FIRSTLBA']:
+                first_lba = int(words[2])
+            elif words[:2] == ['REM', 'LEADOUT']:
+                leadout = int(words[2])
+            elif words[:2] == ['REM', 'READMODE']:
+                paranoia = words[2] != 'burst'
+            elif words[:2] == ['REM', 'DATATRACK']:
+                tracks.append({'number': int(words[2]), 'lba': int(words[3]), 'audio': False})
+            elif words[:1] == ['FILE']:
+                bin_path = os.path.join(os.path.dirname(cue_path), line.split('"')[1])
+            elif words[:1] == ['TRACK']:
+                tracks.append({'number': int(words[1]), 'lba': None, 'audio': words[2] == 'AUDIO'})
+            elif words[:2] == ['INDEX', '01'] and tracks:
+                mm, ss, ff = (int(x) for x in words[2].split(':'))
+                tracks[-1]['lba'] = first_lba + (mm * 60 + ss) * 75 + ff
+    
+    if leadout is None:
+        leadout = first_lba + os.path.getsize(bin_path) // SECTOR_BYTES
+    tracks.sort(key=lambda t: t['number'])
+    return {'bin': bin_path, 'toc': {'tracks': tracks, 'leadout': leadout},
+            'first_lba': first_lba, 'paranoia': paranoia}
+
+def parse_xmcd(text):
+    """Parse a CDDB/xmcd entry into artist, album, year, genre and track titles"""
+    fields = {}
+    for line in text.splitlines():
+        if '=' in line and not line.startswith('#'):
+            key, value = line.split('=', 1)
+            # Long values are split over several lines with the same key
+            fields[key.strip()] = fields.get(key.strip(), '') + value
+    
+    dtitle = fields.get('DTITLE', '')
+    artist, _, album = dtitle.partition(' / ')
+    titles = {}
+    for key, value in fields.items():
+        if key.startswith('TTITLE') and key[6:].isdigit():
+            titles[int(key[6:]) + 1] = value.strip()
+    return {
+        'artist': artist.strip() or 'Unknown Artist',
+        'album': (album or artist).strip() or 'Unknown Album',
+        'year': fields.get('DYEAR', '').strip(),
+        'genre': fields.get('DGENRE', '').strip(),
+        'titles': titles
+    }
+
+def musicbrainz_disc_id(toc):
+    """MusicBrainz disc ID (base64 SHA-1 of the audio session's TOC)"""
+    spans = audio_track_spans(toc)
+    leadout = spans[-1][1] + spans[-1][2]
+    offsets = [first_lba + 150 for _, first_lba, _ in spans]
+    text = f"{spans[0][0]:02X}{spans[-1][0]:02X}{leadout + 150:08X}"
+    text += ''.join(f"{offset:08X}" for offset in offsets + [0] * (99 - len(offsets)))
+    digest = base64.b64encode(hashlib.sha1(text.encode('ascii')).digest()).decode('ascii')
+    return digest.replace('+', '.').replace('/', '_').replace('=', '-')
+
+def cddb_http(url, command):
+    """Send one CDDB-over-HTTP command, returning the response lines"""
+    hello = f"{os.environ.get('USER', 'ripper')} {socket.gethostname()} cd-ripper 1.0"
+    query = urllib.parse.urlencode({'cmd': command, 'hello': hello, 'proto': 6})
+    with urllib.request.urlopen(f"{url}?{query}", timeout=15) as response:
+        return response.read().decode('utf-8', 'replace').splitlines()
+
+class MetadataCache:
+    """Persistent disc ID -> metadata cache in SQLite
+    
+    Holds raw CDDB (xmcd) entries and MusicBrainz JSON responses so known
+    discs resolve with the network unplugged. Each thread gets its own
+    connection, which keeps the local CDDB server safe to run threaded.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+    
+    def connect(self):
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""CREATE TABLE IF NOT EXISTS entries (
+                              discid TEXT NOT NULL, format TEXT NOT NULL, category TEXT NOT NULL,
+                              body TEXT NOT NULL, fetched REAL NOT NULL,
+                              PRIMARY KEY (discid, format, category)) WITHOUT ROWID""")
+            self.local.db = db
+        return db
+    
+    def get(self, discid, fmt='cddb', category=None):
+        """[(category, body)] cached for a disc ID, ordered by category"""
+        sql = "SELECT category, body FROM entries WHERE discid = ? AND format = ?"
+        params = [discid, fmt]
+        if category is not None:
+            sql += " AND category = ?"
+            params.append(category)
+        return self.connect().execute(sql + " ORDER BY category", params).fetchall()
+    
+    def put(self, discid, fmt, category, body):
+        db = self.connect()
+        with db:
+            db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                       (discid, fmt, category, body, time.time()))
+    
+    def import_freedb(self, path, on_progress=None):
+        """Bulk-import a freedb-style dump (tar, tar.bz2 or a directory)
+        
+        Entries live at <category>/<discid>; an entry's DISCID= line may
+        list further disc IDs sharing the same data. Returns the row count.
+        """
+        def members():
+            if os.path.isdir(path):
+                for root, _, files in os.walk(path):
+                    for name in files:
+                        with open(os.path.join(root, name), 'rb') as f:
+                            yield os.path.relpath(os.path.join(root, name), path), f.read()
+            else:
+                with tarfile.open(path, 'r|*') as archive:
+                    for member in archive:
+                        if member.isfile():
+                            yield member.name, archive.extractfile(member).read()
+        
+        db = self.connect()
+        count = 0
+        batch = []
+        now = time.time()
+        for name, raw in members():
+            parts = name.strip('./').split('/')
+            if len(parts) < 2:
+                continue
+            category = parts[-2]
+            body = raw.decode('utf-8', 'replace')
+            ids = {parts[-1].lower()}
+            for line in body.splitlines():
+                if line.startswith('DISCID='):
+                    ids.update(i.strip().lower() for i in line[7:].split(',') if i.strip())
+            batch.extend((discid, 'cddb', category, body, now) for discid in ids)
+            if len(batch) >= 10000:
+                count += self.insert_batch(db, batch)
+                batch = []
+                if on_progress:
+                    on_progress(count)
+        count += self.insert_batch(db, batch)
+        return count
+    
+    def insert_batch(self, db, batch):
+        with db:
+            db.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)", batch)
+        return len(batch)
+
+def flac_duration(path):
+    """Length of a FLAC file in seconds from its STREAMINFO block (None if unreadable)"""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(42)
+    except OSError:
+        return None
+    if len(header) < 42 or header[:4] != b'fLaC':
+        return None
+    # STREAMINFO bytes 10-17: 20-bit sample rate, 3+5 bits channels/depth, 36-bit sample count
+    packed = int.from_bytes(header[18:26], 'big')
+    rate = packed >> 44
+    samples = packed & 0xFFFFFFFFF
+    return samples / rate if rate else None
+
+def file_sha256(path):
+    """SHA-256 of a file, read in 4 MB blocks"""
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256()
+        while True:
+            block = f.read(4 * 1024 * 1024)
+            if not block:
+                return digest.hexdigest()
+            digest.update(block)
+
+class LibraryCatalog:
+    """SQLite catalog of every disc ripped into the library
+    
+    Lives on the output volume next to the albums, so every machine ripping
+    into the share sees the same history. A disc row holds the TOC
+    fingerprint, CDDB ID, album folder and encode settings; a file row holds
+    one output's track number, size, duration and SHA-256. Paths are stored
+    relative to the library root. The default rollback journal is kept
+    (not WAL), since WAL needs shared memory that SMB/NFS mounts don't give.
+    """
+    
+    def __init__(self, library_dir):
+        self.library_dir = library_dir
+        self.path = os.path.join(library_dir, ".catalog.sqlite")
+        self.local = threading.local()
+    
+    def connect(self):
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            os.makedirs(self.library_dir, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=30)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA foreign_keys=ON")
+            with db:
+                db.execute("""CREATE TABLE IF NOT EXISTS discs (
+                                  id INTEGER PRIMARY KEY, fingerprint TEXT, discid TEXT,
+                                  title TEXT NOT NULL, path TEXT NOT NULL, device TEXT,
+                                  settings TEXT NOT NULL, ripped REAL NOT NULL)""")
+                db.execute("""CREATE TABLE IF NOT EXISTS files (
+                                  path TEXT PRIMARY KEY,
+                                  disc INTEGER NOT NULL REFERENCES discs(id) ON DELETE CASCADE,
+                                  track INTEGER, format TEXT NOT NULL, size INTEGER NOT NULL,
+                                  duration REAL, sha256 TEXT)""")
+                db.execute("CREATE INDEX IF NOT EXISTS discs_fingerprint ON discs (fingerprint)")
+                db.execute("CREATE INDEX IF NOT EXISTS discs_path ON discs (path)")
+                db.execute("CREATE INDEX IF NOT EXISTS files_disc ON files (disc)")
+            self.local.db = db
+        return db
+    
+    def relative(self, path):
+        return os.path.relpath(path, self.library_dir)
+    
+    def record(self, disc, files):
+        """Record a finished rip, replacing any earlier rip into the same album folder
+        
+        disc holds fingerprint, discid, title, path, device and settings;
+        files is a list of dicts with path, track, format, size, duration
+        and sha256. Returns the new disc row ID.
+        """
+        db = self.connect()
+        rel_dir = self.relative(disc['path'])
+        with db:
+            db.execute("DELETE FROM discs WHERE path = ?", (rel_dir,))
+            disc_id = db.execute(
+                "INSERT INTO discs (fingerprint, discid, title, path, device, settings, ripped) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (disc.get('fingerprint'), disc.get('discid'), disc['title'], rel_dir, disc.get('device'),
+                 json.dumps(disc.get('settings', {}), sort_keys=True), time.time())
+            ).lastrowid
+            db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                           [(self.relative(f['path']), disc_id, f.get('track'), f['format'], f['size'],
+                             f.get('duration'), f.get('sha256')) for f in files])
+        return disc_id
+    
+    def disc(self, row):
+        """A disc row as a dict with its file totals and absolute folder path"""
+        db = self.connect()
+        totals = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(duration), 0) "
+                            "FROM files WHERE disc = ?", (row['id'],)).fetchone()
+        return dict(row, path=os.path.join(self.library_dir, row['path']), settings=json.loads(row['settings']),
+                    files=totals[0], size=totals[1], duration=totals[2])
+    
+    def find(self, fingerprint):
+        """The most recent rip of a disc by its TOC fingerprint (None if never ripped)"""
+        row = self.connect().execute("SELECT * FROM discs WHERE fingerprint = ? ORDER BY ripped DESC LIMIT 1",
+                                     (fingerprint,)).fetchone()
+        return self.disc(row) if row else None
+    
+    def latest(self):
+        """Absolute folders of the recorded rips, most recent first"""
+        return [os.path.join(self.library_dir, row['path'])
+                for row in self.connect().execute("SELECT path FROM discs ORDER BY ripped DESC")]
+    
+    def stats(self, days=30):
+        """Library totals, size by format and rips per day over the last few days"""
+        db = self.connect()
+        discs = db.execute("SELECT COUNT(*) FROM discs").fetchone()[0]
+        by_format = [tuple(row) for row in db.execute(
+            "SELECT format, COUNT(*), SUM(size), SUM(duration) FROM files GROUP BY format ORDER BY SUM(size) DESC")]
+        per_day = [tuple(row) for row in db.execute(
+            "SELECT date(discs.ripped, 'unixepoch', 'localtime') AS day, COUNT(DISTINCT discs.id), "
+            "COALESCE(SUM(files.size), 0) FROM discs LEFT JOIN files ON files.disc = discs.id "
+            "WHERE discs.ripped >= ? GROUP BY day ORDER BY day", (time.time() - days * 86400,))]
+        return {'discs': discs, 'by_format': by_format, 'per_day': per_day}
+
+class CDDBRequestHandler(BaseHTTPRequestHandler):
+    """CDDB-over-HTTP (cddb.cgi) front end for the metadata cache
+    
+    Answers "cddb query" and "cddb read" from the cache and, when the server
+    has an upstream URL, fetches misses from it and caches the answers.
+    """
+    
+    def do_GET(self):
+        params = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+        words = params.get('cmd', [''])[0].split()
+        if words[:2] == ['cddb', 'query'] and len(words) >= 3:
+            lines = self.query(words)
+        elif words[:2] == ['cddb', 'read'] and len(words) == 4:
+            lines = self.read(words[2], words[3].lower())
+        else:
+            lines = ["500 Unrecognized command."]
+        
+        payload = ('\n'.join(lines) + '\n').encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def query(self, words):
+        discid = words[2].lower()
+        entries = self.server.cache.get(discid)
+        if not entries and self.server.upstream:
+            self.fetch_upstream(' '.join(words), discid)
+            entries = self.server.cache.get(discid)
+        if not entries:
+            return ["202 No match found."]
+        
+        matches = []
+        for category, body in entries:
+            metadata = parse_xmcd(body)
+            matches.append(f"{category} {discid} {metadata['artist']} / {metadata['album']}")
+        if len(matches) == 1:
+            return [f"200 {matches[0]}"]
+        return ["210 Found exact matches, list follows (until terminating `.')"] + matches + ["."]
+    
+    def read(self, category, discid):
+        entries = self.server.cache.get(discid, category=category)
+        if not entries and self.server.upstream:
+            self.fetch_entry(category, discid, discid)
+            entries = self.server.cache.get(discid, category=category)
+        if not entries:
+            return [f"401 {category} {discid} No such CD entry in database."]
+        body = entries[0][1].rstrip('\n').split('\n')
+        return [f"210 {category} {discid} CD database entry follows (until terminating `.')"] + body + ["."]
+    
+    def fetch_upstream(self, command, discid):
+        """Resolve a query upstream and cache every matching entry under discid"""
+        try:
+            lines = cddb_http(self.server.upstream, command)
+        except (OSError, ValueError):
+            return
+        if lines and lines[0][:3] == '200':
+            matches = [lines[0][4:]]
+        elif lines and lines[0][:3] in ('210', '211'):
+            matches = [line for line in lines[1:] if line != '.']
+        else:
+            return
+        for match in matches:
+            fields = match.split()
+            if len(fields) >= 2:
+                self.fetch_entry(fields[0], fields[1], discid)
+    
+    def fetch_entry(self, category, match_id, discid):
+        try:
+            lines = cddb_http(self.server.upstream, f"cddb read {category} {match_id}")
+        except (OSError, ValueError):
+            return
+        if lines and lines[0].startswith('210'):
+            self.server.cache.put(discid, 'cddb', category,
+                                  '\n'.join(line for line in lines[1:] if line != '.') + '\n')
+    
+    def log_message(self, format, *args):
+        pass
+
+def serve_cddb(cache, address, upstream=None):
+    """Run the local CDDB server until interrupted"""
+    host, _, port = address.rpartition(':')
+    server = ThreadingHTTPServer((host or '127.0.0.1', int(port)), CDDBRequestHandler)
+    server.cache = cache
+    server.upstream = upstream
+    print(f"{Colors.OKGREEN}✓ CDDB server on http://{host or '127.0.0.1'}:{port}/~cddb/cddb.cgi{Colors.ENDC}")
+    if upstream:
+        print(f"{Colors.OKCYAN}ℹ Cache misses are fetched from {upstream}{Colors.ENDC}")
+    server.serve_forever()
+
+def accuraterip_disc_key(toc):
+    """AccurateRip disc identifier (the dBAR-NNN-id1-id2-cddb name) for a TOC"""
+    spans = audio_track_spans(toc)
+    offsets = [first_lba for _, first_lba, _ in spans]
+    leadout = spans[-1][1] + spans[-1][2]
+    id1 = sum(offsets) + leadout
+    id2 = sum(max(lba, 1) * (i + 1) for i, lba in enumerate(offsets)) + leadout * (len(offsets) + 1)
+    return f"dBAR-{len(spans):03d}-{id1 & 0xffffffff:08x}-{id2 & 0xffffffff:08x}-{cddb_disc_id(toc)}"
+
+class AccurateRipChecksum:
+    """Incremental AccurateRip v1/v2 and CRC32 of one track's PCM stream
+    
+    Fed chunk by chunk while the track is read, so no second pass over the
+    audio is needed. Each 32-bit stereo sample is weighted by its 1-based
+    position; the first and last 5 sectors of the disc are excluded.
+    """
+    SKIP_SAMPLES = 5 * 588
+    
+    def __init__(self, total_samples, first=False, last=False):
+        self.start = self.SKIP_SAMPLES if first else 1
+        self.end = total_samples - self.SKIP_SAMPLES if last else total_samples
+        self.position = 0
+        self.tail = b''
+        self.crc32 = 0
+        self.v1 = 0
+        self.v2 = 0
+    
+    def update(self, pcm):
+        """Add the next chunk of little-endian 16-bit stereo PCM"""
+        self.crc32 = zlib.crc32(pcm, self.crc32)
+        data = self.tail + pcm
+        usable = len(data) - len(data) % 4
+        self.tail = data[usable:]
+        count = usable // 4
+        
+        first = self.position + 1
+        lo, hi = max(first, self.start), min(first + count - 1, self.end)
+        self.position += count
+        if lo > hi:
+            return
+        
+        if np is not None:
+            samples = np.frombuffer(data, dtype='<u4', count=count)[lo - first:hi - first + 1]
+            products = samples.astype(np.uint64) * np.arange(lo, hi + 1, dtype=np.uint64)
+            low = int((products & np.uint64(0xffffffff)).sum())
+            high = int((products >> np.uint64(32)).sum())
+        else:
+            samples = array('I')
+            samples.frombytes(data[(lo - first) * 4:(hi - first + 1) * 4])
+            if sys.byteorder == 'big':
+                samples.byteswap()
+            low = high = 0
+            for i, sample in enumerate(samples, lo):
+                product = sample * i
+                low += product & 0xffffffff
+                high += product >> 32
+        self.v1 = (self.v1 + low) & 0xffffffff
+        self.v2 = (self.v2 + low + high) & 0xffffffff
+    
+    def result(self):
+        return {'crc32': f"{self.crc32 & 0xffffffff:08x}", 'v1': f"{self.v1:08x}", 'v2': f"{self.v2:08x}"}
+
+class AccurateRipDB:
+    """Local, offline AccurateRip-style checksum database (one JSON file)
+    
+    Entries are keyed by the dBAR disc identifier and hold, per track, the
+    known checksums with a confidence count. It is populated by importing
+    dBAR .bin responses and by recording verified paranoia rips.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+    
+    def load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def save(self, discs):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(discs, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+    
+    def lookup(self, disc_key):
+        """Per-track lists of {'crc', 'confidence'} for a disc, or None if unknown"""
+        with self.lock:
+            return self.load().get(disc_key)
+    
+    def add(self, discs, disc_key, track_count, index, crc, confidence):
+        tracks = discs.setdefault(disc_key, [[] for _ in range(track_count)])
+        for entry in tracks[index]:
+            if entry['crc'] == crc:
+                entry['confidence'] += confidence
+                return
+        tracks[index].append({'crc': crc, 'confidence': confidence})
+    
+    def record(self, disc_key, results):
+        """Record checksums from a paranoia rip (one result dict per track)"""
+        with self.lock:
+            discs = self.load()
+            for index, sums in enumerate(results):
+                for crc in {sums['v1'], sums['v2']}:
+                    self.add(discs, disc_key, len(results), index, crc, 1)
+            self.save(discs)
+    
+    def import_dbar(self, path):
+        """Import an AccurateRip dBAR .bin response; returns the disc keys added
+        
+        The file is a series of responses, each a 13-byte header (track count,
+        disc id 1, disc id 2, CDDB id) followed by 9 bytes per track
+        (confidence, checksum, offset-finding checksum).
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        
+        keys = set()
+        with self.lock:
+            discs = self.load()
+            position = 0
+            while position + 13 <= len(data):
+                count, id1, id2, cddb = struct.unpack_from('<BIII', data, position)
+                position += 13
+                if count == 0 or position + 9 * count > len(data):
+                    break
+                key = f"dBAR-{count:03d}-{id1:08x}-{id2:08x}-{cddb:08x}"
+                for index in range(count):
+                    confidence, crc, _ = struct.unpack_from('<BII', data, position)
+                    position += 9
+                    if confidence:
+                        self.add(discs, key, count, index, f"{crc:08x}", confidence)
+                keys.add(key)
+            self.save(discs)
+        return sorted(keys)
+
+def accuraterip_match(known, index, sums):
+    """Highest confidence among database entries matching a track's checksums (0 if none)"""
+    if not known or index >= len(known):
+        return 0
+    return max((e['confidence'] for e in known[index] if e['crc'] in (sums['v1'], sums['v2'])), default=0)
+
+REPLAYGAIN_REFERENCE = -18.0  # LUFS, ReplayGain 2.0
+
+_k_weighting_cache = {}
+
+def k_weighting(rate, length=16384):
+    """Impulse response of the BS.1770 K-weighting filter (shelf + RLB high-pass)
+    
+    Computed once per sample rate by running the two biquads over a unit
+    impulse; at `length` samples the response has decayed far below the
+    resolution of 24-bit audio.
+    """
+    if rate not in _k_weighting_cache:
+        # Pre-filter: high shelf, +4 dB above ~1.5 kHz
+        k = math.tan(math.pi * 1681.974450955533 / rate)
+        q = 0.7071752369554196
+        vh = 10 ** (3.999843853973347 / 20)
+        vb = vh ** 0.4996667741545416
+        a0 = 1 + k / q + k * k
+        shelf = ((vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0,
+                 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0)
+        # RLB weighting: second-order high-pass at ~38 Hz
+        k = math.tan(math.pi * 38.13547087602444 / rate)
+        q = 0.5003270373238773
+        a0 = 1 + k / q + k * k
+        highpass = (1.0, -2.0, 1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0)
+        
+        signal = [1.0] + [0.0] * (length - 1)
+        for b0, b1, b2, a1, a2 in (shelf, highpass):
+            x1 = x2 = y1 = y2 = 0.0
+            out = []
+            for x in signal:
+                y = b0 * x + b1 * x1 + b2 * x2 - a1 * y1 - a2 * y2
+                x2, x1, y2, y1 = x1, x, y1, y
+                out.append(y)
+            signal = out
+        _k_weighting_cache[rate] = np.array(signal)
+    return _k_weighting_cache[rate]
+
+def _true_peak_taps(factor=4, width=12):
+    """Windowed-sinc polyphase taps interpolating at 1/factor sample offsets"""
+    taps = []
+    for phase in range(1, factor):
+        offsets = np.arange(-width // 2 + 1, width // 2 + 1) - phase / factor
+        window = 0.5 + 0.5 * np.cos(np.pi * offsets / (width / 2))
+        taps.append((np.sinc(offsets) * window)[::-1])
+    return taps
+
+def gated_loudness(blocks):
+    """Integrated loudness (LUFS) of 400 ms block energies with BS.1770 gating
+    
+    None when nothing is above the absolute gate (silence or too short).
+    """
+    blocks = np.asarray(blocks)
+    if not blocks.size:
+        return None
+    with np.errstate(divide='ignore'):
+        levels = -0.691 + 10 * np.log10(blocks)
+    above = levels > -70.0
+    if not above.any():
+        return None
+    relative = -0.691 + 10 * math.log10(blocks[above].mean()) - 10.0
+    gated = blocks[above & (levels > relative)]
+    return -0.691 + 10 * math.log10(gated.mean())
+
+class LoudnessMeter:
+    """Streaming EBU R128 meter: integrated loudness and 4x-oversampled true peak
+    
+    PCM is fed in chunks of any size as it becomes available and filtered
+    with FFT convolution in fixed-size blocks, so memory stays bounded
+    however long the stream is. Needs NumPy.
+    """
+    FFT_SIZE = 1 << 18
+    
+    def __init__(self, rate, channels=2, sample_format='<i2'):
+        self.rate = rate
+        self.channels = channels
+        self.sample_format = sample_format
+        self.scale = 1 / 32768 if sample_format == '<i2' else 1.0
+        ir = k_weighting(rate)
+        self.block = self.FFT_SIZE - len(ir) + 1
+        self.response = np.fft.rfft(ir, self.FFT_SIZE)
+        self.overlap = np.zeros((channels, len(ir) - 1))
+        self.segment = rate // 10  # Gating blocks are 400 ms with 75% overlap
+        self.partial = np.zeros(0)
+        self.segments = []
+        self.taps = _true_peak_taps()
+        self.history = np.zeros((channels, len(self.taps[0]) - 1))
+        self.peak = 0.0
+        self.pending = b''
+    
+    def update(self, pcm):
+        """Feed interleaved PCM bytes"""
+        frame = np.dtype(self.sample_format).itemsize * self.channels
+        data = self.pending + pcm if self.pending else pcm
+        usable = len(data) - len(data) % frame
+        self.pending = bytes(data[usable:])
+        samples = np.frombuffer(data, dtype=self.sample_format, count=usable // frame * self.channels)
+        samples = samples.reshape(-1, self.channels).T * self.scale
+        for start in range(0, samples.shape[1], self.block):
+            self.process(samples[:, start:start + self.block])
+    
+    def process(self, x):
+        n = x.shape[1]
+        
+        # K-weighting by overlap-add FFT convolution
+        y = np.fft.irfft(np.fft.rfft(x, self.FFT_SIZE) * self.response, self.FFT_SIZE)
+        tail = self.overlap.shape[1]
+        y[:, :tail] += self.overlap
+        self.overlap = y[:, n:n + tail].copy()
+        
+        # Energy summed over channels, cut into 100 ms segments
+        energy = np.concatenate((self.partial, (y[:, :n] ** 2).sum(axis=0)))
+        whole = len(energy) - len(energy) % self.segment
+        self.segments.append(energy[:whole].reshape(-1, self.segment).sum(axis=1))
+        self.partial = energy[whole:]
+        
+        # True peak: the samples themselves plus three interpolated points between each pair
+        context = np.concatenate((self.history, x), axis=1)
+        peak = np.abs(x).max() if n else 0.0
+        for taps in self.taps:
+            for channel in context:
+                if len(channel) >= len(taps):
+                    peak = max(peak, np.abs(np.convolve(channel, taps, 'valid')).max())
+        self.peak = max(self.peak, float(peak))
+        self.history = context[:, -self.history.shape[1]:]
+    
+    def result(self):
+        """{'loudness': LUFS or None, 'peak': linear true peak, 'blocks': 400 ms block energies}"""
+        segments = np.concatenate(self.segments) if self.segments else np.zeros(0)
+        if len(segments) >= 4:
+            blocks = (segments[:-3] + segments[1:-2] + segments[2:-1] + segments[3:]) / (4 * self.segment)
+        else:
+            blocks = np.zeros(0)
+        return {'loudness': gated_loudness(blocks), 'peak': self.peak, 'blocks': blocks}
+
+def replaygain_tags(track, album):
+    """ReplayGain 2.0 tags from track and album meter results"""
+    tags = {}
+    for scope, result in (('TRACK', track), ('ALBUM', album)):
+        if result and result['loudness'] is not None:
+            tags[f'REPLAYGAIN_{scope}_GAIN'] = f"{REPLAYGAIN_REFERENCE - result['loudness']:+.2f} dB"
+            tags[f'REPLAYGAIN_{scope}_PEAK'] = f"{result['peak']:.6f}"
+    return tags
+
+def album_loudness(results):
+    """Album values: gating over every track's blocks together, the highest peak"""
+    results = [r for r in results if r]
+    if not results:
+        return None
+    blocks = np.concatenate([r['blocks'] for r in results])
+    return {'loudness': gated_loudness(blocks), 'peak': max(r['peak'] for r in results), 'blocks': blocks}
+
+class CdparanoiaProgress:
+    """Incremental parser for cdparanoia -e progress lines
+    
+    "##: 0 [read] @ 1234567" - the position is in 16-bit words, so dividing by
+    1176 gives the sector being worked on.
+    """
+    CORRECTIONS = {2, 3, 5, 10, 11}  # edge/atom fixups, scratch repair, dropped/duped bytes
+    SKIP = 6
+    READ_ERROR = 12
+    
+    def __init__(self, first_lba, sectors):
+        self.first_lba = first_lba
+        self.sectors = sectors
+        self.corrections = 0
+        self.skips = 0
+        self.read_errors = 0
+        self.sector = first_lba
+    
+    def feed(self, line):
+        """Feed one stderr line; returns an event dict for read positions"""
+        match = re.match(r'##: (-?\d+) \[[^\]]*\] @ (\d+)', line)
+        if not match:
+            return None
+        code, position = int(match.group(1)), int(match.group(2))
+        if code in self.CORRECTIONS:
+            self.corrections += 1
+        elif code == self.SKIP:
+            self.skips += 1
+        elif code == self.READ_ERROR:
+            self.read_errors += 1
+        elif code == 0:
+            self.sector = max(self.sector, position // 1176)
+        done = self.sector - self.first_lba
+        return {
+            'percent': round(max(0.0, min(100.0, done / self.sectors * 100)), 2) if self.sectors else 0.0,
+            'corrections': self.corrections,
+            'skips': self.skips,
+            'read_errors': self.read_errors
+        }
+
+# Every child process of the ripper runs under this supervisor
+RUNNER = ProcessRunner()
+
+def detect_optical_drives():
+    """List the optical drive device nodes (/dev/sr0, /dev/sr1, ...)"""
+    try:
+        names = [n for n in os.listdir('/sys/block') if n.startswith('sr')]
+    except OSError:
+        names = []
+    return [f"/dev/{n}" for n in sorted(names, key=lambda n: int(n[2:] or 0))]
+
 class CDRipper:
     def __init__(self):
         self.cd_device = "/dev/sr0"
         self.base_output_dir = "/srv/dev-disk-by-uuid-dc4918d5-6597-465b-9567-ce442fbd8e2a/CD Rips"
         self.mount_point = "/mnt/cdrom-data"
+        self.abcde_conf = os.path.expanduser("~/.abcde.conf")
+        
+        # abcde's OUTPUTDIR wins so the library only has to be configured once
+        self.base_output_dir = self.read_abcde_setting('OUTPUTDIR') or self.base_output_dir
+        
+        # Catalog of everything ripped into the library
+        self.catalog = LibraryCatalog(self.base_output_dir)
+        
+        # Permission policy applied to everything this session writes
+        # (open modes suit SMB/NFS shares; set 'group' to chgrp as well)
+        self.permission_policy = {'file_mode': 0o777, 'dir_mode': 0o777, 'umask': 0o000, 'group': None}
+        self.created_paths = set()
+        
+        # Rip engine: 'abcde', or 'native' to stream cdparanoia straight into
+        # parallel flac encoders without intermediate WAVs
+        self.rip_engine = "abcde"
+        self.cddb_url = self.read_abcde_setting('CDDBURL') or GNUDB_URL
+        self.flac_opts = self.read_abcde_setting('FLACOPTS') or "-s -e -V -8"
+        self.paranoia_opts = self.read_abcde_setting('CDPARANOIAOPTS') or "--never-skip=40"
+        
+        # Burst mode (native engine): read without paranoia and re-read only
+        # tracks whose AccurateRip checksums don't match the local database.
+        # read_offset is the drive's sample offset, passed to cdparanoia -O.
+        self.burst = False
+        self.read_offset = 0
+        
+        # Loudness stage: ReplayGain 2.0 track/album tags, measured from the
+        # ripped PCM (native engine) or by decoding the FLACs (abcde)
+        self.replaygain = True
+        
+        # Image mode: the disc is read once into image_dir and ejected, then
+        # ripped from the image. source is the CUE sheet of the image in use.
+        self.image_dir = "/var/tmp/cd-ripper-images"
+        self.image_first = False
+        self.source = None
+        self.image = None
         self.current_rip_dir = None
+        self.toc = None
+        self.label = None  # Prefix for messages when several drives run at once
+        self.runner = RUNNER
+        
+        # Farm-wide flac pool the native engine submits to (None: a pool per rip)
+        self.encode_pool = None
+        
+        # Enhanced-content video conversion: ffmpeg threads per job, jobs
+        # are added until they cover the available cores
+        self.convert_threads = 4
+        
+        # Parsed disc analysis, reused when a known disc is inserted again
+        cache_home = os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache'))
+        self.scan_cache = ScanCache(os.path.join(cache_home, 'cd-ripper', 'scans'))
+        
+        # Versions and encoders of the installed tools, re-probed only when a binary changes
+        self.tools = ToolProbe(os.path.join(cache_home, 'cd-ripper', 'tools.json'), self.runner)
+        self.accuraterip = AccurateRipDB(os.path.join(cache_home, 'cd-ripper', 'accuraterip.json'))
+        self.metadata_cache = MetadataCache(os.path.join(cache_home, 'cd-ripper', 'metadata.sqlite'))
+        
+        # Progress events from ffmpeg (sinks are set from the command line)
+        self.telemetry = Telemetry('cd_ripper')
         
     def print_header(self, text):
         """Print a formatted header"""
@@ -37,32 +1628,40 @@ class CDRipper:
     
     def print_success(self, text):
         """Print success message"""
-        print(f"{Colors.OKGREEN}✓ {text}{Colors.ENDC}")
+        print(f"{Colors.OKGREEN}✓ {self.prefix()}{text}{Colors.ENDC}")
     
     def print_error(self, text):
         """Print error message"""
-        print(f"{Colors.FAIL}✗ {text}{Colors.ENDC}")
+        print(f"{Colors.FAIL}✗ {self.prefix()}{text}{Colors.ENDC}")
     
     def print_info(self, text):
         """Print info message"""
-        print(f"{Colors.OKCYAN}ℹ {text}{Colors.ENDC}")
+        print(f"{Colors.OKCYAN}ℹ {self.prefix()}{text}{Colors.ENDC}")
     
     def print_warning(self, text):
         """Print warning message"""
-        print(f"{Colors.WARNING}⚠ {text}{Colors.ENDC}")
+        print(f"{Colors.WARNING}⚠ {self.prefix()}{text}{Colors.ENDC}")
+    
+    def prefix(self):
+        """Message prefix identifying the drive in farm mode"""
+        return f"[{self.label}] " if self.label else ""
     
-    def run_command(self, command, show_output=False, capture_output=False):
-        """Run a shell command"""
+    def run_command(self, argv, show_output=False, capture_output=False, on_line=None, timeout=None,
+                    merge_stderr=False):
+        """Run a command (an argv list - no shell) through the process runner
+        
+        capture_output returns stdout in full (merge_stderr folds stderr
+        into it). Otherwise output is streamed line by line as the tool runs,
+        to on_line if given (stderr merged in, progress redraws split on
+        carriage returns), and only the last lines are kept for errors.
+        """
         try:
+            if show_output:
+                returncode, _, _ = self.runner.run(argv, timeout=timeout, interactive=True)
+                return returncode, None, None
             if capture_output:
-                result = subprocess.run(command, shell=True, capture_output=True, text=True)
-                return result.returncode, result.stdout, result.stderr
-            elif show_output:
-                result = subprocess.run(command, shell=True)
-                return result.returncode, None, None
-            else:
-                result = subprocess.run(command, shell=True, capture_output=True, text=True)
-                return result.returncode, result.stdout, result.stderr
+                return self.runner.run(argv, capture=True, timeout=timeout, merge_stderr=merge_stderr)
+            return self.runner.run(argv, on_line=on_line, timeout=timeout)
         except Exception as e:
             self.print_error(f"Command failed: {e}")
             return 1, None, str(e)
@@ -78,18 +1677,66 @@ class CDRipper:
             else:
                 self.print_warning("Please answer 'y' or 'n'")
     
-    def fix_permissions(self, directory=None):
-        """Set permissions to 777 for all files and folders in the ripped directory"""
-        if directory is None:
-            directory = self.base_output_dir
+    def track_output(self, path):
+        """Remember a path this session wrote, plus any library folders above it"""
+        base = os.path.abspath(self.base_output_dir)
+        path = os.path.abspath(path)
+        while path.startswith(base + os.sep):
+            self.created_paths.add(path)
+            path = os.path.dirname(path)
+    
+    def get_input(self, prompt, default=None):
+        """Get user input with optional default"""
+        if default:
+            response = input(f"{Colors.OKBLUE}{prompt} [{default}]: {Colors.ENDC}").strip()
+            return response if response else default
+        else:
+            return input(f"{Colors.OKBLUE}{prompt}: {Colors.ENDC}").strip()
+    
+    def fix_permissions(self, paths=None):
+        """Apply the permission policy to the files and folders this session created
+        
+        Only tracked paths are touched, and paths that already have the right
+        mode and group are skipped, so the cost follows the rip, not the library.
+        """
+        if paths is None:
+            paths = self.created_paths
+        policy = self.permission_policy
         
-        self.print_info(f"Setting permissions for: {directory}")
-        returncode, _, _ = self.run_command(f"chmod -R 777 '{directory}'")
+        gid = -1
+        if policy.get('group'):
+            try:
+                gid = grp.getgrnam(policy['group']).gr_gid
+            except KeyError:
+                self.print_warning(f"Unknown group '{policy['group']}' - leaving group unchanged")
         
-        if returncode == 0:
-            self.print_success("Permissions set successfully (777)")
+        changed = unchanged = failed = 0
+        for path in sorted(paths):
+            try:
+                st = os.lstat(path)
+            except OSError:
+                continue  # Removed since it was written (e.g. converted originals)
+            if stat.S_ISLNK(st.st_mode):
+                continue
+            
+            mode = policy['dir_mode'] if stat.S_ISDIR(st.st_mode) else policy['file_mode']
+            mode &= ~policy.get('umask', 0)
+            try:
+                if stat.S_IMODE(st.st_mode) == mode and gid in (-1, st.st_gid):
+                    unchanged += 1
+                    continue
+                if stat.S_IMODE(st.st_mode) != mode:
+                    os.chmod(path, mode)
+                if gid not in (-1, st.st_gid):
+                    os.chown(path, -1, gid)
+                changed += 1
+            except OSError:
+                failed += 1
+        
+        if failed:
+            self.print_warning(f"Failed to set permissions on {failed} path(s) (you may need to do this manually)")
         else:
-            self.print_warning("Failed to set permissions (you may need to do this manually)")
+            self.print_success(f"Permissions set on {changed} path(s), {unchanged} already correct")
     
     def check_dependencies(self):
         """Check if required packages are installed"""
@@ -105,9 +1752,9 @@ class CDRipper:
         
         missing = []
         for name, package in dependencies.items():
-            returncode, _, _ = self.run_command(f"which {name}")
-            if returncode == 0:
-                self.print_success(f"{name} is installed")
+            tool = self.tools.tool(name)
+            if tool:
+                self.print_success(f"{name} {tool['version']} is installed")
             else:
                 self.print_error(f"{name} is NOT installed")
                 missing.append(package)
@@ -116,7 +1763,9 @@ class CDRipper:
             self.print_warning(f"\nMissing packages: {', '.join(missing)}")
             if self.yes_no_prompt("Would you like to install missing packages now?"):
                 self.print_info("Installing packages...")
-                returncode, _, _ = self.run_command(f"apt update && apt install -y {' '.join(missing)}", show_output=True)
+                returncode, _, _ = self.run_command(['apt', 'update'], show_output=True)
+                if returncode == 0:
+                    returncode, _, _ = self.run_command(['apt', 'install', '-y'] + missing, show_output=True)
                 if returncode == 0:
                     self.print_success("Packages installed successfully")
                 else:
@@ -128,29 +1777,130 @@ class CDRipper:
         
         return True
     
+    def load_source(self):
+        """Use the image at self.source in place of the drive"""
+        self.image = read_cue(self.source)
+        self.toc = self.image['toc']
+        self.print_success(f"Ripping from image: {self.source}")
+    
+    def image_cd(self):
+        """Read every audio track into one raw image plus CUE sheet; returns the CUE path"""
+        self.print_header("Imaging CD")
+        
+        toc = self.toc or read_toc(self.cd_device)
+        if not toc or not any(t['audio'] for t in toc['tracks']):
+            self.print_error("Could not read the disc's table of contents")
+            return None
+        spans = audio_track_spans(toc)
+        total_sectors = sum(sectors for _, _, sectors in spans)
+        
+        base = os.path.join(self.image_dir, cddb_disc_id(toc))
+        path, n = base, 2
+        while os.path.exists(path):
+            path = f"{base} ({n})"
+            n += 1
+        os.makedirs(path)
+        bin_path = os.path.join(path, "image.bin")
+        
+        cmd = ['cdparanoia', '-d', self.cd_device, '-e', '-O', str(self.read_offset)]
+        cmd += ['-Z'] if self.burst else shlex.split(self.paranoia_opts)
+        cmd += ['-r', f"{spans[0][0]}-{spans[-1][0]}", bin_path]
+        self.print_info(f"Reading {len(spans)} track(s) to {path}...")
+        
+        base_event = {'stage': 'image', 'item': 'disc', 'device': self.cd_device}
+        progress = CdparanoiaProgress(spans[0][1], total_sectors)
+        start = time.time()
+        
+        def on_line(line):
+            event = progress.feed(line)
+            if event:
+                self.telemetry.emit(dict(base_event, state='running', **event))
+        
+        returncode, _, _ = self.run_command(cmd, on_line=on_line)
+        elapsed = time.time() - start
+        
+        if returncode != 0 or not os.path.exists(bin_path):
+            self.telemetry.emit(dict(base_event, state='failed'))
+            self.print_error("Failed to image the disc")
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        
+        size = os.path.getsize(bin_path)
+        self.telemetry.emit(dict(base_event, state='done', percent=100.0, bytes=size,
+                                 read_speed=round(size / CD_BYTES_PER_SECOND / elapsed, 2) if elapsed else 0,
+                                 corrections=progress.corrections, skips=progress.skips,
+                                 read_errors=progress.read_errors))
+        if size != total_sectors * SECTOR_BYTES:
+            self.print_warning(f"Image is {size} bytes, the TOC expects {total_sectors * SECTOR_BYTES}")
+        
+        cue_path = os.path.join(path, "image.cue")
+        write_cue(cue_path, "image.bin", toc, paranoia=not self.burst)
+        speed = size / CD_BYTES_PER_SECOND / elapsed if elapsed else 0
+        self.print_success(f"Disc imaged in {elapsed:.0f}s ({speed:.1f}x)")
+        return cue_path
+    
     def check_cd_inserted(self):
-        """Check if a CD is inserted"""
+        """Check if a CD is inserted, waiting for one if the drive is empty"""
         self.print_header("Checking for CD")
         
-        returncode, stdout, _ = self.run_command(f"cdrdao disk-info --device {self.cd_device}", capture_output=True)
+        # The drive status answers instantly and without spawning anything,
+        # so a disc is picked up the moment the drive has loaded it
+        status = drive_status(self.cd_device)
+        if status:
+            if status != CDS_DISC_OK:
+                self.print_warning("No CD detected in drive")
+                self.print_info("Waiting for a CD...")
+                wait_for_drive(self.cd_device)
+            self.print_success("CD detected!")
+            return True
         
-        if returncode != 0 or "no disc" in stdout.lower():
+        # Drives that can't report their status are asked through cdrdao
+        while True:
+            returncode, stdout, _ = self.run_command(['cdrdao', 'disk-info', '--device', self.cd_device],
+                                                     capture_output=True, timeout=120)
+            if returncode == 0 and "no disc" not in (stdout or "").lower():
+                self.print_success("CD detected!")
+                return True
             self.print_warning("No CD detected in drive")
             input(f"{Colors.WARNING}Please insert a CD and press Enter...{Colors.ENDC}")
-            return self.check_cd_inserted()  # Recursive check
-        else:
-            self.print_success("CD detected!")
-            return True
+    
+    def wait_for_disc_change(self):
+        """Before the next disc: wait until the finished one has been taken out"""
+        if drive_status(self.cd_device) == CDS_DISC_OK:
+            self.print_info("Remove the CD and insert the next one...")
+            wait_for_drive(self.cd_device, loaded=False)
     
     def get_cd_info(self):
         """Get CD session and track information"""
         self.print_header("Analyzing CD")
         
+        # An image carries its own TOC; only audio is imaged
+        if self.source:
+            self.load_source()
+            listing = '\n'.join(f"  Track {t['number']:2d}: {'audio' if t['audio'] else 'data'}"
+                                for t in self.toc['tracks'])
+            print(f"\n{Colors.OKCYAN}{listing}{Colors.ENDC}")
+            return 2 if any(not t['audio'] for t in self.toc['tracks']) else 1
+        
+        # A known disc is answered from the scan cache
+        self.toc = read_toc(self.cd_device)
+        fingerprint = toc_fingerprint(self.toc) if self.toc else None
+        cached = self.scan_cache.get(fingerprint) if fingerprint else None
+        if cached:
+            self.print_success("Known disc - using cached analysis")
+            self.print_info(f"Sessions found: {cached['sessions']}")
+            print(f"\n{Colors.OKCYAN}{cached['track_listing']}{Colors.ENDC}")
+            return cached['sessions']
+        
         # Get session info
-        returncode, stdout, _ = self.run_command(f"cdrdao disk-info --device {self.cd_device}", capture_output=True)
+        returncode, stdout, _ = self.run_command(['cdrdao', 'disk-info', '--device', self.cd_device],
+                                                 capture_output=True, timeout=120)
         
+        # Without cdrdao's answer (missing tool, no disc) one session is assumed
         sessions = 1
-        for line in stdout.split('\n'):
+        if returncode != 0:
+            self.print_warning("cdrdao could not read the disc layout - assuming a single session")
+        for line in (stdout or '').split('\n'):
             if 'Sessions' in line:
                 try:
                     sessions = int(line.split(':')[-1].strip())
@@ -160,55 +1910,663 @@ class CDRipper:
         self.print_info(f"Sessions found: {sessions}")
         
         # Get track info
-        returncode, stdout, _ = self.run_command(f"cdparanoia -Q 2>&1", capture_output=True)
-        print(f"\n{Colors.OKCYAN}{stdout}{Colors.ENDC}")
+        returncode, stdout, stderr = self.run_command(['cdparanoia', '-d', self.cd_device, '-Q'],
+                                                      capture_output=True, timeout=120, merge_stderr=True)
+        if stdout is None:
+            self.print_error(f"Could not read the track listing: {stderr}")
+        else:
+            print(f"\n{Colors.OKCYAN}{stdout}{Colors.ENDC}")
+        
+        if fingerprint and returncode == 0:
+            self.scan_cache.put(fingerprint, {'sessions': sessions, 'track_listing': stdout})
         
         return sessions
     
-    def rip_audio(self):
-        """Rip audio tracks using abcde"""
+    def read_abcde_setting(self, name):
+        """Read a simple NAME=value assignment from the abcde config (None if absent)"""
+        try:
+            with open(self.abcde_conf) as f:
+                for line in f:
+                    if line.strip().startswith(f"{name}="):
+                        return shlex.split(line.strip().split('=', 1)[1], comments=True)[0]
+        except (OSError, ValueError, IndexError):
+            pass
+        return None
+    
+    def rip_audio(self, interactive=True, jobs=None):
+        """Rip audio tracks using abcde (or the native engine)
+        
+        Rips are written into a private incoming folder on the library volume,
+        so the album created is known exactly and is moved into place with a
+        rename. Unattended rips (farm mode) take the first CDDB match and run
+        with an explicit encoder job count.
+        """
         self.print_header("Ripping Audio Tracks")
         
-        self.print_info("Starting abcde - follow the prompts for metadata...")
-        self.print_info("You can edit artist, album, and track names when prompted")
+        incoming_root = os.path.join(self.base_output_dir, ".incoming")
+        os.makedirs(incoming_root, exist_ok=True)
+        
+        # Images are read by the native engine (abcde needs a drive). Native
+        # rips use a folder per disc that survives interruption, so --resume
+        # can pick up the journaled tracks.
+        native = self.rip_engine == 'native' or bool(self.source)
+        if native:
+            if self.source and not self.image:
+                self.load_source()
+            if not self.toc:
+                self.toc = read_toc(self.cd_device)
+            if not self.toc:
+                self.print_error("Could not read the disc's table of contents")
+                return False
+            session_dir = os.path.join(incoming_root, f"native-{toc_fingerprint(self.toc)[:16]}")
+            os.makedirs(session_dir, exist_ok=True)
+        else:
+            session_dir = tempfile.mkdtemp(prefix="rip-", dir=incoming_root)
+        out_dir = os.path.join(session_dir, 'out')
         
-        returncode, _, _ = self.run_command(f"abcde -d {self.cd_device}", show_output=True)
+        ok = False
+        try:
+            if native:
+                ok = self.rip_audio_native(out_dir, interactive, jobs or os.cpu_count() or 1)
+            else:
+                ok = self.rip_audio_abcde(session_dir, out_dir, interactive, jobs)
+                if ok:
+                    self.apply_replaygain(dict(
+                        (os.path.join(root, name), None)
+                        for root, _, files in os.walk(out_dir) for name in files if name.endswith('.flac')
+                    ))
+            rip_dir = self.publish_rip(out_dir) if ok else None
+            if rip_dir:
+                self.catalog_rip(rip_dir, native)
+        finally:
+            if ok or not native:
+                shutil.rmtree(session_dir, ignore_errors=True)
         
-        if returncode == 0:
+        if ok:
             self.print_success("Audio ripping completed!")
             
-            # Find and store the ripped directory
-            self.current_rip_dir = self.find_latest_rip_directory()
+            # Store the ripped directory
+            self.current_rip_dir = rip_dir
             
-            # Fix permissions on the newly created directory
+            # Fix permissions on the newly created files
             if self.current_rip_dir:
-                self.fix_permissions(self.current_rip_dir)
+                self.fix_permissions()
             
             return True
         else:
             self.print_error("Audio ripping failed")
             return False
     
-    def find_latest_rip_directory(self):
-        """Find the most recently created directory in the output folder"""
+    def rip_audio_abcde(self, session_dir, out_dir, interactive, jobs):
+        """Run abcde with an overlay config pointing OUTPUTDIR at out_dir"""
+        overlay_conf = os.path.join(session_dir, "abcde.conf")
+        with open(overlay_conf, 'w') as f:
+            f.write(f"OUTPUTDIR={shlex.quote(out_dir)}\n")
+        
+        if interactive:
+            self.print_info("Starting abcde - follow the prompts for metadata...")
+            self.print_info("You can edit artist, album, and track names when prompted")
+            returncode, _, _ = self.run_command(['abcde', '-c', overlay_conf, '-d', self.cd_device],
+                                                show_output=True)
+        else:
+            self.print_info(f"Starting abcde unattended ({jobs} encoder job(s))...")
+            returncode, _, tail = self.run_command(
+                ['abcde', '-N', '-j', str(jobs), '-c', overlay_conf, '-d', self.cd_device]
+            )
+            if returncode != 0:
+                print(tail.strip()[-500:])
+        return returncode == 0
+    
+    def lookup_metadata(self):
+        """Resolve disc metadata from CDDB, then MusicBrainz (cache first for both)"""
+        metadata = self.lookup_cddb() or self.lookup_musicbrainz()
+        if metadata:
+            metadata['discid'] = cddb_disc_id(self.toc)
+        return metadata
+    
+    def lookup_cddb(self):
+        """Look the disc up on the CDDB server; returns parsed metadata or None"""
+        tracks = self.toc['tracks']
+        offsets = ' '.join(str(t['lba'] + 150) for t in tracks)
+        disc_id = cddb_disc_id(self.toc)
+        cached = self.metadata_cache.get(disc_id)
+        if cached:
+            self.print_info(f"Metadata from local cache ({cached[0][0]}/{disc_id})")
+            return parse_xmcd(cached[0][1])
+        
         try:
-            base_path = Path(self.base_output_dir)
+            lines = cddb_http(self.cddb_url, f"cddb query {disc_id} {len(tracks)} {offsets} "
+                                             f"{(self.toc['leadout'] + 150) // 75}")
+            if not lines:
+                return None
+            code = lines[0][:3]
+            if code == '200':
+                category, match_id = lines[0].split()[1:3]
+            elif code in ('210', '211') and len(lines) > 1 and lines[1] != '.':
+                category, match_id = lines[1].split()[:2]
+            else:
+                return None
             
-            # Get all directories, sort by modification time
-            dirs = []
-            for artist_dir in base_path.iterdir():
-                if artist_dir.is_dir():
-                    for album_dir in artist_dir.iterdir():
-                        if album_dir.is_dir():
-                            dirs.append(album_dir)
+            lines = cddb_http(self.cddb_url, f"cddb read {category} {match_id}")
+            if not lines or not lines[0].startswith('210'):
+                return None
+        except (OSError, ValueError) as e:
+            self.print_warning(f"CDDB lookup failed: {e}")
+            return None
+        
+        body = '\n'.join(line for line in lines[1:] if line != '.') + '\n'
+        self.metadata_cache.put(disc_id, 'cddb', category, body)
+        return parse_xmcd(body)
+    
+    def lookup_musicbrainz(self):
+        """Look the disc up by MusicBrainz disc ID; returns parsed metadata or None"""
+        disc_id = musicbrainz_disc_id(self.toc)
+        cached = self.metadata_cache.get(disc_id, 'musicbrainz')
+        if cached:
+            body = cached[0][1]
+        else:
+            request = urllib.request.Request(
+                f"{MUSICBRAINZ_URL}/discid/{disc_id}?inc=artist-credits+recordings&fmt=json",
+                headers={'User-Agent': 'cd-ripper/1.0'})
+            try:
+                with urllib.request.urlopen(request, timeout=15) as response:
+                    body = response.read().decode('utf-8')
+            except (OSError, ValueError) as e:
+                self.print_warning(f"MusicBrainz lookup failed: {e}")
+                return None
+            self.metadata_cache.put(disc_id, 'musicbrainz', '', body)
+        
+        try:
+            release = json.loads(body)['releases'][0]
+        except (ValueError, KeyError, IndexError):
+            return None
+        titles = {}
+        for medium in release.get('media', []):
+            if any(disc.get('id') == disc_id for disc in medium.get('discs', [])):
+                titles = {track['position']: track['title'] for track in medium.get('tracks', [])}
+        artist = ''.join(credit['name'] + credit.get('joinphrase', '')
+                         for credit in release.get('artist-credit', []))
+        return {
+            'artist': artist or 'Unknown Artist',
+            'album': release.get('title') or 'Unknown Album',
+            'year': (release.get('date') or '')[:4],
+            'genre': '',
+            'titles': titles
+        }
+    
+    def edit_metadata(self, metadata, track_numbers):
+        """Let the user confirm or correct the album and track metadata"""
+        print(f"\n{Colors.OKCYAN}Metadata:{Colors.ENDC}")
+        print(f"  {metadata['artist']} / {metadata['album']} ({metadata['year'] or 'no year'})")
+        for n in track_numbers:
+            print(f"  {n:02d}. {metadata['titles'].get(n, f'Track {n:02d}')}")
+        
+        if not self.yes_no_prompt("\nEdit metadata?"):
+            return metadata
+        metadata['artist'] = self.get_input("Artist", metadata['artist'])
+        metadata['album'] = self.get_input("Album", metadata['album'])
+        metadata['year'] = self.get_input("Year", metadata['year'] or None)
+        metadata['genre'] = self.get_input("Genre", metadata['genre'] or None)
+        if self.yes_no_prompt("Edit track titles?"):
+            for n in track_numbers:
+                metadata['titles'][n] = self.get_input(f"Track {n:02d}",
+                                                       metadata['titles'].get(n, f"Track {n:02d}"))
+        return metadata
+    
+    def read_track(self, number, first_lba, sectors, burst=False, first=False, last=False):
+        """Read one track with cdparanoia into memory as little-endian PCM
+        
+        Returns (pcm, checksums); the AccurateRip checksums are computed on
+        the stream as it is read. Burst reads disable paranoia entirely.
+        """
+        if self.image:
+            return self.read_image_track(first_lba, sectors, first, last)
+        
+        cmd = ['cdparanoia', '-d', self.cd_device, '-e', '-O', str(self.read_offset)]
+        cmd += ['-Z'] if burst else shlex.split(self.paranoia_opts)
+        base = {'stage': 'burst' if burst else 'read', 'item': f"track {number}", 'device': self.cd_device}
+        checksum = AccurateRipChecksum(sectors * 588, first, last)
+        progress = CdparanoiaProgress(first_lba, sectors)
+        pcm = bytearray()
+        
+        def on_chunk(chunk):
+            pcm.extend(chunk)
+            checksum.update(chunk)
+        
+        def on_line(line):
+            event = progress.feed(line)
+            if event:
+                self.telemetry.emit(dict(base, state='running', **event))
+        
+        start = time.time()
+        returncode, _ = self.runner.stream(cmd + ['-r', str(number), '-'], on_chunk=on_chunk, on_line=on_line)
+        
+        elapsed = time.time() - start
+        self.telemetry.emit(dict(base, state='done' if returncode == 0 else 'failed', bytes=len(pcm),
+                                 read_speed=round(len(pcm) / CD_BYTES_PER_SECOND / elapsed, 2) if elapsed else 0,
+                                 corrections=progress.corrections, skips=progress.skips,
+                                 read_errors=progress.read_errors))
+        return (bytes(pcm), checksum.result()) if returncode == 0 and pcm else (None, None)
+    
+    def read_image_track(self, first_lba, sectors, first=False, last=False):
+        """Read one track's slice of the raw image (same result as read_track)"""
+        checksum = AccurateRipChecksum(sectors * 588, first, last)
+        pcm = bytearray()
+        with open(self.image['bin'], 'rb') as f:
+            f.seek((first_lba - self.image['first_lba']) * SECTOR_BYTES)
+            remaining = sectors * SECTOR_BYTES
+            while remaining:
+                chunk = f.read(min(remaining, SECTOR_BYTES * 75 * 10))
+                if not chunk:
+                    break
+                pcm += chunk
+                checksum.update(chunk)
+                remaining -= len(chunk)
+        return (bytes(pcm), checksum.result()) if pcm else (None, None)
+    
+    def encode_track(self, pcm, output_path, tags):
+        """Encode raw PCM to FLAC by piping it into the flac encoder"""
+        cmd = ['flac'] + shlex.split(self.flac_opts) + [
+            '--force-raw-format', '--endian=little', '--sign=signed',
+            '--channels=2', '--bps=16', '--sample-rate=44100'
+        ]
+        for key, value in tags.items():
+            if value:
+                cmd += ['-T', f"{key}={value}"]
+        cmd += ['-o', output_path, '-']
+        
+        returncode, stderr = self.runner.stream(cmd, feed=pcm)
+        if returncode != 0:
+            self.print_error(f"flac failed for {os.path.basename(output_path)}: {stderr.strip()[-200:]}")
+            return False
+        return True
+    
+    def rip_audio_native(self, out_dir, interactive, workers):
+        """Read tracks sequentially and encode them in parallel as they arrive
+        
+        Each track is read into memory and handed to a flac worker, so encoding
+        track N overlaps reading track N+1. At most workers + 1 tracks are held
+        in memory at once.
+        """
+        spans = audio_track_spans(self.toc)
+        track_numbers = [n for n, _, _ in spans]
+        
+        # The journal sits next to the output; finding one means this disc was
+        # interrupted before, and its finished tracks and metadata are reused
+        journal_path = os.path.join(os.path.dirname(out_dir), "journal.json")
+        journal = self.load_journal(journal_path)
+        if journal:
+            metadata = journal['metadata']
+            done = sum(1 for t in journal['tracks'].values() if t['state'] == 'done')
+            self.print_info(f"Resuming {metadata['artist']} / {metadata['album']}: "
+                            f"{done}/{len(spans)} track(s) already done")
+        else:
+            self.print_info("Looking up disc metadata...")
+            metadata = self.lookup_metadata()
+            if metadata:
+                self.print_success(f"Found: {metadata['artist']} / {metadata['album']}")
+            else:
+                self.print_warning("No metadata match - using placeholder names")
+                metadata = {'artist': 'Unknown Artist', 'album': 'Unknown Album', 'year': '', 'genre': '',
+                            'titles': {}, 'discid': cddb_disc_id(self.toc)}
+            if interactive:
+                metadata = self.edit_metadata(metadata, track_numbers)
+            journal = {
+                'toc_fingerprint': toc_fingerprint(self.toc),
+                'device': self.cd_device,
+                'source': self.source,
+                'metadata': metadata,
+                'tracks': dict((str(n), {'state': 'planned'}) for n in track_numbers)
+            }
+            self.write_journal(journal_path, journal)
+        journal_lock = threading.Lock()
+        
+        album_dir = os.path.join(out_dir, munge_filename(metadata['artist']), munge_filename(metadata['album']))
+        os.makedirs(album_dir, exist_ok=True)
+        
+        self.print_info(f"Reading {len(spans)} track(s), encoding with {workers} worker(s)...")
+        slots = threading.BoundedSemaphore(workers + 1)
+        
+        def output_path(number):
+            title = metadata['titles'].get(number) or f"Track {number:02d}"
+            return title, os.path.join(album_dir, f"{number:02d} - {munge_filename(title)}.flac")
+        
+        def journal_track(number, **fields):
+            with journal_lock:
+                journal['tracks'][str(number)] = fields
+                self.write_journal(journal_path, journal)
+        
+        def encode(number, sectors, pcm, sums):
+            try:
+                title, path = output_path(number)
+                tags = {
+                    'ARTIST': metadata['artist'], 'ALBUM': metadata['album'], 'TITLE': title,
+                    'TRACKNUMBER': number, 'TRACKTOTAL': len(spans), 'DATE': metadata['year'],
+                    'GENRE': metadata['genre'], 'CDDB': metadata['discid']
+                }
+                journal_track(number, state='encoding')
+                if not self.encode_track(pcm, path, tags):
+                    journal_track(number, state='failed')
+                    return False
+                
+                # A track only counts as done once ffprobe agrees on its length
+                duration = self.media_duration(path)
+                if duration and abs(duration - sectors / 75) > 0.5:
+                    self.print_error(f"Track {number:02d}: encoded {duration:.1f}s, expected {sectors / 75:.1f}s")
+                    journal_track(number, state='failed')
+                    return False
+                journal_track(number, state='done', output=path, size=os.path.getsize(path),
+                              duration=round(duration, 2), checksums=sums)
+                levels[path] = self.measure_pcm(pcm)
+                self.print_success(f"Track {number:02d}: {title}")
+                return True
+            finally:
+                slots.release()
+        
+        disc_key = accuraterip_disc_key(self.toc)
+        known = self.accuraterip.lookup(disc_key)
+        # Re-reading an image gives the same bytes, so images never burst
+        burst = self.burst and known is not None and not self.image
+        if self.burst and not burst:
+            self.print_info("Disc not in the checksum database - ripping with paranoia and recording it")
+        
+        futures = []
+        checksums = []
+        levels = {}  # Output path -> loudness, None for tracks kept from an earlier run
+        own_pool = None if self.encode_pool else ThreadPoolExecutor(max_workers=workers)
+        pool = self.encode_pool or own_pool
+        try:
+            for index, (number, first_lba, sectors) in enumerate(spans):
+                entry = journal['tracks'].get(str(number), {})
+                if (entry.get('state') == 'done' and entry.get('output') == output_path(number)[1]
+                        and os.path.exists(entry['output']) and os.path.getsize(entry['output']) == entry['size']):
+                    checksums.append(entry['checksums'])
+                    levels[entry['output']] = None
+                    continue
+                
+                slots.acquire()
+                edges = {'first': index == 0, 'last': index == len(spans) - 1}
+                pcm, sums = self.read_track(number, first_lba, sectors, burst=burst, **edges)
+                if burst and pcm is not None and not accuraterip_match(known, index, sums):
+                    self.print_warning(f"Track {number:02d}: checksum mismatch on burst read - re-reading with paranoia")
+                    pcm, sums = self.read_track(number, first_lba, sectors, **edges)
+                if pcm is None:
+                    slots.release()
+                    self.print_error(f"Failed to read track {number}")
+                    futures = None
+                    break
+                
+                confidence = accuraterip_match(known, index, sums)
+                if confidence:
+                    self.print_success(f"Track {number:02d}: accurately ripped "
+                                       f"(confidence {confidence}, v1 {sums['v1']}, v2 {sums['v2']})")
+                elif known is not None:
+                    self.print_warning(f"Track {number:02d}: no checksum match (CRC32 {sums['crc32']})")
+                checksums.append(sums)
+                futures.append(pool.submit(encode, number, sectors, pcm, sums))
+            results = [f.result() for f in futures] if futures is not None else [False]
+        finally:
+            if own_pool:
+                own_pool.shutdown()
+        
+        if futures is not None and known is None and (not self.image or self.image['paranoia']):
+            self.accuraterip.record(disc_key, checksums)
+        
+        if all(results):
+            self.apply_replaygain(levels)
+        return all(results)
+    
+    def measure_pcm(self, pcm):
+        """Loudness of a track's PCM, measured from the same buffer flac encoded"""
+        if not self.replaygain or np is None:
+            return None
+        meter = LoudnessMeter(44100)
+        meter.update(pcm)
+        return meter.result()
+    
+    def measure_file(self, path):
+        """Loudness of a FLAC file, decoded and measured as a stream"""
+        cmd = ['flac', '-d', '-c', '-s', '--force-raw-format', '--endian=little', '--sign=signed', path]
+        meter = LoudnessMeter(44100)
+        returncode, _ = self.runner.stream(cmd, on_chunk=meter.update)
+        return meter.result() if returncode == 0 else None
+    
+    def apply_replaygain(self, levels):
+        """Tag an album's FLACs with ReplayGain 2.0 track and album gain/peak
+        
+        levels maps every file of the album to its loudness, or to None for
+        files that still have to be decoded and measured (abcde rips, tracks
+        kept from an interrupted run); those are measured in parallel.
+        """
+        if not self.replaygain or not levels:
+            return
+        if np is None:
+            self.print_warning("NumPy is not installed - skipping ReplayGain analysis")
+            return
+        
+        missing = [path for path, result in levels.items() if result is None]
+        if missing:
+            self.print_info(f"Measuring loudness of {len(missing)} track(s)...")
+            with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+                for path, result in zip(missing, pool.map(self.measure_file, missing)):
+                    levels[path] = result
+        
+        album = album_loudness(levels.values())
+        commands = []
+        for path, result in sorted(levels.items()):
+            tags = replaygain_tags(result, album)
+            if tags:
+                cmd = ['metaflac'] + [f"--remove-tag={name}" for name in tags]
+                cmd += [f"--set-tag={name}={value}" for name, value in tags.items()] + [path]
+                commands.append((cmd, None))
+        failed = sum(1 for returncode, _, _ in self.runner.run_many(commands, timeout=60) if returncode != 0)
+        
+        if failed:
+            self.print_warning(f"Could not write ReplayGain tags to {failed} file(s)")
+        if album and album['loudness'] is not None:
+            self.print_success(f"ReplayGain: album {album['loudness']:.1f} LUFS "
+                               f"({REPLAYGAIN_REFERENCE - album['loudness']:+.2f} dB), "
+                               f"true peak {20 * math.log10(max(album['peak'], 1e-10)):.1f} dBTP")
+    
+    def load_journal(self, path):
+        """Load a native rip's track journal (None if there is none)"""
+        try:
+            with open(path) as f:
+                journal = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # JSON object keys are strings; track titles are keyed by number
+        journal['metadata']['titles'] = dict((int(k), v) for k, v in journal['metadata']['titles'].items())
+        return journal
+    
+    def write_journal(self, path, journal):
+        """Atomically rewrite a track journal"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(journal, f, indent=2)
+        os.replace(tmp, path)
+    
+    def pending_journals(self):
+        """(session folder, journal) for every interrupted native rip"""
+        incoming_root = os.path.join(self.base_output_dir, ".incoming")
+        pending = []
+        try:
+            names = sorted(n for n in os.listdir(incoming_root) if n.startswith("native-"))
+        except OSError:
+            names = []
+        for name in names:
+            journal = self.load_journal(os.path.join(incoming_root, name, "journal.json"))
+            if journal:
+                pending.append((os.path.join(incoming_root, name), journal))
+        return pending
+    
+    def resume(self):
+        """Resume an interrupted native rip: finished tracks are kept, the rest re-read"""
+        self.print_header("Resume Interrupted Rip")
+        self.created_paths = set()
+        
+        pending = self.pending_journals()
+        if not pending:
+            self.print_info("Nothing to resume (only native-engine rips keep a track journal; "
+                            "abcde rips are ripped again from the start)")
+            return
+        
+        for i, (_, journal) in enumerate(pending, 1):
+            metadata = journal['metadata']
+            done = sum(1 for t in journal['tracks'].values() if t['state'] == 'done')
+            print(f"  {i}. {metadata['artist']} / {metadata['album']} - {done}/{len(journal['tracks'])} done")
+        choice = self.get_input("Select the rip to resume", "1") if len(pending) > 1 else "1"
+        try:
+            _, journal = pending[int(choice) - 1]
+        except (ValueError, IndexError):
+            self.print_error("Invalid selection")
+            return
+        
+        if journal.get('source') and os.path.exists(journal['source']):
+            self.source = journal['source']
+            self.load_source()
+        else:
+            self.cd_device = journal['device']
+            if not self.check_cd_inserted():
+                return
+            self.toc = read_toc(self.cd_device)
+        if not self.toc or toc_fingerprint(self.toc) != journal['toc_fingerprint']:
+            self.print_error(f"This is not the disc being resumed ({journal['metadata']['album']})")
+            return
+        
+        self.rip_engine = 'native'
+        if self.rip_audio(interactive=False):
+            self.print_success(f"Resumed rip complete: {self.current_rip_dir}")
+    
+    def publish_rip(self, incoming_dir):
+        """Move a finished Artist/Album tree from incoming into the library
+        
+        Returns the album directory, or None if abcde produced nothing.
+        """
+        album_dirs = [os.path.join(artist, album)
+                      for artist in sorted(os.listdir(incoming_dir)) if os.path.isdir(os.path.join(incoming_dir, artist))
+                      for album in sorted(os.listdir(os.path.join(incoming_dir, artist)))] \
+            if os.path.isdir(incoming_dir) else []
+        if not album_dirs:
+            self.print_warning("abcde did not produce an album folder")
+            return None
+        
+        for rel_dir in album_dirs:
+            src = os.path.join(incoming_dir, rel_dir)
+            dest = os.path.join(self.base_output_dir, rel_dir)
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            names = os.listdir(src)
+            if not os.path.exists(dest):
+                os.rename(src, dest)
+            else:
+                # Re-rip of an existing album: replace its files one by one
+                for name in names:
+                    os.replace(os.path.join(src, name), os.path.join(dest, name))
+            for name in names:
+                self.track_output(os.path.join(dest, name))
+        
+        return os.path.join(self.base_output_dir, album_dirs[0])
+    
+    def catalog_rip(self, rip_dir, native):
+        """Record a published album, its files and the encode settings in the library catalog
+        
+        Files are hashed in parallel; FLAC durations come from STREAMINFO,
+        so nothing is decoded.
+        """
+        try:
+            paths = sorted(entry.path for entry in os.scandir(rip_dir) if entry.is_file())
+            with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+                digests = list(pool.map(file_sha256, paths))
+            
+            files = []
+            for path, sha256 in zip(paths, digests):
+                name = os.path.basename(path)
+                track = re.match(r'(\d+)', name)
+                is_flac = name.endswith('.flac')
+                files.append({
+                    'path': path,
+                    'track': int(track.group(1)) if track and is_flac else None,
+                    'format': os.path.splitext(name)[1].lstrip('.').lower() or 'other',
+                    'size': os.path.getsize(path),
+                    'duration': flac_duration(path) if is_flac else None,
+                    'sha256': sha256
+                })
             
-            if dirs:
-                latest = max(dirs, key=lambda x: x.stat().st_mtime)
-                return str(latest)
+            self.catalog.record({
+                'fingerprint': toc_fingerprint(self.toc) if self.toc else None,
+                'discid': cddb_disc_id(self.toc) if self.toc else None,
+                'title': os.path.relpath(rip_dir, self.base_output_dir).replace(os.sep, ' / '),
+                'path': rip_dir,
+                'device': None if self.source else self.cd_device,
+                'settings': {
+                    'engine': 'native' if native else 'abcde',
+                    'source': 'image' if self.source else 'disc',
+                    'flac_opts': self.flac_opts,
+                    'paranoia_opts': self.paranoia_opts,
+                    'burst': self.burst,
+                    'read_offset': self.read_offset,
+                    'replaygain': self.replaygain
+                }
+            }, files)
+        except (OSError, sqlite3.Error) as e:
+            self.print_warning(f"Could not update the library catalog: {e}")
+    
+    def find_existing_rip(self):
+        """Report an earlier rip of the disc from the library catalog
+        
+        Returns the catalog entry, or None when the disc is new or its
+        album folder has since been removed.
+        """
+        if not self.toc:
             return None
-        except Exception as e:
-            self.print_error(f"Could not find rip directory: {e}")
+        try:
+            existing = self.catalog.find(toc_fingerprint(self.toc))
+        except (OSError, sqlite3.Error) as e:
+            self.print_warning(f"Library catalog unavailable: {e}")
+            return None
+        if not existing:
+            return None
+        
+        ripped = time.strftime('%Y-%m-%d %H:%M', time.localtime(existing['ripped']))
+        if not os.path.isdir(existing['path']):
+            self.print_info(f"Ripped before on {ripped}, but {existing['path']} is gone")
+            return None
+        self.print_warning(f"Already in the library: {existing['title']} (ripped {ripped})")
+        self.print_info(f"{existing['files']} file(s), {existing['size'] / (1024 * 1024):.1f} MB, "
+                        f"{existing['duration'] / 60:.1f} min in {existing['path']}")
+        return existing
+    
+    def show_catalog_stats(self, days=30):
+        """Print library totals, size by format and recent rips per day from the catalog"""
+        self.print_header("Library Catalog")
+        try:
+            stats = self.catalog.stats(days)
+        except (OSError, sqlite3.Error) as e:
+            self.print_error(f"Library catalog unavailable: {e}")
+            return
+        
+        total = sum(size or 0 for _, _, size, _ in stats['by_format'])
+        self.print_info(f"{stats['discs']} disc(s), {total / (1024 ** 3):.1f} GB in {self.catalog.path}")
+        
+        print(f"\n{Colors.OKCYAN}Size by format:{Colors.ENDC}")
+        for fmt, count, size, duration in stats['by_format']:
+            hours = f", {duration / 3600:.1f} h" if duration else ""
+            print(f"  {fmt:<6} {count:6d} file(s)  {(size or 0) / (1024 ** 3):8.2f} GB{hours}")
+        
+        print(f"\n{Colors.OKCYAN}Rips per day (last {days} days):{Colors.ENDC}")
+        for day, discs, size in stats['per_day']:
+            print(f"  {day}  {discs:3d} disc(s)  {size / (1024 ** 2):9.1f} MB")
+        if not stats['per_day']:
+            print("  none")
+    
+    def find_latest_rip_directory(self):
+        """Find the most recently ripped album from the library catalog"""
+        try:
+            folders = self.catalog.latest()
+        except (OSError, sqlite3.Error):
             return None
+        return next((path for path in folders if os.path.isdir(path)), None)
     
     def extract_enhanced_content(self, output_dir=None):
         """Extract enhanced CD content from second session"""
@@ -223,19 +2581,22 @@ class CDRipper:
         enhanced_dir = os.path.join(output_dir, "Enhanced Content")
         
         # Create mount point if needed
-        returncode, _, _ = self.run_command(f"mkdir -p {self.mount_point}")
+        os.makedirs(self.mount_point, exist_ok=True)
         
         # Try mounting session 2
         self.print_info("Attempting to mount data session...")
-        returncode, _, _ = self.run_command(f"mount -t iso9660 -o session=1,ro {self.cd_device} {self.mount_point}")
+        returncode, _, _ = self.run_command(['mount', '-t', 'iso9660', '-o', 'session=1,ro', self.cd_device,
+                                                 self.mount_point])
         
         if returncode != 0:
             self.print_warning("Failed to mount with session=1, trying session=2...")
-            returncode, _, _ = self.run_command(f"mount -t iso9660 -o session=2,ro {self.cd_device} {self.mount_point}")
+            returncode, _, _ = self.run_command(['mount', '-t', 'iso9660', '-o', 'session=2,ro', self.cd_device,
+                                                 self.mount_point])
         
         if returncode != 0:
             self.print_warning("Failed to mount data session, trying without session option...")
-            returncode, _, _ = self.run_command(f"mount -t iso9660 -o ro {self.cd_device} {self.mount_point}")
+            returncode, _, _ = self.run_command(['mount', '-t', 'iso9660', '-o', 'ro', self.cd_device,
+                                                 self.mount_point])
         
         if returncode != 0:
             self.print_error("Could not mount enhanced content - this may not be an enhanced CD")
@@ -243,40 +2604,77 @@ class CDRipper:
         
         # Check what's mounted
         self.print_info("Checking mounted content...")
-        returncode, stdout, _ = self.run_command(f"ls -lh {self.mount_point}", capture_output=True)
+        returncode, stdout, _ = self.run_command(['ls', '-lh', self.mount_point], capture_output=True)
         
         if returncode == 0 and stdout.strip():
             print(f"\n{Colors.OKCYAN}Found content:{Colors.ENDC}")
             print(stdout)
             
             # Create output directory
-            self.run_command(f"mkdir -p '{enhanced_dir}'")
+            os.makedirs(enhanced_dir, exist_ok=True)
             
             # Copy all content
             self.print_info("Copying enhanced content...")
-            returncode, _, _ = self.run_command(f"cp -rv {self.mount_point}/* '{enhanced_dir}/'", show_output=True)
+            stats = self.copy_enhanced_content(self.mount_point, enhanced_dir)
             
             # Unmount
-            self.run_command(f"umount {self.mount_point}")
+            self.run_command(['umount', self.mount_point])
             
-            if returncode == 0:
+            if not stats['failed']:
                 self.print_success(f"Enhanced content saved to: {enhanced_dir}")
                 
                 # Fix permissions on enhanced content
-                self.fix_permissions(enhanced_dir)
+                self.fix_permissions()
                 
                 # Check for videos to convert
                 self.convert_videos(enhanced_dir)
                 return True
             else:
-                self.print_error("Failed to copy enhanced content")
-                self.run_command(f"umount {self.mount_point}")
+                self.print_error(f"Failed to copy {len(stats['failed'])} file(s):")
+                for rel_path, error in stats['failed']:
+                    print(f"  ✗ {rel_path}: {error}")
+                self.print_info("Clean the disc and run the extraction again - copied files are kept and skipped")
                 return False
         else:
             self.print_warning("No additional content found in data session")
-            self.run_command(f"umount {self.mount_point}")
+            self.run_command(['umount', self.mount_point])
             return False
     
+    def copy_enhanced_content(self, source_dir, dest_dir):
+        """Copy a mounted data session with verification, reporting throughput"""
+        def on_file(rel_path, status, size, seconds):
+            if status != 'failed':
+                self.track_output(os.path.join(dest_dir, rel_path))
+            size_mb = size / (1024 * 1024)
+            if status == 'copied':
+                rate = f", {size_mb / seconds:.1f} MB/s" if seconds > 0.1 else ""
+                print(f"  ✓ {rel_path} ({size_mb:.1f} MB{rate})")
+            elif status == 'linked':
+                print(f"  ≡ {rel_path} ({size_mb:.1f} MB, already in the content pool - linked)")
+            elif status == 'skipped':
+                print(f"  = {rel_path} (already copied)")
+            else:
+                print(f"  {Colors.FAIL}✗ {rel_path} (read error){Colors.ENDC}")
+        
+        try:
+            pool = ContentPool(os.path.join(self.base_output_dir, ".content-pool"))
+            copier = ContentCopier(source_dir, dest_dir, on_file=on_file, pool=pool)
+            stats = copier.copy()
+            self.track_output(copier.manifest_path)
+        except OSError as e:
+            self.print_error(f"Copy failed: {e}")
+            return {'copied': 0, 'skipped': 0, 'linked': 0, 'failed': [(source_dir, str(e))], 'bytes': 0,
+                    'saved': 0, 'seconds': 0}
+        
+        total_mb = stats['bytes'] / (1024 * 1024)
+        rate = total_mb / stats['seconds'] if stats['seconds'] > 0 else 0
+        self.print_info(f"Copied {stats['copied']} file(s), {total_mb:.1f} MB at {rate:.1f} MB/s "
+                        f"({stats['skipped']} already present, {len(stats['failed'])} failed)")
+        if stats['linked']:
+            self.print_success(f"Deduplicated {stats['linked']} file(s) from the content pool - "
+                               f"{stats['saved'] / (1024 * 1024):.1f} MB not written again")
+        return stats
+    
     def convert_videos(self, enhanced_dir):
         """Convert video files to MP4"""
         self.print_header("Checking for Videos to Convert")
@@ -299,67 +2697,176 @@ class CDRipper:
         for _, filename in videos_found:
             print(f"  - {filename}")
         
+        if self.tools.provides('ffmpeg', 'encoders', 'libx264') is False:
+            self.print_warning("This ffmpeg build has no libx264 encoder - videos are kept as they are")
+            return
+        
         if not self.yes_no_prompt("\nWould you like to convert these videos to MP4?"):
             return
         
+        # Gather every decision up front so the conversions can run unattended
+        jobs = []
         for video_path, video_filename in videos_found:
-            self.print_info(f"Converting {video_filename}...")
-            
             # Create output filename
             base_name = os.path.splitext(video_filename)[0]
             # Clean up filename
             base_name = base_name.replace('#', '').replace('as Q60D', '').strip()
-            output_path = os.path.join(enhanced_dir, f"{base_name}.mp4")
-            
-            # Convert with high quality settings
-            cmd = f'ffmpeg -i "{video_path}" -c:v libx264 -crf 15 -preset slow -c:a aac -b:a 256k "{output_path}"'
-            returncode, _, _ = self.run_command(cmd, show_output=True)
-            
-            if returncode == 0:
-                self.print_success(f"Converted to: {base_name}.mp4")
-                
-                # Fix permissions on the new MP4
-                self.run_command(f"chmod 777 '{output_path}'")
-                
-                if self.yes_no_prompt(f"Delete original {video_filename}?"):
-                    os.remove(video_path)
-                    self.print_success(f"Deleted {video_filename}")
+            jobs.append({
+                'input': video_path,
+                'filename': video_filename,
+                'output': os.path.join(enhanced_dir, f"{base_name}.mp4"),
+                'delete_original': self.yes_no_prompt(f"Delete original {video_filename} after conversion?")
+            })
+        
+        cores = os.cpu_count() or 1
+        threads = min(self.convert_threads, cores)
+        workers = max(1, min(len(jobs), cores // threads))
+        self.print_info(f"Converting {len(jobs)} video(s) with {workers} job(s) x {threads} thread(s)")
+        
+        for i, job in enumerate(jobs, 1):
+            job['label'] = f"[{i}/{len(jobs)}] {job['filename']}"
+            job['threads'] = threads
+        
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(self.convert_video, jobs))
+        elapsed = time.time() - start
+        
+        # Aggregate summary
+        print(f"\n{Colors.OKCYAN}Conversion summary:{Colors.ENDC}")
+        for job, ok in zip(jobs, results):
+            if ok:
+                out_mb = os.path.getsize(job['output']) / (1024 * 1024)
+                print(f"  ✓ {os.path.basename(job['output'])} ({out_mb:.1f} MB, {job['elapsed']:.0f}s)")
             else:
-                self.print_error(f"Failed to convert {video_filename}")
+                print(f"  ✗ {job['filename']}")
+        converted = sum(1 for ok in results if ok)
+        self.print_success(f"{converted}/{len(jobs)} video(s) converted in {elapsed:.0f}s")
+        
+        # Fix permissions on the new MP4s
+        self.fix_permissions([job['output'] for job, ok in zip(jobs, results) if ok])
+    
+    def media_duration(self, path):
+        """Get a media file's duration in seconds via ffprobe (0 if unknown)"""
+        returncode, stdout, _ = self.run_command(
+            ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=nw=1:nk=1', path],
+            capture_output=True
+        )
+        try:
+            return float(stdout.strip()) if returncode == 0 else 0.0
+        except ValueError:
+            return 0.0
+    
+    def convert_video(self, job):
+        """Convert one video to MP4, reporting progress as telemetry events"""
+        duration = self.media_duration(job['input'])
+        cmd = [
+            'ffmpeg', '-nostdin', '-hide_banner', '-loglevel', 'error', '-y',
+            '-i', job['input'],
+            '-threads', str(job['threads']),
+            '-c:v', 'libx264', '-crf', '15', '-preset', 'slow',
+            '-c:a', 'aac', '-b:a', '256k',
+            '-progress', 'pipe:1', '-nostats',
+            job['output']
+        ]
+        
+        self.print_info(f"{job['label']} converting...")
+        start = time.time()
+        base = {'stage': 'convert', 'item': job['filename'], 'device': self.cd_device}
+        progress = FfmpegProgress(duration)
+        
+        def on_line(line):
+            event = progress.feed(line)
+            if event:
+                self.telemetry.emit(dict(base, **dict(event, state='running')))
+        
+        returncode, _, stderr = self.runner.run(cmd, on_line=on_line, merge_stderr=False)
+        if returncode == 127:
+            self.print_error(f"{job['label']} failed to start: {stderr}")
+            job['elapsed'] = 0
+            return False
+        job['elapsed'] = time.time() - start
+        final = {'state': 'done', 'percent': 100.0, 'eta_seconds': 0} if returncode == 0 else {'state': 'failed'}
+        self.telemetry.emit(dict(base, elapsed_seconds=round(job['elapsed'], 1), **final))
+        
+        if returncode == 0 and os.path.exists(job['output']):
+            self.print_success(f"{job['label']} converted to: {os.path.basename(job['output'])}")
+            self.track_output(job['output'])
+            
+            if job['delete_original']:
+                os.remove(job['input'])
+                self.print_success(f"Deleted {job['filename']}")
+            return True
+        
+        self.print_error(f"{job['label']} failed to convert")
+        if stderr:
+            print(f"  Error: {stderr.strip()[:200]}")
+        return False
     
     def eject_cd(self):
         """Eject the CD"""
         self.print_info("Ejecting CD...")
-        self.run_command(f"eject {self.cd_device}")
+        self.run_command(['eject', self.cd_device])
         self.print_success("CD ejected")
     
     def run(self):
-        """Main workflow"""
+        """Main workflow: one session, as many discs as the user feeds it"""
         self.print_header("CD Ripper - Audio & Enhanced Content")
         
-        # Check dependencies
+        # Check dependencies (once per session)
         if not self.check_dependencies():
             return
         
-        # Check for CD
-        if not self.check_cd_inserted():
+        while True:
+            self.rip_disc()
+            if not self.yes_no_prompt("\nWould you like to rip another CD?"):
+                break
+            print("\n" * 2)
+            self.source = None
+            self.wait_for_disc_change()
+    
+    def rip_disc(self):
+        """Rip the disc in the drive (or the --source image)"""
+        self.created_paths = set()
+        self.image = None
+        
+        # Check for CD (an image given with --source stands in for it)
+        if not self.source and not self.check_cd_inserted():
             return
         
         # Get CD info
         sessions = self.get_cd_info()
         
+        # A disc that is already in the library is reported before anything is read
+        existing = self.find_existing_rip()
+        
         # Ask to proceed
-        if not self.yes_no_prompt("\nWould you like to proceed with ripping this CD?"):
+        question = "Rip this CD again anyway?" if existing else "Would you like to proceed with ripping this CD?"
+        if not self.yes_no_prompt(f"\n{question}"):
             self.print_info("Operation cancelled")
+            if existing and not self.source and self.yes_no_prompt("Would you like to eject the CD?"):
+                self.eject_cd()
             return
         
+        # Image mode frees the drive before anything is encoded
+        if self.image_first and not self.source:
+            cue_path = self.image_cd()
+            if not cue_path:
+                return
+            self.eject_cd()
+            self.source = cue_path
+            self.load_source()
+        
         # Rip audio
         if not self.rip_audio():
             self.print_error("Failed to rip audio tracks")
             return
         
-        # Check for enhanced content
-        if sessions > 1:
+        # Enhanced content lives in the data session, which images don't hold
+        if self.source:
+            if sessions > 1:
+                self.print_warning("Enhanced content is not part of the image - rip from the disc to extract it")
+        elif sessions > 1:
             self.print_info(f"\nThis appears to be an enhanced CD ({sessions} sessions)")
             if self.yes_no_prompt("Would you like to extract enhanced content (videos, images, etc.)?"):
                 self.extract_enhanced_content()
@@ -369,23 +2876,236 @@ class CDRipper:
                 self.extract_enhanced_content()
         
         # Eject
-        if self.yes_no_prompt("\nWould you like to eject the CD?"):
+        if not self.source and self.yes_no_prompt("\nWould you like to eject the CD?"):
             self.eject_cd()
         
         self.print_header("Ripping Complete!")
         self.print_success("All operations completed successfully")
+
+class RipFarm:
+    """Unattended rip sessions on several drives sharing one CPU budget
+    
+    Each drive gets its own session thread. Native-engine sessions hand their
+    flac jobs to one farm-wide encode pool sized to the machine, so a drive
+    that is idle or empty leaves its cores to the others. abcde runs its own
+    encoders, so abcde sessions get a fixed share of the cores instead.
+    CUE sheets (or the .bin beside one) can stand in for drives.
+    """
+    
+    def __init__(self, devices):
+        self.devices = devices
+        self.template = CDRipper()
+        self.pool = None
+        self.pool_size = os.cpu_count() or 1
+        self.telemetry = self.template.telemetry
+        self.rip_engine = self.template.rip_engine
+        self.burst = self.template.burst
+        self.read_offset = self.template.read_offset
+        self.replaygain = self.template.replaygain
+        self.image_first = False
+    
+    def run_session(self, device, jobs):
+        session = CDRipper()
+        session.cd_device = device
+        session.label = os.path.basename(device)
+        session.telemetry = self.telemetry
+        session.tools = self.template.tools
+        session.rip_engine = self.rip_engine
+        session.burst = self.burst
+        session.read_offset = self.read_offset
+        session.replaygain = self.replaygain
+        session.image_dir = self.template.image_dir
+        session.encode_pool = self.pool
         
-        if self.yes_no_prompt("\nWould you like to rip another CD?"):
-            print("\n" * 2)
-            self.run()
+        # An image is loaded the same way as --source, and always rips natively
+        if os.path.isfile(device):
+            cue_path = device if device.lower().endswith('.cue') else f"{os.path.splitext(device)[0]}.cue"
+            session.source = cue_path
+            try:
+                session.load_source()
+            except (OSError, ValueError, KeyError, IndexError) as e:
+                session.print_warning(f"Cannot use {device} as a drive ({e}) - skipping")
+                return None
+        else:
+            session.toc = read_toc(device)
+        if not session.toc or not any(t['audio'] for t in session.toc['tracks']):
+            session.print_warning("No audio CD - skipping drive")
+            return None
+        
+        # Native sessions may use the whole shared pool; abcde keeps to its share
+        if session.rip_engine == 'native':
+            jobs = self.pool_size
+        
+        if session.source:
+            if session.find_existing_rip():
+                session.print_warning("Skipping - this image is already in the library")
+                return None
+            return session.current_rip_dir if session.rip_audio(interactive=False, jobs=self.pool_size) else None
+        
+        # Unattended rips never redo a disc the library already holds
+        if session.find_existing_rip():
+            session.print_warning("Skipping - eject and insert the next disc")
+            session.eject_cd()
+            return None
+        
+        if self.image_first:
+            session.source = session.image_cd()
+            session.eject_cd()
+            if not session.source:
+                return None
+            session.load_source()
+            return session.current_rip_dir if session.rip_audio(interactive=False, jobs=self.pool_size) else None
+        
+        ok = session.rip_audio(interactive=False, jobs=jobs)
+        session.eject_cd()
+        return session.current_rip_dir if ok else None
+    
+    def run(self):
+        template = self.template
+        template.print_header(f"Rip Farm - {len(self.devices)} drive(s)")
+        for device in self.devices:
+            print(f"  • {device}")
+        
+        if not template.check_dependencies():
+            return
+        
+        cores = self.pool_size
+        jobs = max(1, cores // len(self.devices))
+        if self.rip_engine == 'native':
+            template.print_info(f"CPU budget: one shared pool of {cores} flac encoder(s)")
+        else:
+            template.print_info(f"CPU budget: {jobs} abcde encoder job(s) per drive "
+                                f"(images share a pool of {cores} flac encoders)")
+        
+        with ThreadPoolExecutor(max_workers=cores) as self.pool:
+            with ThreadPoolExecutor(max_workers=len(self.devices)) as drives:
+                results = list(drives.map(lambda d: self.run_session(d, jobs), self.devices))
+        
+        template.print_header("Farm Complete!")
+        for device, rip_dir in zip(self.devices, results):
+            if rip_dir:
+                template.print_success(f"{device}: {rip_dir}")
+            else:
+                template.print_warning(f"{device}: nothing ripped")
+        template.print_info("Enhanced content is not extracted in farm mode - use the interactive ripper for it")
 
 def main():
     """Entry point"""
+    parser = argparse.ArgumentParser(description="Rip audio CDs to FLAC with enhanced content")
+    parser.add_argument('--farm', nargs='*', metavar='DEVICE',
+                        help="rip every drive at once, unattended (default: all optical drives; "
+                             "CUE/BIN images made with --image can stand in for drives)")
+    parser.add_argument('--engine', choices=['abcde', 'native'],
+                        help="rip with abcde (default) or the native engine that streams "
+                             "cdparanoia into parallel flac encoders")
+    parser.add_argument('--burst', action='store_true',
+                        help="native engine: read at full speed and re-read with paranoia only "
+                             "tracks that fail AccurateRip verification")
+    parser.add_argument('--read-offset', type=int, default=0, metavar='SAMPLES',
+                        help="drive read offset correction passed to cdparanoia")
+    parser.add_argument('--no-replaygain', action='store_true',
+                        help="skip the loudness stage (ReplayGain 2.0 track and album tags)")
+    parser.add_argument('--image', action='store_true',
+                        help="image the disc at full speed, eject, then rip from the image")
+    parser.add_argument('--image-dir', metavar='DIR',
+                        help="where disc images are kept (default: /var/tmp/cd-ripper-images)")
+    parser.add_argument('--source', metavar='CUE',
+                        help="rip from an image made with --image instead of the drive")
+    parser.add_argument('--resume', action='store_true',
+                        help="resume an interrupted native-engine rip from its track journal "
+                             "(abcde rips are not journaled)")
+    parser.add_argument('--import-accuraterip', nargs='+', metavar='BIN',
+                        help="import AccurateRip dBAR .bin files into the local checksum database")
+    parser.add_argument('--import-freedb', nargs='+', metavar='DUMP',
+                        help="import freedb-style dumps (tar.bz2 or directory) into the metadata cache")
+    parser.add_argument('--cddb-server', metavar='[HOST:]PORT',
+                        help="serve the metadata cache as a CDDB server (point CDDBURL at it)")
+    parser.add_argument('--cddb-upstream', metavar='URL', default=GNUDB_URL,
+                        help="server to fetch and cache misses from ('' to stay offline)")
+    parser.add_argument('--catalog-stats', action='store_true',
+                        help="print library totals, size by format and rips per day from the catalog")
+    parser.add_argument('--telemetry', metavar='FILE',
+                        help="append progress events (JSON lines) to FILE")
+    parser.add_argument('--prom-textfile', metavar='FILE',
+                        help="keep a Prometheus textfile with the latest progress metrics")
+    args = parser.parse_args()
+    telemetry = Telemetry('cd_ripper', args.telemetry, args.prom_textfile)
+    
     try:
-        ripper = CDRipper()
-        ripper.run()
+        if args.import_accuraterip:
+            ripper = CDRipper()
+            for path in args.import_accuraterip:
+                for key in ripper.accuraterip.import_dbar(path):
+                    ripper.print_success(f"Imported {key}")
+            ripper.print_info(f"Checksum database: {ripper.accuraterip.path}")
+            return
+        
+        if args.import_freedb:
+            ripper = CDRipper()
+            for path in args.import_freedb:
+                ripper.print_info(f"Importing {path}...")
+                count = ripper.metadata_cache.import_freedb(
+                    path, on_progress=lambda n: print(f"\r  {n} entries", end='', flush=True))
+                print()
+                ripper.print_success(f"Imported {count} entries from {os.path.basename(path)}")
+            ripper.print_info(f"Metadata cache: {ripper.metadata_cache.path}")
+            return
+        
+        if args.catalog_stats:
+            CDRipper().show_catalog_stats()
+            return
+        
+        if args.cddb_server:
+            serve_cddb(CDRipper().metadata_cache, args.cddb_server, args.cddb_upstream or None)
+            return
+        
+        if args.resume:
+            # Only the native engine journals its tracks; abcde rips start over
+            if args.engine == 'abcde':
+                print(f"{Colors.FAIL}--resume only applies to native-engine rips - "
+                      f"abcde rips are not journaled and must be ripped again{Colors.ENDC}")
+                sys.exit(1)
+            ripper = CDRipper()
+            ripper.telemetry = telemetry
+            ripper.replaygain = not args.no_replaygain
+            ripper.resume()
+            return
+        
+        engine = 'native' if args.burst else args.engine or 'abcde'
+        if args.farm is not None:
+            devices = args.farm or detect_optical_drives()
+            if not devices:
+                print(f"{Colors.FAIL}No optical drives found{Colors.ENDC}")
+                sys.exit(1)
+            farm = RipFarm(devices)
+            farm.telemetry = telemetry
+            farm.rip_engine = engine
+            farm.burst = args.burst
+            farm.read_offset = args.read_offset
+            farm.replaygain = not args.no_replaygain
+            farm.image_first = args.image
+            if args.image_dir:
+                farm.template.image_dir = args.image_dir
+            farm.run()
+        else:
+            ripper = CDRipper()
+            ripper.telemetry = telemetry
+            ripper.rip_engine = engine
+            ripper.burst = args.burst
+            ripper.read_offset = args.read_offset
+            ripper.replaygain = not args.no_replaygain
+            ripper.image_first = args.image
+            ripper.source = args.source
+            if args.image_dir:
+                ripper.image_dir = args.image_dir
+            ripper.run()
     except KeyboardInterrupt:
+        RUNNER.cancel()
         print(f"\n\n{Colors.WARNING}Operation cancelled by user{Colors.ENDC}")
+        if CDRipper().pending_journals():
+            print(f"{Colors.OKCYAN}Finished tracks are kept - run 'cd-ripper --resume' to rip the rest{Colors.ENDC}")
+        elif not (args.resume or args.burst or args.image or args.source) and args.engine != 'native':
+            print(f"{Colors.OKCYAN}abcde rips cannot be resumed - use --engine native for resumable rips{Colors.ENDC}")
         sys.exit(0)
     except Exception as e:
         print(f"\n{Colors.FAIL}Unexpected error: {e}{Colors.ENDC}")
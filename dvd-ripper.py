@@ -5,12 +5,30 @@ Automates DVD ripping with configurable output formats (MP4, MKV, HEVC, Audio-on
 Uses HandBrake CLI (free, GPLv2) for extraction and conversion
 """
 
+import hashlib
+import json
+import math
 import os
-import subprocess
 import sys
 import re
 import shutil
-from pathlib import Path
+import socket
+import sqlite3
+import stat
+import grp
+import fcntl
+import glob
+import argparse
+import asyncio
+import collections
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:  # no loudness analysis without it
+    np = None
 
 class Colors:
     """ANSI color codes for terminal output"""
@@ -24,8 +42,598 @@ class Colors:
     BOLD = '\033[1m'
     UNDERLINE = '\033[4m'
 
+class ScanCache:
+    """Size-bounded on-disk LRU cache of parsed disc analysis, keyed by disc fingerprint"""
+    VERSION = 1
+    
+    def __init__(self, cache_dir, max_entries=500, max_bytes=20 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+    
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def get(self, key):
+        """Return the cached entry for key, or None on a miss or stale entry"""
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        if entry.get('version') != self.VERSION:
+            self.invalidate(key)
+            return None
+        
+        # Touch the entry so eviction sees it as recently used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return entry.get('data')
+    
+    def put(self, key, data):
+        """Store an entry atomically, then evict the least recently used ones"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{self._path(key)}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'version': self.VERSION, 'data': data}, f)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            return
+        self.evict()
+    
+    def invalidate(self, key):
+        """Drop a single entry"""
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+    
+    def evict(self):
+        """Remove oldest entries until the cache is within its count and size limits"""
+        try:
+            entries = [e for e in os.scandir(self.cache_dir) if e.name.endswith('.json')]
+        except OSError:
+            return
+        entries = sorted(((e.stat().st_mtime, e.stat().st_size, e.path) for e in entries), reverse=True)
+        
+        total = 0
+        for count, (_, size, path) in enumerate(entries, 1):
+            total += size
+            if count > self.max_entries or total > self.max_bytes:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+class Telemetry:
+    """Structured progress events from the external tools
+    
+    Events are dicts (stage, item, percent, fps, avg_fps, eta_seconds, bytes,
+    ...). Each one is appended to an optional JSON-lines log, folded into an
+    optional Prometheus textfile (for node_exporter's textfile collector) and
+    rendered as a compact single progress line covering every active job.
+    """
+    
+    def __init__(self, prefix, jsonl_path=None, prom_path=None):
+        self.prefix = prefix
+        self.jsonl_path = jsonl_path
+        self.prom_path = prom_path
+        self.active = {}
+        self.latest = {}
+        self.lock = threading.Lock()
+        self.last_prom_write = 0
+        self.show_line = sys.stdout.isatty()
+    
+    def emit(self, event):
+        """Record one progress event"""
+        event = dict(event, ts=round(time.time(), 3))
+        key = (event.get('device', ''), event['stage'], event['item'])
+        with self.lock:
+            # Keep the last known value of every metric for the textfile
+            self.latest[key] = dict(self.latest.get(key, {}), **event)
+            if event.get('state', 'running') == 'running':
+                self.active[key] = event
+            else:
+                self.active.pop(key, None)
+            
+            if self.jsonl_path:
+                with open(self.jsonl_path, 'a') as f:
+                    f.write(json.dumps(event) + '\n')
+            
+            # Textfile collectors only need a fresh snapshot every second or so
+            if self.prom_path and (event.get('state') != 'running' or time.time() - self.last_prom_write > 1):
+                self.write_prometheus()
+                self.last_prom_write = time.time()
+            
+            self.render()
+    
+    def write_prometheus(self):
+        lines = []
+        metrics = sorted(set(k for e in self.latest.values() for k, v in e.items()
+                             if isinstance(v, (int, float)) and not isinstance(v, bool) and k != 'ts'))
+        for metric in metrics:
+            name = f"{self.prefix}_{metric}"
+            lines.append(f"# TYPE {name} gauge")
+            for (device, stage, item), event in sorted(self.latest.items()):
+                if metric in event:
+                    labels = f'device="{device}",stage="{stage}",item="{item}",state="{event.get("state", "running")}"'
+                    lines.append(f"{name}{{{labels}}} {event[metric]}")
+        tmp_path = f"{self.prom_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, self.prom_path)
+    
+    def render(self):
+        """Redraw the single progress line (or clear it when nothing is running)"""
+        if not self.show_line:
+            return
+        parts = []
+        for event in self.active.values():
+            part = f"{event['item']} {event.get('percent', 0):.1f}%"
+            if event.get('fps'):
+                part += f" {event['fps']:.0f}fps"
+            if event.get('eta_seconds') is not None:
+                part += f" ETA {int(event['eta_seconds']) // 60}:{int(event['eta_seconds']) % 60:02d}"
+            parts.append(part)
+        line = ' | '.join(parts)
+        width = shutil.get_terminal_size().columns - 1
+        sys.stdout.write(f"\r{line[:width]:<{width}}" if line else f"\r{' ' * width}\r")
+        sys.stdout.flush()
+
+class FfmpegProgress:
+    """Incremental parser for ffmpeg's -progress key=value blocks"""
+    
+    def __init__(self, duration=0):
+        self.duration = duration
+        self.block = {}
+    
+    def feed(self, line):
+        """Feed one line; returns an event dict at the end of each block"""
+        key, _, value = line.strip().partition('=')
+        if not key:
+            return None
+        self.block[key] = value.strip()
+        if key != 'progress':
+            return None
+        
+        block, self.block = self.block, {}
+        event = {}
+        try:
+            position = int(block.get('out_time_us') or block.get('out_time_ms') or 0) / 1e6
+            if block.get('fps'):
+                event['fps'] = float(block['fps'])
+            if block.get('total_size', '').isdigit():
+                event['bytes'] = int(block['total_size'])
+            speed = float(block.get('speed', '0x').rstrip('x') or 0)
+        except ValueError:
+            return None
+        if speed:
+            event['speed'] = speed
+        if self.duration:
+            event['percent'] = round(min(100.0, position / self.duration * 100), 2)
+            if speed:
+                event['eta_seconds'] = round(max(0.0, self.duration - position) / speed)
+        event['state'] = 'running' if value.strip() == 'continue' else 'done'
+        return event
+
+class ProcessRunner:
+    """Shell-free subprocess supervisor built on asyncio
+    
+    Commands are argv lists, so paths never need quoting. Output is read
+    incrementally and handed to on_line a line at a time (carriage-return
+    progress redraws count as lines), so parsing happens while the tool is
+    still running; unless the caller asks for a capture, only the last
+    lines are kept. stream() runs binary tools instead: stdin is fed from
+    memory and stdout is handed over in raw chunks. Every running child is
+    tracked so cancel() can stop them all, and run_many() supervises
+    several children from one loop.
+    """
+    TAIL_LINES = 20
+    MAX_LINE = 64 * 1024  # Longest partial line held uncaptured; longer ones are cut and marked
+    CHUNK = 1 << 20  # Largest piece of a byte stream handed over or written at once
+    
+    def __init__(self):
+        self.children = set()
+        self.lock = threading.Lock()
+        self.cancelled = False
+    
+    def run(self, argv, on_line=None, capture=False, timeout=None, merge_stderr=True, interactive=False):
+        """Run one command; returns (returncode, stdout, stderr)
+        
+        With capture, stdout is the full output text; otherwise it is None.
+        stderr holds the last lines of stderr (of both streams when merged).
+        Interactive commands inherit the terminal.
+        """
+        return asyncio.run(self.supervise(argv, on_line, capture, timeout, merge_stderr, interactive))
+    
+    def stream(self, argv, on_chunk=None, feed=None, on_line=None, timeout=None):
+        """Run one command over raw bytes; returns (returncode, stderr)
+        
+        feed is written to stdin, which is then closed. stdout goes to
+        on_chunk as it is read, in pieces of up to CHUNK bytes (and is
+        discarded without on_chunk). stderr lines go to on_line, and its
+        last lines are returned.
+        """
+        returncode, _, stderr = asyncio.run(self.supervise(
+            argv, on_line, timeout=timeout, merge_stderr=False, feed=feed,
+            on_chunk=on_chunk or (lambda chunk: None)
+        ))
+        return returncode, stderr
+    
+    def run_many(self, commands, timeout=None):
+        """Run several (argv, on_line) commands concurrently; returns their results in order"""
+        async def gather():
+            return await asyncio.gather(*(self.supervise(argv, on_line, timeout=timeout)
+                                          for argv, on_line in commands))
+        return asyncio.run(gather())
+    
+    def cancel(self):
+        """Kill every running child and refuse to start new ones"""
+        with self.lock:
+            self.cancelled = True
+            children = list(self.children)
+        for proc in children:
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+    
+    async def supervise(self, argv, on_line=None, capture=False, timeout=None, merge_stderr=True,
+                        interactive=False, feed=None, on_chunk=None):
+        if self.cancelled:
+            return 1, None, "cancelled"
+        argv = [str(arg) for arg in argv]
+        pipe = asyncio.subprocess.PIPE
+        try:
+            if interactive:
+                proc = await asyncio.create_subprocess_exec(*argv)
+            else:
+                proc = await asyncio.create_subprocess_exec(
+                    *argv, stdin=asyncio.subprocess.DEVNULL if feed is None else pipe, stdout=pipe,
+                    stderr=asyncio.subprocess.STDOUT if merge_stderr else pipe
+                )
+        except OSError as e:
+            return 127, None, str(e)
+        with self.lock:
+            self.children.add(proc)
+        
+        tail = collections.deque(maxlen=self.TAIL_LINES)
+        captured = [] if capture else None
+        
+        def deliver(raw, keep, tailed, truncated=False):
+            line = raw.decode('utf-8', 'replace')
+            if truncated:
+                line = f"[truncated] {line}"
+            if keep is not None:
+                keep.append(line)
+            if line.strip():
+                if tailed:
+                    tail.append(line)
+                if on_line:
+                    on_line(line)
+        
+        async def pump(stream, keep, tailed):
+            pending, truncated = b'', False
+            while True:
+                chunk = await stream.read(65536)
+                if not chunk:
+                    break
+                *lines, pending = re.split(rb'\r\n|[\r\n]', pending + chunk)
+                for raw in lines:
+                    deliver(raw, keep, tailed, truncated)
+                    truncated = False
+                # Captured lines are kept whole; otherwise only a line's end is held
+                if keep is None and len(pending) > self.MAX_LINE:
+                    pending, truncated = pending[-self.MAX_LINE:], True
+            if pending:
+                deliver(pending, keep, tailed, truncated)
+        
+        async def copy(stream):
+            while True:
+                chunk = await stream.read(self.CHUNK)
+                if not chunk:
+                    break
+                on_chunk(chunk)
+        
+        async def write(data):
+            # A child that exits early (or fails) stops reading; its exit status tells why
+            view = memoryview(data)
+            try:
+                for start in range(0, len(view), self.CHUNK):
+                    proc.stdin.write(view[start:start + self.CHUNK])
+                    await proc.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                proc.stdin.close()
+        
+        waiters = [proc.wait()]
+        if feed is not None:
+            waiters.append(write(feed))
+        if on_chunk:
+            waiters.append(copy(proc.stdout))
+        elif not interactive:
+            # A separate stderr alone feeds the tail, like a captured stderr
+            waiters.append(pump(proc.stdout, captured, merge_stderr))
+        if not interactive and not merge_stderr:
+            waiters.append(pump(proc.stderr, None, True))
+        try:
+            await asyncio.wait_for(asyncio.gather(*waiters), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            tail.append(f"timed out after {timeout}s")
+        except BaseException:
+            # Cancelled, or a chunk callback failed
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+            await proc.wait()
+            raise
+        finally:
+            with self.lock:
+                self.children.discard(proc)
+        
+        stdout = '\n'.join(captured) if captured is not None else None
+        return proc.returncode, stdout, '\n'.join(tail)
+
+class ToolProbe:
+    """What the external tools on this host are, and what they can do
+    
+    Each tool is probed once - its version, plus the encoders and demuxers
+    of HandBrakeCLI/ffmpeg - and the result is cached on disk keyed on the
+    binary's path and mtime. Later runs only stat the binaries, and an
+    upgraded or replaced tool is probed again automatically.
+    """
+    VERSION = 1
+    VERSION_ARGS = {'ffmpeg': ['-version'], 'ffprobe': ['-version'], 'lsdvd': ['-V']}
+    LIBRARY_DIRS = ['/usr/lib', '/usr/lib64', '/usr/local/lib', '/lib', '/usr/lib/*-linux-gnu', '/lib/*-linux-gnu']
+    
+    def __init__(self, cache_path, runner):
+        self.cache_path = cache_path
+        self.runner = runner
+        self.tools = None
+        self.lock = threading.Lock()
+    
+    def load(self):
+        if self.tools is None:
+            try:
+                with open(self.cache_path) as f:
+                    cached = json.load(f)
+                self.tools = cached['tools'] if cached.get('version') == self.VERSION else {}
+            except (OSError, ValueError, KeyError):
+                self.tools = {}
+        return self.tools
+    
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'version': self.VERSION, 'tools': self.tools}, f, indent=2)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass
+    
+    def tool(self, name):
+        """Capabilities of a tool on PATH ({'path', 'version', ...}), or None if it isn't installed"""
+        path = shutil.which(name)
+        if not path:
+            return None
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        
+        with self.lock:
+            entry = self.load().get(name)
+            if entry and entry['path'] == path and entry['mtime'] == mtime:
+                return entry
+        
+        entry = dict(self.inspect(name, path), path=path, mtime=mtime)
+        with self.lock:
+            self.load()[name] = entry
+            self.save()
+        return entry
+    
+    def inspect(self, name, path):
+        """Run the tool to learn its version and, where it can tell, its encoders"""
+        _, stdout, _ = self.runner.run([path] + self.VERSION_ARGS.get(name, ['--version']),
+                                       capture=True, timeout=30)
+        first = next((line.strip() for line in (stdout or "").split('\n') if line.strip()), "")
+        version = re.search(r'\d+(\.\d+)+\S*', first)
+        info = {'version': version.group(0) if version else (first[:40] or "unknown")}
+        
+        if name == 'HandBrakeCLI':
+            info.update(self.handbrake_encoders(path))
+        elif name == 'ffmpeg':
+            info['encoders'] = self.ffmpeg_list(path, '-encoders')
+            info['demuxers'] = self.ffmpeg_list(path, '-demuxers')
+        return info
+    
+    def handbrake_encoders(self, path):
+        """Video and audio encoders compiled into HandBrakeCLI, from its --help listing"""
+        _, stdout, _ = self.runner.run([path, '--help'], capture=True, timeout=30)
+        found = {'encoders': [], 'audio_encoders': []}
+        current = None
+        for line in (stdout or "").split('\n'):
+            # "   -e, --encoder <string>  Select video encoder:" followed by
+            # one deeply indented encoder name per line
+            if re.search(r'--encoder <', line):
+                current = found['encoders']
+            elif re.search(r'--aencoder <', line):
+                current = found['audio_encoders']
+            elif current is not None:
+                match = re.match(r'\s{10,}([\w.:-]+)\s*$', line)
+                if match:
+                    current.append(match.group(1))
+                else:
+                    current = None
+        return found
+    
+    def ffmpeg_list(self, path, option):
+        """Names from an ffmpeg -encoders/-demuxers table"""
+        _, stdout, _ = self.runner.run([path, '-hide_banner', option], capture=True, timeout=30)
+        names = []
+        table = False
+        for line in (stdout or "").split('\n'):
+            if line.strip().startswith('--'):
+                table = True
+            elif table and len(line.split()) >= 2:
+                names.append(line.split()[1])
+        return names
+    
+    def library(self, name):
+        """Path of an installed shared library (e.g. libdvdcss), or None"""
+        for lib_dir in self.LIBRARY_DIRS:
+            matches = glob.glob(os.path.join(lib_dir, f"{name}.so*"))
+            if matches:
+                return sorted(matches)[0]
+        return None
+    
+    def provides(self, name, key, value):
+        """Whether a tool lists value under key; unknown when the listing couldn't be parsed"""
+        listing = (self.tool(name) or {}).get(key)
+        return value in listing if listing else None
+
+def file_sha256(path):
+    """SHA-256 of a file, read in 4 MB blocks"""
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256()
+        while True:
+            block = f.read(4 * 1024 * 1024)
+            if not block:
+                return digest.hexdigest()
+            digest.update(block)
+
+class LibraryCatalog:
+    """SQLite catalog of every disc ripped into the library
+    
+    Lives on the output volume next to the rips, so every machine ripping
+    into the share sees the same history. A disc row holds the IFO
+    fingerprint, volume ID, rip folder and encode settings; a file row holds
+    one output's DVD title, track number, size, duration, SHA-256 and the RF
+    its title was encoded with. Paths
+    are stored relative to the library root. The default rollback journal is
+    kept (not WAL), since WAL needs shared memory that SMB/NFS mounts don't give.
+    """
+    
+    def __init__(self, library_dir):
+        self.library_dir = library_dir
+        self.path = os.path.join(library_dir, ".catalog.sqlite")
+        self.local = threading.local()
+    
+    def connect(self):
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            os.makedirs(self.library_dir, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=30)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA foreign_keys=ON")
+            with db:
+                db.execute("""CREATE TABLE IF NOT EXISTS discs (
+                                  id INTEGER PRIMARY KEY, fingerprint TEXT, volume_id TEXT,
+                                  title TEXT NOT NULL, path TEXT NOT NULL, device TEXT,
+                                  settings TEXT NOT NULL, ripped REAL NOT NULL)""")
+                db.execute("""CREATE TABLE IF NOT EXISTS files (
+                                  path TEXT PRIMARY KEY,
+                                  disc INTEGER NOT NULL REFERENCES discs(id) ON DELETE CASCADE,
+                                  title INTEGER, track INTEGER, format TEXT NOT NULL, size INTEGER NOT NULL,
+                                  duration REAL, sha256 TEXT, rf REAL)""")
+                # Catalogs from before per-file RFs gain the column, empty
+                if 'rf' not in [row['name'] for row in db.execute("PRAGMA table_info(files)")]:
+                    db.execute("ALTER TABLE files ADD COLUMN rf REAL")
+                db.execute("CREATE INDEX IF NOT EXISTS discs_fingerprint ON discs (fingerprint)")
+                db.execute("CREATE INDEX IF NOT EXISTS discs_path ON discs (path)")
+                db.execute("CREATE INDEX IF NOT EXISTS files_disc ON files (disc)")
+            self.local.db = db
+        return db
+    
+    def relative(self, path):
+        return os.path.relpath(path, self.library_dir)
+    
+    def record(self, disc, files):
+        """Record a finished rip, replacing any earlier rip into the same album folder
+        
+        disc holds fingerprint, volume_id, title, path, device and settings;
+        files is a list of dicts with path, title, track, format, size,
+        duration, sha256 and rf. Returns the new disc row ID.
+        """
+        db = self.connect()
+        rel_dir = self.relative(disc['path'])
+        with db:
+            db.execute("DELETE FROM discs WHERE path = ?", (rel_dir,))
+            disc_id = db.execute(
+                "INSERT INTO discs (fingerprint, volume_id, title, path, device, settings, ripped) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (disc.get('fingerprint'), disc.get('volume_id'), disc['title'], rel_dir, disc.get('device'),
+                 json.dumps(disc.get('settings', {}), sort_keys=True), time.time())
+            ).lastrowid
+            db.executemany("INSERT OR REPLACE INTO files (path, disc, title, track, format, size, duration, sha256, rf) "
+                           "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                           [(self.relative(f['path']), disc_id, f.get('title'), f.get('track'), f['format'],
+                             f['size'], f.get('duration'), f.get('sha256'), f.get('rf')) for f in files])
+        return disc_id
+    
+    def disc(self, row):
+        """A disc row as a dict with its file totals and absolute folder path"""
+        db = self.connect()
+        totals = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(duration), 0) "
+                            "FROM files WHERE disc = ?", (row['id'],)).fetchone()
+        return dict(row, path=os.path.join(self.library_dir, row['path']), settings=json.loads(row['settings']),
+                    files=totals[0], size=totals[1], duration=totals[2])
+    
+    def find(self, fingerprint):
+        """The most recent rip of a disc by its fingerprint (None if never ripped)"""
+        row = self.connect().execute("SELECT * FROM discs WHERE fingerprint = ? ORDER BY ripped DESC LIMIT 1",
+                                     (fingerprint,)).fetchone()
+        return self.disc(row) if row else None
+    
+    def files(self, rip_dir):
+        """The files recorded for a rip folder, in track order, with absolute paths"""
+        rows = self.connect().execute(
+            "SELECT files.* FROM files JOIN discs ON files.disc = discs.id WHERE discs.path = ? "
+            "ORDER BY files.track, files.path", (self.relative(rip_dir),))
+        return [dict(row, path=os.path.join(self.library_dir, row['path'])) for row in rows]
+    
+    def stats(self, days=30):
+        """Library totals, size by format and rips per day over the last few days"""
+        db = self.connect()
+        discs = db.execute("SELECT COUNT(*) FROM discs").fetchone()[0]
+        by_format = [tuple(row) for row in db.execute(
+            "SELECT format, COUNT(*), SUM(size), SUM(duration) FROM files GROUP BY format ORDER BY SUM(size) DESC")]
+        per_day = [tuple(row) for row in db.execute(
+            "SELECT date(discs.ripped, 'unixepoch', 'localtime') AS day, COUNT(DISTINCT discs.id), "
+            "COALESCE(SUM(files.size), 0) FROM discs LEFT JOIN files ON files.disc = discs.id "
+            "WHERE discs.ripped >= ? GROUP BY day ORDER BY day", (time.time() - days * 86400,))]
+        return {'discs': discs, 'by_format': by_format, 'per_day': per_day}
+
 class OutputFormat:
-    """Output format configurations for HandBrake"""
+    """Output format configurations for HandBrake
+    
+    Only formats whose encoders the installed tools provide are offered.
+    'quality_offset' shifts the RF value for encoders with their own scale.
+    """
+    # AAC encoders in order of preference; the best one HandBrake has is used
+    AAC_ENCODERS = ['fdk_aac', 'ca_aac', 'av_aac']
+    
+    # ffmpeg encoders behind the audio-only formats
+    FFMPEG_AUDIO = {'flac24': 'flac', 'mp3': 'libmp3lame'}
+    
+    # ffmpeg options matching each HandBrake audio encoder, for muxes ffmpeg
+    # does itself (lossy ones also get the quality preset's bitrate)
+    FFMPEG_MUX_AUDIO = {
+        'av_aac': ['-c:a', 'aac'],
+        'flac24': ['-c:a', 'flac', '-sample_fmt:a', 's32'],
+        'opus': ['-c:a', 'libopus']
+    }
+    
     FORMATS = {
         '1': {
             'name': 'MP4 (H.264)',
@@ -66,16 +674,45 @@ class OutputFormat:
             'format': None,
             'aencoder': 'mp3',
             'description': 'Compressed audio extraction'
+        },
+        '6': {
+            'name': 'MKV (AV1)',
+            'extension': 'mkv',
+            'encoder': 'svt_av1',
+            'format': 'av_mkv',
+            'aencoder': 'opus',
+            'quality_offset': 8,
+            'description': 'Smallest files, needs an AV1-capable player'
         }
     }
 
 class QualityPreset:
-    """Quality presets for HandBrake encoding"""
+    """Quality presets for HandBrake encoding
+    
+    'preset' is the encoder preset used until this host has been benchmarked;
+    after that the slowest (best) preset whose measured speed is at least
+    'min_speed' times realtime is used instead. With the RF search enabled,
+    'quality' is only the centre of the search and each title gets the
+    highest RF whose sampled SSIM still reaches 'ssim_target'.
+    """
+    # x264/x265 presets tried by the benchmark, fastest first
+    ENCODER_PRESETS = ['veryfast', 'faster', 'fast', 'medium', 'slow', 'slower']
+    
+    # Encoders with numbered presets, mapped from the x264 names above
+    NATIVE_PRESETS = {
+        'svt_av1': {'veryfast': '10', 'faster': '9', 'fast': '8', 'medium': '6', 'slow': '5', 'slower': '4'}
+    }
+    
+    # RF values tried by the per-title search, relative to the preset's 'quality'
+    SEARCH_WINDOW = (-6, 8)
+    
     PRESETS = {
         '1': {
             'name': 'High Quality (Larger files)',
             'quality': 18,
+            'ssim_target': 0.985,
             'preset': 'slow',
+            'min_speed': 1.0,
             'audio_bitrate': '320',
             'hb_preset': 'HQ 480p30 Surround',
             'description': 'Best quality, larger file size'
@@ -83,7 +720,9 @@ class QualityPreset:
         '2': {
             'name': 'Balanced (Recommended)',
             'quality': 22,
+            'ssim_target': 0.975,
             'preset': 'medium',
+            'min_speed': 2.0,
             'audio_bitrate': '256',
             'hb_preset': 'Fast 480p30',
             'description': 'Good quality with reasonable file size'
@@ -91,22 +730,513 @@ class QualityPreset:
         '3': {
             'name': 'Fast/Smaller (Lower quality)',
             'quality': 26,
+            'ssim_target': 0.960,
             'preset': 'fast',
+            'min_speed': 4.0,
             'audio_bitrate': '192',
             'hb_preset': 'Very Fast 480p30',
             'description': 'Faster encoding, smaller files'
         }
     }
 
+def parse_duration(value):
+    """Convert an HH:MM:SS[.mmm] duration to seconds (0 if unparseable)"""
+    try:
+        seconds = 0.0
+        for part in str(value).split(':'):
+            seconds = seconds * 60 + float(part)
+        return seconds
+    except ValueError:
+        return 0.0
+
+# Written next to VIDEO_TS by image mode: the source disc's volume ID and fingerprint
+IMAGE_SIDECAR = '.disc-info.json'
+
+def read_image_sidecar(folder):
+    """The disc identity recorded for an image folder ({} if none)"""
+    try:
+        with open(os.path.join(folder, IMAGE_SIDECAR)) as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return info if isinstance(info, dict) else {}
+
+def read_dvd_ifos(device):
+    """Read the volume ID and VIDEO_TS IFO files from a DVD device, image or folder
+    
+    IFO files are never CSS-encrypted, so the raw device can be read directly
+    through the ISO 9660 bridge every DVD-Video disc carries. A folder has no
+    volume descriptor; its volume ID comes from the image sidecar, else the
+    folder name.
+    """
+    if os.path.isdir(device):
+        video_ts = os.path.join(device, 'VIDEO_TS')
+        if not os.path.isdir(video_ts):
+            video_ts = device
+        ifos = []
+        for name in sorted(os.listdir(video_ts)):
+            if name.upper().endswith('.IFO'):
+                with open(os.path.join(video_ts, name), 'rb') as f:
+                    ifos.append((name.upper(), f.read()))
+        volume_id = read_image_sidecar(device).get('volume_id')
+        return volume_id or os.path.basename(os.path.normpath(device)), ifos
+    
+    sector = 2048
+    with open(device, 'rb') as f:
+        def read_extent(lba, size):
+            f.seek(lba * sector)
+            return f.read(size)
+        
+        def list_dir(lba, size):
+            data = read_extent(lba, size)
+            pos = 0
+            while pos < len(data):
+                length = data[pos]
+                if length == 0:
+                    # Records never span sectors; skip the padding
+                    pos = (pos // sector + 1) * sector
+                    continue
+                record = data[pos:pos + length]
+                name_len = record[32]
+                name = record[33:33 + name_len].decode('ascii', 'replace').split(';')[0]
+                yield (name.upper(), int.from_bytes(record[2:6], 'little'),
+                       int.from_bytes(record[10:14], 'little'))
+                pos += length
+        
+        pvd = read_extent(16, sector)
+        if pvd[1:6] != b'CD001':
+            raise ValueError("no ISO 9660 volume descriptor")
+        volume_id = pvd[40:72].decode('ascii', 'replace').strip()
+        root = pvd[156:190]
+        root_lba = int.from_bytes(root[2:6], 'little')
+        root_size = int.from_bytes(root[10:14], 'little')
+        
+        video_ts = next((e for e in list_dir(root_lba, root_size) if e[0] == 'VIDEO_TS'), None)
+        if not video_ts:
+            raise ValueError("no VIDEO_TS directory")
+        
+        ifos = [(name, read_extent(lba, size))
+                for name, lba, size in sorted(list_dir(video_ts[1], video_ts[2]))
+                if name.endswith('.IFO')]
+    return volume_id, ifos
+
+def parse_handbrake_progress(line):
+    """Parse a HandBrakeCLI progress line into an event dict (None if not progress)
+    
+    "Encoding: task 1 of 1, 45.67 % (123.45 fps, avg 110.23 fps, ETA 00h12m34s)"
+    """
+    match = re.search(r'Encoding: task (\d+) of (\d+), ([\d.]+) %', line)
+    if not match:
+        return None
+    event = {'percent': float(match.group(3))}
+    rates = re.search(r'\(([\d.]+) fps, avg ([\d.]+) fps, ETA (\d+)h(\d+)m(\d+)s\)', line)
+    if rates:
+        h, m, sec = (int(x) for x in rates.group(3, 4, 5))
+        event.update(fps=float(rates.group(1)), avg_fps=float(rates.group(2)),
+                     eta_seconds=h * 3600 + m * 60 + sec)
+    return event
+
+# Encoder option that caps its parallelism: x265 sizes its thread pools,
+# SVT-AV1 its level of parallelism, and the rest take a thread count
+THREAD_OPTIONS = {'x265': 'pools', 'svt_av1': 'lp'}
+
+def thread_options(encoder, threads):
+    """HandBrake options capping an encoder at a thread count (none for None)"""
+    if not threads:
+        return []
+    return ['--encopts', f"{THREAD_OPTIONS.get(encoder, 'threads')}={threads}"]
+
+# Share of a title's footage its parts must cover for it to count as a Play All
+PLAY_ALL_COVERAGE = 0.95
+
+def title_footage(title):
+    """What a title plays: ('cells', [(vts, first, last)]) from lsdvd -x sector
+    ranges, else ('chapters', [half-seconds]) from chapter lengths, else None
+    
+    A single chapter length says too little to tell titles apart, so the
+    chapter fallback needs at least two chapters.
+    """
+    if title.get('cells'):
+        return 'cells', [tuple(cell) for cell in title['cells']]
+    if len(title.get('chapter_lengths') or []) >= 2:
+        # Half-second buckets absorb rounding differences between titles
+        return 'chapters', [round(length * 2) for length in title['chapter_lengths']]
+    return None
+
+def footage_contains(outer, inner):
+    """True if every piece of inner's footage is also played by outer"""
+    if outer[0] != inner[0]:
+        return False
+    if outer[0] == 'cells':
+        return all(any(o[0] == i[0] and o[1] <= i[1] and i[2] <= o[2] for o in outer[1])
+                   for i in inner[1])
+    n = len(inner[1])
+    return any(outer[1][k:k + n] == inner[1] for k in range(len(outer[1]) - n + 1))
+
+def footage_coverage(outer, parts):
+    """Fraction of outer's footage (sectors, or chapter time) that the parts play"""
+    if outer[0] == 'cells':
+        total = covered = 0
+        for vts, first, last in outer[1]:
+            total += last - first + 1
+            spans = sorted((max(first, i[1]), min(last, i[2]))
+                           for part in parts for i in part[1] if i[0] == vts and i[1] <= last and i[2] >= first)
+            end = first - 1
+            for start, stop in spans:
+                if stop > end:
+                    covered += stop - max(start, end + 1) + 1
+                    end = stop
+        return covered / total if total else 0.0
+    
+    covered = set()
+    for part in parts:
+        n = len(part[1])
+        k = next((k for k in range(len(outer[1]) - n + 1) if outer[1][k:k + n] == part[1]), None)
+        if k is not None:
+            covered.update(range(k, k + n))
+    total = sum(outer[1])
+    return sum(outer[1][k] for k in covered) / total if total else 0.0
+
+def find_duplicate_titles(titles):
+    """Annotate titles that play footage already covered by other titles
+    
+    Music DVDs often carry the same songs as individual titles, a "Play All"
+    title and angle/audio variants. Titles referencing the same cell sector
+    ranges (or, without them, the same chapter durations) get 'same_as';
+    a title made of two or more others that together cover nearly all of
+    it gets 'plays' (a Play All); a title inside a single larger
+    non-Play-All title gets 'part_of'. A long title that merely contains a
+    few excerpts stays a main title.
+    """
+    for t in titles:
+        for key in ('same_as', 'plays', 'part_of'):
+            t.pop(key, None)
+    footage = dict((t['number'], title_footage(t)) for t in titles)
+    
+    unique = []
+    for t in titles:
+        mine = footage[t['number']]
+        if not mine:
+            continue
+        for kept in unique:
+            theirs = footage[kept['number']]
+            if footage_contains(theirs, mine) and footage_contains(mine, theirs):
+                t['same_as'] = kept['number']
+                break
+        else:
+            unique.append(t)
+    
+    for t in unique:
+        parts = [o['number'] for o in unique
+                 if o is not t and footage_contains(footage[t['number']], footage[o['number']])]
+        if len(parts) >= 2 and footage_coverage(footage[t['number']],
+                                                [footage[n] for n in parts]) >= PLAY_ALL_COVERAGE:
+            t['plays'] = parts
+    
+    for t in unique:
+        if 'plays' in t:
+            continue
+        for o in unique:
+            if o is not t and 'plays' not in o and footage_contains(footage[o['number']], footage[t['number']]):
+                t['part_of'] = o['number']
+                break
+    return titles
+
+def parse_dvdbackup_progress(line):
+    """Parse a dvdbackup -p progress line into an event dict (None if not progress)
+    
+    "Copying Title, part 1/4: 45% done (461/1024 MiB)"
+    """
+    match = re.search(r'(\d+)% done \((\d+)/(\d+) MiB\)', line)
+    if not match:
+        return None
+    return {'percent': float(match.group(1)), 'mib': int(match.group(2)), 'total_mib': int(match.group(3))}
+
+REPLAYGAIN_REFERENCE = -18.0  # LUFS, ReplayGain 2.0
+
+_k_weighting_cache = {}
+
+def k_weighting(rate, length=16384):
+    """Impulse response of the BS.1770 K-weighting filter (shelf + RLB high-pass)
+    
+    Computed once per sample rate by running the two biquads over a unit
+    impulse; at `length` samples the response has decayed far below the
+    resolution of 24-bit audio.
+    """
+    if rate not in _k_weighting_cache:
+        # Pre-filter: high shelf, +4 dB above ~1.5 kHz
+        k = math.tan(math.pi * 1681.974450955533 / rate)
+        q = 0.7071752369554196
+        vh = 10 ** (3.999843853973347 / 20)
+        vb = vh ** 0.4996667741545416
+        a0 = 1 + k / q + k * k
+        shelf = ((vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0,
+                 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0)
+        # RLB weighting: second-order high-pass at ~38 Hz
+        k = math.tan(math.pi * 38.13547087602444 / rate)
+        q = 0.5003270373238773
+        a0 = 1 + k / q + k * k
+        highpass = (1.0, -2.0, 1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0)
+        
+        signal = [1.0] + [0.0] * (length - 1)
+        for b0, b1, b2, a1, a2 in (shelf, highpass):
+            x1 = x2 = y1 = y2 = 0.0
+            out = []
+            for x in signal:
+                y = b0 * x + b1 * x1 + b2 * x2 - a1 * y1 - a2 * y2
+                x2, x1, y2, y1 = x1, x, y1, y
+                out.append(y)
+            signal = out
+        _k_weighting_cache[rate] = np.array(signal)
+    return _k_weighting_cache[rate]
+
+def _true_peak_taps(factor=4, width=12):
+    """Windowed-sinc polyphase taps interpolating at 1/factor sample offsets"""
+    taps = []
+    for phase in range(1, factor):
+        offsets = np.arange(-width // 2 + 1, width // 2 + 1) - phase / factor
+        window = 0.5 + 0.5 * np.cos(np.pi * offsets / (width / 2))
+        taps.append((np.sinc(offsets) * window)[::-1])
+    return taps
+
+def gated_loudness(blocks):
+    """Integrated loudness (LUFS) of 400 ms block energies with BS.1770 gating
+    
+    None when nothing is above the absolute gate (silence or too short).
+    """
+    blocks = np.asarray(blocks)
+    if not blocks.size:
+        return None
+    with np.errstate(divide='ignore'):
+        levels = -0.691 + 10 * np.log10(blocks)
+    above = levels > -70.0
+    if not above.any():
+        return None
+    relative = -0.691 + 10 * math.log10(blocks[above].mean()) - 10.0
+    gated = blocks[above & (levels > relative)]
+    return -0.691 + 10 * math.log10(gated.mean())
+
+class LoudnessMeter:
+    """Streaming EBU R128 meter: integrated loudness and 4x-oversampled true peak
+    
+    PCM is fed in chunks of any size as it becomes available and filtered
+    with FFT convolution in fixed-size blocks, so memory stays bounded
+    however long the stream is. Needs NumPy.
+    """
+    FFT_SIZE = 1 << 18
+    
+    def __init__(self, rate, channels=2, sample_format='<i2'):
+        self.rate = rate
+        self.channels = channels
+        self.sample_format = sample_format
+        self.scale = 1 / 32768 if sample_format == '<i2' else 1.0
+        ir = k_weighting(rate)
+        self.block = self.FFT_SIZE - len(ir) + 1
+        self.response = np.fft.rfft(ir, self.FFT_SIZE)
+        self.overlap = np.zeros((channels, len(ir) - 1))
+        self.segment = rate // 10  # Gating blocks are 400 ms with 75% overlap
+        self.partial = np.zeros(0)
+        self.segments = []
+        self.taps = _true_peak_taps()
+        self.history = np.zeros((channels, len(self.taps[0]) - 1))
+        self.peak = 0.0
+        self.pending = b''
+    
+    def update(self, pcm):
+        """Feed interleaved PCM bytes"""
+        frame = np.dtype(self.sample_format).itemsize * self.channels
+        data = self.pending + pcm if self.pending else pcm
+        usable = len(data) - len(data) % frame
+        self.pending = bytes(data[usable:])
+        samples = np.frombuffer(data, dtype=self.sample_format, count=usable // frame * self.channels)
+        samples = samples.reshape(-1, self.channels).T * self.scale
+        for start in range(0, samples.shape[1], self.block):
+            self.process(samples[:, start:start + self.block])
+    
+    def process(self, x):
+        n = x.shape[1]
+        
+        # K-weighting by overlap-add FFT convolution
+        y = np.fft.irfft(np.fft.rfft(x, self.FFT_SIZE) * self.response, self.FFT_SIZE)
+        tail = self.overlap.shape[1]
+        y[:, :tail] += self.overlap
+        self.overlap = y[:, n:n + tail].copy()
+        
+        # Energy summed over channels, cut into 100 ms segments
+        energy = np.concatenate((self.partial, (y[:, :n] ** 2).sum(axis=0)))
+        whole = len(energy) - len(energy) % self.segment
+        self.segments.append(energy[:whole].reshape(-1, self.segment).sum(axis=1))
+        self.partial = energy[whole:]
+        
+        # True peak: the samples themselves plus three interpolated points between each pair
+        context = np.concatenate((self.history, x), axis=1)
+        peak = np.abs(x).max() if n else 0.0
+        for taps in self.taps:
+            for channel in context:
+                if len(channel) >= len(taps):
+                    peak = max(peak, np.abs(np.convolve(channel, taps, 'valid')).max())
+        self.peak = max(self.peak, float(peak))
+        self.history = context[:, -self.history.shape[1]:]
+    
+    def result(self):
+        """{'loudness': LUFS or None, 'peak': linear true peak, 'blocks': 400 ms block energies}"""
+        segments = np.concatenate(self.segments) if self.segments else np.zeros(0)
+        if len(segments) >= 4:
+            blocks = (segments[:-3] + segments[1:-2] + segments[2:-1] + segments[3:]) / (4 * self.segment)
+        else:
+            blocks = np.zeros(0)
+        return {'loudness': gated_loudness(blocks), 'peak': self.peak, 'blocks': blocks}
+
+def replaygain_tags(track, album):
+    """ReplayGain 2.0 tags from track and album meter results"""
+    tags = {}
+    for scope, result in (('TRACK', track), ('ALBUM', album)):
+        if result and result['loudness'] is not None:
+            tags[f'REPLAYGAIN_{scope}_GAIN'] = f"{REPLAYGAIN_REFERENCE - result['loudness']:+.2f} dB"
+            tags[f'REPLAYGAIN_{scope}_PEAK'] = f"{result['peak']:.6f}"
+    return tags
+
+def matroska_tags(tags):
+    """Matroska tags XML, as mkvpropedit --tags reads it, holding simple name/value tags"""
+    simple = ''.join(f"<Simple><Name>{name}</Name><String>{value}</String></Simple>"
+                     for name, value in tags.items())
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n'
+            f"<Tags><Tag><Targets><TargetTypeValue>50</TargetTypeValue></Targets>{simple}</Tag></Tags>\n")
+
+def album_loudness(results):
+    """Album values: gating over every track's blocks together, the highest peak"""
+    results = [r for r in results if r]
+    if not results:
+        return None
+    blocks = np.concatenate([r['blocks'] for r in results])
+    return {'loudness': gated_loudness(blocks), 'peak': max(r['peak'] for r in results), 'blocks': blocks}
+
+# Every child process of the ripper runs under this supervisor
+RUNNER = ProcessRunner()
+
+def detect_optical_drives():
+    """List the optical drive device nodes (/dev/sr0, /dev/sr1, ...)"""
+    try:
+        names = [n for n in os.listdir('/sys/block') if n.startswith('sr')]
+    except OSError:
+        names = []
+    return [f"/dev/{n}" for n in sorted(names, key=lambda n: int(n[2:] or 0))]
+
+def is_block_device(path):
+    """True for real drives, False for image files and folders standing in for one"""
+    try:
+        return stat.S_ISBLK(os.stat(path).st_mode)
+    except OSError:
+        return False
+
+CDROM_DRIVE_STATUS = 0x5326
+CDSL_CURRENT = 0x7fffffff
+CDS_DISC_OK = 4
+
+def drive_status(device):
+    """The drive's CDS_* status from the CDROM_DRIVE_STATUS ioctl
+    
+    Opening with O_NONBLOCK neither needs a disc nor closes the tray, so
+    this is cheap enough to poll. Returns None (or 0, CDS_NO_INFO) when the
+    device can't report its status, e.g. an image standing in for a drive.
+    """
+    try:
+        fd = os.open(device, os.O_RDONLY | os.O_NONBLOCK)
+    except OSError:
+        return None
+    try:
+        return fcntl.ioctl(fd, CDROM_DRIVE_STATUS, CDSL_CURRENT)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+def wait_for_drive(device, loaded=True, poll=0.25):
+    """Block until the drive holds a ready disc (or, with loaded=False, until it doesn't)
+    
+    Returns False straight away if the drive can't report its status.
+    """
+    while True:
+        status = drive_status(device)
+        if not status:
+            return False
+        if (status == CDS_DISC_OK) == loaded:
+            return True
+        time.sleep(poll)
+
 class DVDRipper:
     def __init__(self):
         self.dvd_device = "/dev/sr0"
         self.base_output_dir = "/srv/dev-disk-by-uuid-dc4918d5-6597-465b-9567-ce442fbd8e2a/DVD Rips"
+        self.catalog = LibraryCatalog(self.base_output_dir)
         self.current_rip_dir = None
         self.selected_format = None
         self.selected_quality = None
         self.dvd_info = None
         self.titles = []
+        self.label = None  # Prefix for messages when several drives run at once
+        self.runner = RUNNER
+
+        # Permission policy applied to everything this session writes
+        # (open modes suit SMB/NFS shares; set 'group' to chgrp as well)
+        self.permission_policy = {'file_mode': 0o777, 'dir_mode': 0o777, 'umask': 0o000, 'group': None}
+        self.created_paths = set()
+        
+        # Pipelined mode: titles are read to local staging at drive speed
+        # while a pool of encoders works through them in parallel
+        self.staging_dir = "/tmp/dvd-ripper-staging"
+        self.encode_threads = 4
+        self.encode_workers = max(1, (os.cpu_count() or 1) // self.encode_threads)
+        self.pipelined = False
+        self.eject_after_read = False
+        self.disc_ejected = False
+        
+        # RF search: before each title's encode, short samples spread over the
+        # title are encoded at a few RF values and scored with SSIM against a
+        # lossless encode of the same samples
+        self.crf_search = False
+        self.crf_samples = 4
+        self.crf_sample_seconds = 6
+        
+        # RF each title of the current disc was actually encoded with
+        self.title_rf = {}
+        
+        # Chunked mode: a long title encoded on its own is split at chapter
+        # boundaries into one chunk per encode worker, encoded in parallel
+        self.chunked = False
+        self.chunk_min_seconds = 600
+        
+        # Image mode: the disc is decrypted to a VIDEO_TS folder under image_dir
+        # at drive speed and ejected; everything after that reads the image
+        self.image_dir = "/var/tmp/dvd-ripper-images"
+        self.image_first = False
+        
+        # Audio stream (1-based, as listed by lsdvd) for audio-only formats
+        self.audio_stream = 1
+        
+        # Loudness stage: ReplayGain 2.0 track/album tags on the finished files.
+        # MP4 tags can only be written by remuxing each file, so MP4 is opt-in
+        self.replaygain = True
+        self.replaygain_mp4 = False
+        
+        # Parsed disc analysis, reused when a known disc is inserted again
+        cache_home = os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache'))
+        self.scan_cache = ScanCache(os.path.join(cache_home, 'dvd-ripper', 'scans'))
+        
+        # Versions and encoders of the installed tools, re-probed only when a binary changes
+        self.tools = ToolProbe(os.path.join(cache_home, 'dvd-ripper', 'tools.json'), self.runner)
+        
+        # Per-disc job journal, so an interrupted batch can be resumed
+        self.journal_dir = os.path.join(cache_home, 'dvd-ripper', 'journals')
+        self.journal = None
+        self.journal_lock = threading.Lock()
+        
+        # Encoder speed measurements for this host (written by --benchmark)
+        self.benchmark_file = os.path.join(cache_home, 'dvd-ripper', 'benchmarks', f"{socket.gethostname()}.json")
+        self._benchmark = None
+        
+        # Progress events from HandBrake/ffmpeg (sinks are set from the command line)
+        self.telemetry = Telemetry('dvd_ripper')
         
     def print_header(self, text):
         """Print a formatted header"""
@@ -116,32 +1246,40 @@ class DVDRipper:
     
     def print_success(self, text):
         """Print success message"""
-        print(f"{Colors.OKGREEN}✓ {text}{Colors.ENDC}")
+        print(f"{Colors.OKGREEN}✓ {self.prefix()}{text}{Colors.ENDC}")
     
     def print_error(self, text):
         """Print error message"""
-        print(f"{Colors.FAIL}✗ {text}{Colors.ENDC}")
+        print(f"{Colors.FAIL}✗ {self.prefix()}{text}{Colors.ENDC}")
     
     def print_info(self, text):
         """Print info message"""
-        print(f"{Colors.OKCYAN}ℹ {text}{Colors.ENDC}")
+        print(f"{Colors.OKCYAN}ℹ {self.prefix()}{text}{Colors.ENDC}")
     
     def print_warning(self, text):
         """Print warning message"""
-        print(f"{Colors.WARNING}⚠ {text}{Colors.ENDC}")
+        print(f"{Colors.WARNING}⚠ {self.prefix()}{text}{Colors.ENDC}")
+    
+    def prefix(self):
+        """Message prefix identifying the drive in farm mode"""
+        return f"[{self.label}] " if self.label else ""
     
-    def run_command(self, command, show_output=False, capture_output=False):
-        """Run a shell command"""
+    def run_command(self, argv, show_output=False, capture_output=False, on_line=None, timeout=None,
+                    merge_stderr=False):
+        """Run a command (an argv list - no shell) through the process runner
+        
+        capture_output returns stdout in full (merge_stderr folds stderr
+        into it). Otherwise output is streamed line by line as the tool runs,
+        to on_line if given (stderr merged in, progress redraws split on
+        carriage returns), and only the last lines are kept for errors.
+        """
         try:
+            if show_output:
+                returncode, _, _ = self.runner.run(argv, timeout=timeout, interactive=True)
+                return returncode, None, None
             if capture_output:
-                result = subprocess.run(command, shell=True, capture_output=True, text=True)
-                return result.returncode, result.stdout, result.stderr
-            elif show_output:
-                result = subprocess.run(command, shell=True)
-                return result.returncode, None, None
-            else:
-                result = subprocess.run(command, shell=True, capture_output=True, text=True)
-                return result.returncode, result.stdout, result.stderr
+                return self.runner.run(argv, capture=True, timeout=timeout, merge_stderr=merge_stderr)
+            return self.runner.run(argv, on_line=on_line, timeout=timeout)
         except Exception as e:
             self.print_error(f"Command failed: {e}")
             return 1, None, str(e)
@@ -165,31 +1303,75 @@ class DVDRipper:
         else:
             return input(f"{Colors.OKBLUE}{prompt}: {Colors.ENDC}").strip()
     
-    def select_option(self, prompt, options):
-        """Display options and get user selection"""
+    def select_option(self, prompt, options, notes=None, default=None):
+        """Display options and get user selection (Enter takes the default, if any)"""
         print(f"\n{Colors.OKCYAN}{prompt}{Colors.ENDC}\n")
         for key, option in options.items():
             print(f"  {Colors.BOLD}{key}{Colors.ENDC}. {option['name']}")
             print(f"     {Colors.OKCYAN}{option['description']}{Colors.ENDC}")
+            if notes and notes.get(key):
+                print(f"     {notes[key]}")
         
+        keys = ', '.join(options)
+        suffix = f" [{default}]" if default else ""
         while True:
-            choice = input(f"\n{Colors.OKBLUE}Select option (1-{len(options)}): {Colors.ENDC}").strip()
+            choice = input(f"\n{Colors.OKBLUE}Select option ({keys}){suffix}: {Colors.ENDC}").strip() or default
             if choice in options:
                 return options[choice]
-            self.print_warning(f"Please enter a number between 1 and {len(options)}")
+            self.print_warning(f"Please enter one of: {keys}")
     
-    def fix_permissions(self, directory=None):
-        """Set permissions to 777 for all files and folders in the ripped directory"""
-        if directory is None:
-            directory = self.base_output_dir
-        
-        self.print_info(f"Setting permissions for: {directory}")
-        returncode, _, _ = self.run_command(f"chmod -R 777 '{directory}'")
+    def track_output(self, path):
+        """Remember a path this session wrote, plus any library folders above it"""
+        base = os.path.abspath(self.base_output_dir)
+        path = os.path.abspath(path)
+        while path.startswith(base + os.sep):
+            self.created_paths.add(path)
+            path = os.path.dirname(path)
+    
+    def fix_permissions(self, paths=None):
+        """Apply the permission policy to the files and folders this session created
+        
+        Only tracked paths are touched, and paths that already have the right
+        mode and group are skipped, so the cost follows the rip, not the library.
+        """
+        if paths is None:
+            paths = self.created_paths
+        policy = self.permission_policy
+        
+        gid = -1
+        if policy.get('group'):
+            try:
+                gid = grp.getgrnam(policy['group']).gr_gid
+            except KeyError:
+                self.print_warning(f"Unknown group '{policy['group']}' - leaving group unchanged")
         
-        if returncode == 0:
-            self.print_success("Permissions set successfully (777)")
+        changed = unchanged = failed = 0
+        for path in sorted(paths):
+            try:
+                st = os.lstat(path)
+            except OSError:
+                continue  # Removed since it was written (e.g. converted originals)
+            if stat.S_ISLNK(st.st_mode):
+                continue
+            
+            mode = policy['dir_mode'] if stat.S_ISDIR(st.st_mode) else policy['file_mode']
+            mode &= ~policy.get('umask', 0)
+            try:
+                if stat.S_IMODE(st.st_mode) == mode and gid in (-1, st.st_gid):
+                    unchanged += 1
+                    continue
+                if stat.S_IMODE(st.st_mode) != mode:
+                    os.chmod(path, mode)
+                if gid not in (-1, st.st_gid):
+                    os.chown(path, -1, gid)
+                changed += 1
+            except OSError:
+                failed += 1
+        
+        if failed:
+            self.print_warning(f"Failed to set permissions on {failed} path(s) (you may need to do this manually)")
         else:
-            self.print_warning("Failed to set permissions (you may need to do this manually)")
+            self.print_success(f"Permissions set on {changed} path(s), {unchanged} already correct")
     
     def check_dependencies(self):
         """Check if required packages are installed"""
@@ -206,9 +1388,9 @@ class DVDRipper:
         missing_packages = []
         
         for cmd, info in dependencies.items():
-            returncode, _, _ = self.run_command(f"which {cmd}")
-            if returncode == 0:
-                self.print_success(f"{info['name']} is installed")
+            tool = self.tools.tool(cmd)
+            if tool:
+                self.print_success(f"{info['name']} {tool['version']} is installed")
             else:
                 self.print_error(f"{info['name']} is NOT installed")
                 missing.append(info['name'])
@@ -216,8 +1398,7 @@ class DVDRipper:
                     missing_packages.append(info['package'])
         
         # Check for libdvdcss (needed for encrypted DVDs)
-        returncode, _, _ = self.run_command("ldconfig -p | grep libdvdcss")
-        if returncode == 0:
+        if self.tools.library('libdvdcss'):
             self.print_success("libdvdcss is installed (DVD decryption)")
         else:
             self.print_warning("libdvdcss not found - encrypted DVDs may not work")
@@ -233,18 +1414,18 @@ class DVDRipper:
             
             if self.yes_no_prompt("\nWould you like to attempt automatic installation?"):
                 self.print_info("Installing missing packages...")
-                self.run_command("apt update", show_output=True)
+                self.run_command(['apt', 'update'], show_output=True)
                 
                 for pkg in missing_packages:
                     self.print_info(f"Installing {pkg}...")
-                    returncode, _, _ = self.run_command(f"apt install -y {pkg}", show_output=True)
+                    returncode, _, _ = self.run_command(['apt', 'install', '-y', pkg], show_output=True)
                     if returncode != 0:
                         self.print_error(f"Failed to install {pkg}")
                 
                 # Configure libdvd-pkg if installed
                 if "libdvd-pkg" in missing_packages:
                     self.print_info("Configuring libdvd-pkg (this downloads libdvdcss)...")
-                    self.run_command("dpkg-reconfigure libdvd-pkg", show_output=True)
+                    self.run_command(['dpkg-reconfigure', 'libdvd-pkg'], show_output=True)
                 
                 self.print_success("Installation complete - please re-run the script")
                 return False
@@ -254,123 +1435,319 @@ class DVDRipper:
         
         return True
     
+    def disc_present(self):
+        """Check whether the drive (or stand-in image) holds a readable DVD"""
+        returncode, stdout, _ = self.run_command(['lsdvd', self.dvd_device], capture_output=True,
+                                                 timeout=120, merge_stderr=True)
+        
+        combined = (stdout or "").lower()
+        return returncode == 0 and "cannot open" not in combined and "no such file" not in combined
+    
     def check_dvd_inserted(self):
-        """Check if a DVD is inserted"""
+        """Check if a DVD is inserted, waiting for one if the drive is empty"""
         self.print_header("Checking for DVD")
         
-        # Try lsdvd first
-        returncode, stdout, stderr = self.run_command(f"lsdvd {self.dvd_device} 2>&1", capture_output=True)
+        # The drive status answers instantly and without spawning anything,
+        # so a disc is picked up the moment the drive has loaded it
+        status = drive_status(self.dvd_device)
+        if status and status != CDS_DISC_OK:
+            self.print_warning("No DVD detected in drive")
+            self.print_info("Waiting for a DVD...")
+            wait_for_drive(self.dvd_device)
         
-        combined = (stdout or "") + (stderr or "")
-        if returncode != 0 or "cannot open" in combined.lower() or "no such file" in combined.lower():
+        # lsdvd confirms the disc is a readable DVD (and checks image sources)
+        while not self.disc_present():
             self.print_warning("No DVD detected in drive")
             input(f"{Colors.WARNING}Please insert a DVD and press Enter...{Colors.ENDC}")
-            return self.check_dvd_inserted()  # Recursive check
-        else:
-            self.print_success("DVD detected!")
-            return True
+        self.print_success("DVD detected!")
+        return True
+    
+    def wait_for_disc_change(self):
+        """Before the next disc: wait until the finished one has been taken out"""
+        if drive_status(self.dvd_device) == CDS_DISC_OK:
+            self.print_info("Remove the DVD and insert the next one...")
+            wait_for_drive(self.dvd_device, loaded=False)
+    
+    def image_dvd(self):
+        """Copy the whole disc (CSS decrypted via libdvdcss) to a VIDEO_TS folder
+        
+        Returns the image folder, which can stand in for the drive. The disc's
+        volume ID and fingerprint are kept in a sidecar so the image is
+        recognised as the same disc.
+        """
+        self.print_header("Imaging DVD")
+        if not shutil.which('dvdbackup'):
+            self.print_error("dvdbackup is not installed (sudo apt install dvdbackup)")
+            return None
+        
+        try:
+            volume_id, _ = read_dvd_ifos(self.dvd_device)
+        except (OSError, ValueError):
+            volume_id = ""
+        fingerprint = self.disc_fingerprint()
+        name = re.sub(r'[^\w.-]+', '_', volume_id).strip('_') or "DVD"
+        path, n = os.path.join(self.image_dir, name), 2
+        while os.path.exists(path):
+            path = os.path.join(self.image_dir, f"{name}_{n}")
+            n += 1
+        os.makedirs(self.image_dir, exist_ok=True)
+        
+        self.print_info(f"Copying disc to {path}...")
+        start = time.time()
+        returncode, _, stderr = self.run_tracked(
+            ['dvdbackup', '-M', '-p', '-i', self.dvd_device, '-o', self.image_dir, '-n', os.path.basename(path)],
+            'image', 'disc', parse_dvdbackup_progress
+        )
+        
+        if returncode != 0 or not os.path.isdir(os.path.join(path, "VIDEO_TS")):
+            self.print_error("Failed to image the DVD")
+            if stderr:
+                print(f"  Error: {stderr[-200:]}")
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        
+        try:
+            with open(os.path.join(path, IMAGE_SIDECAR + '.tmp'), 'w') as f:
+                json.dump({'volume_id': volume_id, 'fingerprint': fingerprint, 'device': self.dvd_device}, f)
+            os.replace(os.path.join(path, IMAGE_SIDECAR + '.tmp'), os.path.join(path, IMAGE_SIDECAR))
+        except OSError as e:
+            self.print_warning(f"Could not record the disc identity: {e}")
+        
+        size_mb = sum(e.stat().st_size for e in os.scandir(os.path.join(path, "VIDEO_TS"))) / (1024 * 1024)
+        elapsed = time.time() - start
+        self.print_success(f"Disc imaged: {size_mb:.0f} MB in {elapsed:.0f}s "
+                           f"({size_mb / elapsed if elapsed else 0:.1f} MB/s)")
+        return path
+    
+    def disc_fingerprint(self):
+        """Stable disc ID: SHA-1 over the volume ID and every IFO file
+        
+        An image folder answers with the fingerprint of the disc it was copied from.
+        """
+        if os.path.isdir(self.dvd_device):
+            fingerprint = read_image_sidecar(self.dvd_device).get('fingerprint')
+            if fingerprint:
+                return fingerprint
+        try:
+            volume_id, ifos = read_dvd_ifos(self.dvd_device)
+        except (OSError, ValueError):
+            return None
+        if not ifos:
+            return None
+        
+        digest = hashlib.sha1(volume_id.encode())
+        for name, data in ifos:
+            digest.update(name.encode())
+            digest.update(data)
+        return digest.hexdigest()
+    
+    def show_titles(self):
+        """Print the title listing"""
+        if self.titles:
+            print(f"\n{Colors.OKCYAN}Titles found: {len(self.titles)}{Colors.ENDC}")
+            for t in self.titles[:15]:  # Show first 15
+                duration = t.get('duration') or t.get('length', 'Unknown')
+                if 'same_as' in t:
+                    note = f"  (same footage as title {t['same_as']})"
+                elif 'plays' in t:
+                    note = f"  (Play All: titles {', '.join(str(n) for n in t['plays'])})"
+                elif 'part_of' in t:
+                    note = f"  (part of title {t['part_of']})"
+                else:
+                    note = ""
+                print(f"  Title {t['number']:2d}: {duration}{Colors.WARNING if note else ''}{note}{Colors.ENDC}")
+            if len(self.titles) > 15:
+                print(f"  ... and {len(self.titles) - 15} more titles")
     
     def get_dvd_info(self):
         """Get DVD information using lsdvd and HandBrake"""
         self.print_header("Analyzing DVD")
         
-        # Get basic info with lsdvd
-        returncode, stdout, _ = self.run_command(f"lsdvd -x {self.dvd_device} 2>&1", capture_output=True)
-        
-        dvd_title = "Unknown DVD"
+        # A known disc is answered from the scan cache
+        fingerprint = self.disc_fingerprint()
+        cached = self.scan_cache.get(fingerprint) if fingerprint else None
+        if cached:
+            self.dvd_info = cached['dvd_info']
+            self.titles = cached['titles']
+            self.print_success("Known disc - using cached analysis")
+            print(f"  Disc Title: {Colors.BOLD}{self.dvd_info['title']}{Colors.ENDC}")
+            find_duplicate_titles(self.titles)
+            self.show_titles()
+            return self.dvd_info
+        
+        # Get basic info with lsdvd, parsing each line as lsdvd prints it
+        dvd = {'title': "Unknown DVD", 'current': None}
         self.titles = []
         
-        if returncode == 0 and stdout:
-            print(f"\n{Colors.OKCYAN}DVD Information:{Colors.ENDC}")
-            
-            # Parse lsdvd output
-            for line in stdout.split('\n'):
-                if 'Disc Title:' in line:
-                    dvd_title = line.split(':', 1)[1].strip()
-                    print(f"  Disc Title: {Colors.BOLD}{dvd_title}{Colors.ENDC}")
-                elif line.strip().startswith('Title:'):
-                    # Parse title info: "Title: 01, Length: 00:45:30.123 Chapters: 12, ..."
-                    title_match = re.search(r'Title:\s*(\d+)', line)
-                    length_match = re.search(r'Length:\s*([\d:\.]+)', line)
-                    chapters_match = re.search(r'Chapters:\s*(\d+)', line)
+        def parse_lsdvd(line):
+            current = dvd['current']
+            # Match: "	VTS: 01, TTN: 01, FPS: 25.00, ..."
+            vts_match = re.match(r'\s*VTS:\s*(\d+)', line)
+            # Match: "		Chapter: 01, Length: 00:03:21.120, Start Cell: 01"
+            chapter_match = re.match(r'\s*Chapter:\s*\d+,\s*Length:\s*([\d:\.]+)', line)
+            # Match: "		Cell: 01, Length: 00:03:21.120 First sector: 0, Last sector: 15203"
+            cell_match = re.match(r'\s*Cell:\s*\d+,.*First sector:\s*(0x[0-9a-fA-F]+|\d+),'
+                                  r'\s*Last sector:\s*(0x[0-9a-fA-F]+|\d+)', line)
+            # Match: "	Audio: 1, Language: en - English, Format: ac3, ... Channels: 6, ..."
+            audio_match = re.match(r'\s*Audio:\s*(\d+),(.*)', line)
+            if audio_match and current:
+                fields = dict(
+                    (k.strip().lower(), v.strip())
+                    for k, v in (f.split(':', 1) for f in audio_match.group(2).split(',') if ':' in f)
+                )
+                current['audio'].append({
+                    'index': int(audio_match.group(1)),
+                    'language': fields.get('language', 'Unknown'),
+                    'format': fields.get('format', 'Unknown'),
+                    'channels': fields.get('channels', '?')
+                })
+            elif current and vts_match:
+                current['vts'] = int(vts_match.group(1))
+            elif current and chapter_match:
+                current['chapter_lengths'].append(parse_duration(chapter_match.group(1)))
+            elif current and cell_match:
+                current['cells'].append([current.get('vts', 0), int(cell_match.group(1), 0),
+                                         int(cell_match.group(2), 0)])
+            elif 'Disc Title:' in line:
+                dvd['title'] = line.split(':', 1)[1].strip()
+                print(f"\n{Colors.OKCYAN}DVD Information:{Colors.ENDC}")
+                print(f"  Disc Title: {Colors.BOLD}{dvd['title']}{Colors.ENDC}")
+            elif line.strip().startswith('Title:'):
+                # Parse title info: "Title: 01, Length: 00:45:30.123 Chapters: 12, ..."
+                title_match = re.search(r'Title:\s*(\d+)', line)
+                length_match = re.search(r'Length:\s*([\d:\.]+)', line)
+                chapters_match = re.search(r'Chapters:\s*(\d+)', line)
+                
+                if title_match:
+                    title_num = int(title_match.group(1))
+                    length = length_match.group(1) if length_match else "Unknown"
+                    chapters = int(chapters_match.group(1)) if chapters_match else 0
                     
-                    if title_match:
-                        title_num = int(title_match.group(1))
-                        length = length_match.group(1) if length_match else "Unknown"
-                        chapters = int(chapters_match.group(1)) if chapters_match else 0
-                        
-                        self.titles.append({
-                            'number': title_num,
-                            'length': length,
-                            'chapters': chapters
-                        })
+                    dvd['current'] = {
+                        'number': title_num,
+                        'length': length,
+                        'chapters': chapters,
+                        'audio': [],
+                        'chapter_lengths': [],
+                        'cells': []
+                    }
+                    self.titles.append(dvd['current'])
+        
+        returncode, _, _ = self.run_command(['lsdvd', '-x', self.dvd_device], on_line=parse_lsdvd, timeout=300)
+        if returncode != 0:
+            self.titles = []
         
         self.dvd_info = {
-            'title': dvd_title,
-            'num_titles': len(self.titles)
+            'title': dvd['title'],
+            'num_titles': len(self.titles),
+            'fingerprint': fingerprint
         }
         
         # Get more detailed info with HandBrake
         self.print_info("\nScanning with HandBrake (this may take a moment)...")
-        returncode, stdout, stderr = self.run_command(
-            f'HandBrakeCLI --input {self.dvd_device} --title 0 --scan 2>&1',
-            capture_output=True
-        )
-        
-        combined = (stdout or "") + (stderr or "")
-        
-        # Parse HandBrake scan output
-        if combined:
-            # Look for title information in HandBrake output
-            hb_titles = []
-            current_title = None
+        hb_titles = []
+        
+        def parse_scan(line):
+            # Match: "+ title 1:"
+            title_match = re.match(r'\s*\+\s*title\s+(\d+):', line)
+            if title_match:
+                hb_titles.append({
+                    'number': int(title_match.group(1)),
+                    'duration': 'Unknown',
+                    'chapters': 0
+                })
             
-            for line in combined.split('\n'):
-                # Match: "+ title 1:"
-                title_match = re.match(r'\s*\+\s*title\s+(\d+):', line)
-                if title_match:
-                    if current_title:
-                        hb_titles.append(current_title)
-                    current_title = {
-                        'number': int(title_match.group(1)),
-                        'duration': 'Unknown',
-                        'chapters': 0
-                    }
-                
-                # Match: "  + duration: 00:45:30"
-                duration_match = re.search(r'duration:\s*([\d:]+)', line)
-                if duration_match and current_title:
-                    current_title['duration'] = duration_match.group(1)
-                
-                # Match: "  + chapters:"
-                if '+ chapters:' in line.lower() and current_title:
-                    # Count chapter lines that follow
-                    pass
-            
-            if current_title:
-                hb_titles.append(current_title)
-            
-            # Use HandBrake titles if we found more detail
-            if hb_titles:
-                self.titles = hb_titles
+            # Match: "  + duration: 00:45:30"
+            duration_match = re.search(r'duration:\s*([\d:]+)', line)
+            if duration_match and hb_titles:
+                hb_titles[-1]['duration'] = duration_match.group(1)
+        
+        self.run_command(['HandBrakeCLI', '--input', self.dvd_device, '--title', '0', '--scan'],
+                         on_line=parse_scan, timeout=600)
+        
+        # Use HandBrake titles if we found more detail, keeping the
+        # lsdvd stream and chapter details HandBrake's parse lacks
+        if hb_titles:
+            lsdvd_titles = dict((t['number'], t) for t in self.titles)
+            for t in hb_titles:
+                for key, value in lsdvd_titles.get(t['number'], {}).items():
+                    if not t.get(key):
+                        t[key] = value
+            self.titles = hb_titles
+        
+        # Group titles that play the same footage
+        find_duplicate_titles(self.titles)
         
         # Display titles
-        if self.titles:
-            print(f"\n{Colors.OKCYAN}Titles found: {len(self.titles)}{Colors.ENDC}")
-            for t in self.titles[:15]:  # Show first 15
-                duration = t.get('duration') or t.get('length', 'Unknown')
-                print(f"  Title {t['number']:2d}: {duration}")
-            if len(self.titles) > 15:
-                print(f"  ... and {len(self.titles) - 15} more titles")
+        self.show_titles()
+        
+        # Only complete analyses are worth remembering
+        if fingerprint and self.titles:
+            self.scan_cache.put(fingerprint, {'dvd_info': self.dvd_info, 'titles': self.titles})
         
         return self.dvd_info
     
+    def format_available(self, fmt):
+        """Whether the installed HandBrakeCLI/ffmpeg have the encoders a format needs"""
+        if fmt['encoder'] is None:
+            return self.tools.provides('ffmpeg', 'encoders', OutputFormat.FFMPEG_AUDIO[fmt['aencoder']]) is not False
+        if self.tools.provides('HandBrakeCLI', 'encoders', fmt['encoder']) is False:
+            return False
+        return self.audio_encoder(fmt['aencoder']) is not None
+    
+    def audio_encoder(self, aencoder):
+        """HandBrake audio encoder to use for a format's aencoder (None if missing)
+        
+        AAC formats get the best AAC encoder this HandBrake build has.
+        """
+        listing = (self.tools.tool('HandBrakeCLI') or {}).get('audio_encoders')
+        if not listing:
+            return aencoder  # Build not probed - trust the format
+        candidates = OutputFormat.AAC_ENCODERS if aencoder == 'av_aac' else [aencoder]
+        return next((c for c in candidates if c in listing), None)
+    
+    def available_formats(self):
+        """The output formats the installed encoders can produce"""
+        return dict((k, v) for k, v in OutputFormat.FORMATS.items() if self.format_available(v))
+    
     def select_output_format(self):
-        """Let user select output format"""
+        """Let user select output format
+        
+        On a benchmarked host the default is the fastest format that still
+        meets the Balanced preset's min_speed. Otherwise it is the first
+        available format in menu order (AAC formats use fdk_aac, then
+        ca_aac, then av_aac).
+        """
         self.print_header("Select Output Format")
+        formats = self.available_formats()
+        missing = [v['name'] for k, v in OutputFormat.FORMATS.items() if k not in formats]
+        if missing:
+            self.print_info(f"Not available with the installed encoders: {', '.join(missing)}")
+        if not formats:
+            self.print_warning("Could not match any format to the installed encoders - offering all")
+            formats = OutputFormat.FORMATS
+        
+        # Measured speeds help weigh file size against encode time
+        notes = {}
+        speeds = {}
+        quality = QualityPreset.PRESETS['2']
+        results = self.benchmark_results()
+        for key, fmt in formats.items():
+            preset = self.encoder_preset(fmt['encoder'], quality) if fmt['encoder'] else None
+            speed = results.get(fmt['encoder'], {}).get(preset, {}).get('speed')
+            if speed:
+                notes[key] = f"{fmt['encoder']} {preset}: {speed:g}x realtime on this host"
+                speeds[key] = speed
+        
+        # Without measurements the menu order is the fallback
+        default = next(iter(formats))
+        fast_enough = [key for key, speed in speeds.items() if speed >= quality['min_speed']]
+        if fast_enough:
+            default = max(fast_enough, key=lambda key: speeds[key])
+        
         self.selected_format = self.select_option(
             "Choose your preferred output format:",
-            OutputFormat.FORMATS
+            formats, notes, default=default
         )
         self.print_success(f"Selected: {self.selected_format['name']}")
         return self.selected_format
@@ -389,8 +1766,163 @@ class DVDRipper:
             QualityPreset.PRESETS
         )
         self.print_success(f"Selected: {self.selected_quality['name']}")
+        
+        encoder = self.selected_format.get('encoder')
+        preset = self.encoder_preset(encoder)
+        if preset != self.selected_quality['preset']:
+            self.print_info(f"Benchmarked {encoder} preset for this host: {preset} "
+                            f"(at least {self.selected_quality['min_speed']:g}x realtime)")
         return self.selected_quality
     
+    def select_audio_stream(self):
+        """Let user pick the audio stream to extract for audio-only formats"""
+        if not self.selected_format or self.selected_format.get('encoder') is not None:
+            return self.audio_stream
+        
+        # Show the streams of the longest title - music DVDs usually share
+        # the same layout (e.g. PCM stereo + AC3 5.1) across all titles
+        titles = [t for t in self.titles if t.get('audio')]
+        if not titles:
+            return self.audio_stream
+        main_title = max(titles, key=lambda t: parse_duration(t.get('duration') or t.get('length')))
+        if len(main_title['audio']) < 2:
+            return self.audio_stream
+        
+        print(f"\n{Colors.OKCYAN}Audio streams:{Colors.ENDC}")
+        for a in main_title['audio']:
+            print(f"  {a['index']}. {a['language']} - {a['format']} ({a['channels']} ch)")
+        
+        choice = self.get_input("Select audio stream to extract", "1")
+        try:
+            self.audio_stream = max(1, int(choice))
+        except ValueError:
+            self.print_warning("Invalid selection, using stream 1")
+            self.audio_stream = 1
+        return self.audio_stream
+    
+    def load_benchmark(self):
+        """This host's benchmark results, or None if it hasn't been benchmarked"""
+        if self._benchmark is None:
+            try:
+                with open(self.benchmark_file) as f:
+                    self._benchmark = json.load(f)
+            except (OSError, ValueError):
+                self._benchmark = {}
+        return self._benchmark or None
+    
+    def encoder_preset(self, encoder, quality=None):
+        """Encoder preset for a quality preset, calibrated by the host benchmark
+        
+        Picks the slowest preset that still encodes at least min_speed times
+        realtime; if none does, the fastest measured. Falls back to the fixed
+        'preset' when this encoder hasn't been benchmarked, or was benchmarked
+        with a different per-worker thread count than encodes now use.
+        """
+        quality = quality or self.selected_quality
+        results = self.benchmark_results().get(encoder)
+        if not results or not quality.get('min_speed'):
+            return quality['preset']
+        
+        measured = [p for p in QualityPreset.ENCODER_PRESETS if p in results]
+        fast_enough = [p for p in measured if results[p]['speed'] >= quality['min_speed']]
+        if fast_enough:
+            return fast_enough[-1]
+        return measured[0] if measured else quality['preset']
+    
+    def benchmark_results(self):
+        """Per-encoder benchmark results, if measured at the current encode thread count ({} if not)"""
+        benchmark = self.load_benchmark() or {}
+        if benchmark.get('threads') != self.encode_threads:
+            return {}
+        return benchmark.get('results') or {}
+    
+    def run_benchmark(self, seconds=20):
+        """Encode a synthetic clip with every encoder and preset, recording speed and size
+        
+        Each encode is capped at encode_threads, as the pipelined, farm and
+        chunked encode workers are, so the measured speed is a worker's speed.
+        """
+        self.print_header("Encoder Benchmark")
+        
+        os.makedirs(self.staging_dir, exist_ok=True)
+        clip = os.path.join(self.staging_dir, "benchmark_source.mkv")
+        source_fps = 30000 / 1001
+        
+        # DVD-like source: NTSC-size MPEG-2 video with AC-3 audio
+        self.print_info(f"Generating a {seconds}s test clip "
+                        f"(encodes run with {self.encode_threads} thread(s), like each encode worker)...")
+        returncode, _, stderr = self.run_command([
+            'ffmpeg', '-y', '-loglevel', 'error',
+            '-f', 'lavfi', '-i', f'testsrc2=size=720x480:rate=30000/1001:duration={seconds}',
+            '-f', 'lavfi', '-i', f'sine=frequency=1000:sample_rate=48000:duration={seconds}',
+            '-c:v', 'mpeg2video', '-b:v', '6M', '-c:a', 'ac3', '-b:a', '384k', clip
+        ])
+        if returncode != 0:
+            self.print_error("Failed to generate the test clip")
+            if stderr:
+                print(f"  Error: {stderr[-200:]}")
+            return None
+        
+        # Formats sharing an encoder run at the same speed, so each encoder
+        # is measured once and every format using it resolves from that
+        encoders = []
+        for fmt in self.available_formats().values():
+            if fmt['encoder'] and fmt['encoder'] not in encoders:
+                encoders.append(fmt['encoder'])
+        
+        results = {}
+        output = os.path.join(self.staging_dir, "benchmark_output.mkv")
+        try:
+            for encoder in encoders:
+                results[encoder] = {}
+                for preset in QualityPreset.ENCODER_PRESETS:
+                    start = time.time()
+                    returncode, _, _ = self.run_command([
+                        'HandBrakeCLI', '--input', clip, '--title', '1', '--output', output,
+                        '--format', 'av_mkv', '--encoder', encoder, '--quality', '22',
+                        '--encoder-preset', QualityPreset.NATIVE_PRESETS.get(encoder, {}).get(preset, preset),
+                        '--aencoder', self.audio_encoder('av_aac') or 'av_aac'
+                    ] + thread_options(encoder, self.encode_threads))
+                    elapsed = time.time() - start
+                    if returncode != 0 or not os.path.exists(output):
+                        self.print_warning(f"{encoder} {preset}: encode failed")
+                        continue
+                    
+                    fps = seconds * source_fps / elapsed
+                    results[encoder][preset] = {
+                        'fps': round(fps, 1),
+                        'speed': round(fps / source_fps, 2),
+                        'mb_per_minute': round(os.path.getsize(output) / (1024 * 1024) * 60 / seconds, 1)
+                    }
+                    self.print_success(f"{encoder:5s} {preset:9s} {fps:7.1f} fps "
+                                       f"({fps / source_fps:.2f}x realtime, "
+                                       f"{results[encoder][preset]['mb_per_minute']:.1f} MB/min)")
+        finally:
+            for path in (clip, output):
+                if os.path.exists(path):
+                    os.remove(path)
+        
+        self._benchmark = {
+            'host': socket.gethostname(),
+            'cpu_count': os.cpu_count(),
+            'threads': self.encode_threads,
+            'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'clip_seconds': seconds,
+            'results': results
+        }
+        os.makedirs(os.path.dirname(self.benchmark_file), exist_ok=True)
+        tmp = f"{self.benchmark_file}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self._benchmark, f, indent=2)
+        os.replace(tmp, self.benchmark_file)
+        self.print_success(f"Results saved to {self.benchmark_file}")
+        
+        print(f"\n{Colors.OKCYAN}Calibrated presets for this host:{Colors.ENDC}")
+        for quality in QualityPreset.PRESETS.values():
+            chosen = ', '.join(f"{encoder} {self.encoder_preset(encoder, quality)}" for encoder in encoders)
+            print(f"  {quality['name']} (>= {quality['min_speed']:g}x realtime): {chosen}")
+        return self._benchmark
+    
     def get_output_name(self):
         """Get the output name from user"""
         self.print_header("Output Settings")
@@ -406,12 +1938,19 @@ class DVDRipper:
         # Create output directory
         self.current_rip_dir = os.path.join(self.base_output_dir, artist, album)
         os.makedirs(self.current_rip_dir, exist_ok=True)
+        self.track_output(self.current_rip_dir)
         
         self.print_success(f"Output directory: {self.current_rip_dir}")
         return artist, album
     
-    def rip_title_handbrake(self, title_num, output_name, track_num=None):
-        """Rip a single title using HandBrake CLI"""
+    def rip_title_handbrake(self, title_num, output_name, track_num=None, source=None, threads=None,
+                            output_dir=None):
+        """Rip a single title using HandBrake CLI
+        
+        source is a staged copy of the title to encode instead of the disc,
+        threads caps the encoder threads when several jobs run at once, and
+        output_dir overrides the rip folder (for intermediate files).
+        """
         
         # Build output filename
         if track_num:
@@ -419,107 +1958,525 @@ class DVDRipper:
         else:
             output_filename = f"{output_name}.{self.selected_format['extension']}"
         
-        output_path = os.path.join(self.current_rip_dir, output_filename)
+        output_path = os.path.join(output_dir or self.current_rip_dir, output_filename)
         
         # Check if audio-only
         if self.selected_format.get('encoder') is None:
             # Use FFmpeg for audio extraction (more reliable for audio-only)
-            return self.extract_audio_ffmpeg(title_num, output_path)
+            return self.extract_audio_ffmpeg(title_num, output_path, source=source)
         
         # Build HandBrake command
-        encoder = self.selected_format['encoder']
         format_type = self.selected_format['format']
-        aencoder = self.selected_format['aencoder']
-        quality = self.selected_quality['quality']
-        preset = self.selected_quality['preset']
+        aencoder = self.audio_encoder(self.selected_format['aencoder']) or self.selected_format['aencoder']
         audio_bitrate = self.selected_quality['audio_bitrate']
         
-        cmd_parts = [
+        # A staged title is a single-title file of its own
+        input_path = source if source else self.dvd_device
+        input_title = 1 if source else title_num
+        
+        quality = self.selected_quality['quality'] + self.selected_format.get('quality_offset', 0)
+        if self.crf_search:
+            quality = self.search_quality(title_num, input_path, input_title, threads)
+        self.title_rf[title_num] = quality
+        
+        cmd = [
             'HandBrakeCLI',
-            f'--input {self.dvd_device}',
-            f'--title {title_num}',
-            f'--output "{output_path}"',
-            f'--format {format_type}',
-            f'--encoder {encoder}',
-            f'--quality {quality}',
-            f'--encoder-preset {preset}',
-            f'--aencoder {aencoder}',
-            f'--ab {audio_bitrate}',
+            '--input', input_path,
+            '--title', str(input_title),
+            '--output', output_path,
+            '--format', format_type,
+            '--aencoder', aencoder,
+            '--ab', str(audio_bitrate),
             '--all-audio',  # Include all audio tracks
             '--all-subtitles',  # Include all subtitles
             '--markers',  # Include chapter markers
         ]
         
-        # Add HEVC-specific options for Apple compatibility
-        if encoder == 'x265':
-            cmd_parts.append('--encoder-tune fastdecode')
-        
-        cmd = ' '.join(cmd_parts)
+        # A long title encoded on its own is split so it can use every core;
+        # the chunks need a local copy of the title to read from
+        chunks = self.plan_chunks(title_num) if self.chunked and not threads else None
+        if chunks and not source and not self.has_dvdvideo_demuxer():
+            self.print_warning("ffmpeg has no dvdvideo demuxer to stage the title - encoding it in one piece")
+            chunks = None
         
         self.print_info(f"Ripping title {title_num} to {self.selected_format['name']}...")
         
-        returncode, _, stderr = self.run_command(cmd, show_output=True)
+        if chunks:
+            returncode, stderr = self.encode_chunked(output_path, title_num, source, quality, chunks)
+        else:
+            returncode, _, stderr = self.run_tracked(cmd + self.video_options(quality, threads), 'encode',
+                                                     f"title {title_num}", parse_handbrake_progress)
         
         if returncode == 0 and os.path.exists(output_path):
             size_mb = os.path.getsize(output_path) / (1024 * 1024)
+            self.track_output(output_path)
             self.print_success(f"Completed: {output_filename} ({size_mb:.1f} MB)")
             return output_path
         else:
             self.print_error(f"Failed to rip title {title_num}")
             if stderr:
-                print(f"  Error: {stderr[:200]}")
+                print(f"  Error: {stderr[-200:]}")
             return None
     
-    def extract_audio_ffmpeg(self, title_num, output_path):
-        """Extract audio from DVD title using FFmpeg"""
-        self.print_info(f"Extracting audio from title {title_num}...")
+    def video_options(self, quality, threads=None):
+        """HandBrake video encoder options for the selected format at an RF value"""
+        encoder = self.selected_format['encoder']
+        preset = self.encoder_preset(encoder)
+        preset = QualityPreset.NATIVE_PRESETS.get(encoder, {}).get(preset, preset)
+        options = ['--encoder', encoder, '--quality', str(quality), '--encoder-preset', preset]
         
-        # First, use HandBrake to extract to a temp MKV with audio
-        temp_mkv = f"/tmp/dvd_audio_temp_{title_num}.mkv"
+        # Add HEVC-specific options for Apple compatibility
+        if encoder == 'x265':
+            options += ['--encoder-tune', 'fastdecode']
         
-        # Extract with HandBrake first (handles DVD structure)
-        cmd = f'HandBrakeCLI --input {self.dvd_device} --title {title_num} --output "{temp_mkv}" --format av_mkv --encoder x264 --quality 30 --encoder-preset ultrafast --aencoder copy'
+        # Keep concurrent jobs within their share of the cores
+        return options + thread_options(encoder, threads)
+    
+    def plan_chunks(self, title_num):
+        """Chapter ranges that split a title into one chunk per encode worker
+        
+        Ranges are balanced by the lsdvd chapter lengths. Returns None when the
+        title is too short, or has too few chapters, to be worth splitting.
+        """
+        title = next((t for t in self.titles if t['number'] == title_num), {})
+        lengths = title.get('chapter_lengths') or []
+        total = sum(lengths)
+        count = min(len(lengths), max(1, (os.cpu_count() or 1) // self.encode_threads))
+        if count < 2 or total < self.chunk_min_seconds:
+            return None
         
-        returncode, _, _ = self.run_command(cmd, show_output=True)
+        ranges = []
+        first = 1
+        elapsed = 0.0
+        for number, length in enumerate(lengths[:-1], 1):
+            elapsed += length
+            if elapsed >= total * (len(ranges) + 1) / count:
+                ranges.append((first, number))
+                first = number + 1
+                if len(ranges) == count - 1:
+                    break
+        ranges.append((first, len(lengths)))
+        return ranges
+    
+    def encode_chunked(self, output_path, title_num, source, quality, chunks):
+        """Encode a title as parallel chapter-range chunks joined without re-encoding
+        
+        The chunks read a local copy of the title - the staged source, or the
+        title staged here first - so the disc is read once. Each chunk is a
+        video-only encode of its chapter range, and join_chunks() puts the
+        title back together. Returns (returncode, error tail).
+        """
+        if not source:
+            os.makedirs(self.staging_dir, exist_ok=True)
+        staged_path = source or self.stage_title(title_num)
+        if not staged_path:
+            return 1, f"could not stage title {title_num}"
+        workdir = os.path.join(self.staging_dir, f"chunks-title-{title_num:02d}")
+        os.makedirs(workdir, exist_ok=True)
+        self.print_info(f"Encoding title {title_num} as {len(chunks)} parallel chunk(s): "
+                        + ", ".join(f"chapters {first}-{last}" for first, last in chunks))
+        
+        jobs = []
+        chunk_paths = []
+        for i, (first, last) in enumerate(chunks, 1):
+            path = os.path.join(workdir, f"chunk-{i:02d}.mkv")
+            chunk_paths.append(path)
+            jobs.append((['HandBrakeCLI', '--input', staged_path, '--title', '1',
+                          '--chapters', f"{first}-{last}", '--output', path, '--format', 'av_mkv',
+                          '--audio', 'none'] + self.video_options(quality, self.encode_threads),
+                         f"title {title_num} chunk {i}/{len(chunks)}"))
         
-        if returncode != 0 or not os.path.exists(temp_mkv):
-            self.print_error("Failed to extract title for audio processing")
+        try:
+            with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+                results = list(pool.map(
+                    lambda job: self.run_tracked(job[0], 'encode', job[1], parse_handbrake_progress), jobs))
+            for (returncode, _, stderr), (_, item) in zip(results, jobs):
+                if returncode != 0:
+                    return returncode, f"{item}: {stderr or ''}"
+            
+            return self.join_chunks(chunk_paths, staged_path, output_path, workdir)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+            if not source and os.path.exists(staged_path):
+                os.remove(staged_path)
+    
+    def join_chunks(self, chunk_paths, staged_path, output_path, workdir):
+        """Concatenate encoded video chunks and mux them with a staged title's other streams
+        
+        The video is joined by stream copy. The staged title's audio is
+        encoded as the format's audio encoder would (AAC, FLAC or Opus at the
+        preset's bitrate), so the file matches a single-pass encode. Its
+        chapters are kept, and its bitmap subtitles only go into MKV, which
+        can hold them. Returns (returncode, error tail).
+        """
+        list_path = os.path.join(workdir, "chunks.txt")
+        with open(list_path, 'w') as f:
+            for path in chunk_paths:
+                escaped = path.replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        
+        fmt = self.selected_format
+        join = ['ffmpeg', '-nostdin', '-v', 'error', '-y', '-f', 'concat', '-safe', '0', '-i', list_path,
+                '-i', staged_path, '-map', '0:v', '-map', '1:a?']
+        if fmt['format'] == 'av_mkv':
+            join += ['-map', '1:s?']
+        join += ['-map_chapters', '1', '-c', 'copy']
+        
+        audio = OutputFormat.FFMPEG_MUX_AUDIO.get(fmt['aencoder'], OutputFormat.FFMPEG_MUX_AUDIO['av_aac'])
+        join += audio
+        if audio[1] != 'flac':
+            join += ['-b:a', f"{self.selected_quality['audio_bitrate']}k"]
+        # HEVC in MP4 keeps the hvc1 tag HandBrake would have written, for Apple players
+        if fmt['encoder'] == 'x265' and fmt['extension'] == 'mp4':
+            join += ['-tag:v', 'hvc1']
+        returncode, _, stderr = self.run_command(join + [output_path])
+        return returncode, stderr
+    
+    def search_quality(self, title_num, input_path, input_title, threads=None):
+        """Highest RF at which sampled segments of a title still meet the preset's SSIM target
+        
+        A few short segments spread over the title are encoded losslessly as
+        references, then bisected over RF values around the preset's; an RF
+        passes when its worst segment's SSIM reaches the target. Falls back to
+        the preset's RF for short titles or when a sample can't be measured.
+        """
+        base = self.selected_quality['quality'] + self.selected_format.get('quality_offset', 0)
+        target = self.selected_quality['ssim_target']
+        duration = self.title_seconds(title_num)
+        count = min(self.crf_samples, int(duration // (self.crf_sample_seconds * 4)))
+        if count < 1:
+            return base
+        
+        length = self.crf_sample_seconds
+        starts = [int(duration * (i + 0.5) / count - length / 2) for i in range(count)]
+        sample_threads = max(1, (threads or os.cpu_count() or 1) // count)
+        workdir = os.path.join(self.staging_dir, f"rf-search-title-{title_num:02d}")
+        os.makedirs(workdir, exist_ok=True)
+        
+        def encode_samples(name, options):
+            """Encode every sample concurrently, video only; returns the paths or None"""
+            paths = [os.path.join(workdir, f"{name}-{i}.mkv") for i in range(count)]
+            commands = [(['HandBrakeCLI', '--input', input_path, '--title', str(input_title),
+                          '--start-at', f"seconds:{start}", '--stop-at', f"seconds:{length}",
+                          '--output', path, '--format', 'av_mkv', '--audio', 'none'] + options, None)
+                        for start, path in zip(starts, paths)]
+            results = self.runner.run_many(commands)
+            if any(returncode != 0 or not os.path.exists(path) for (returncode, _, _), path in zip(results, paths)):
+                return None
+            return paths
+        
+        def measure(quality):
+            """Worst SSIM and PSNR over the samples at an RF value (None if unmeasurable)"""
+            paths = encode_samples(f"rf{quality}", self.video_options(quality, sample_threads))
+            if not paths:
+                return None
+            scores = [self.compare_video(path, reference) for path, reference in zip(paths, references)]
+            for path in paths:
+                os.remove(path)
+            if None in scores:
+                return None
+            return min(s['ssim'] for s in scores), min(s['psnr'] for s in scores)
+        
+        self.print_info(f"Searching RF for title {title_num}: {count} x {length}s samples, "
+                        f"target SSIM {target}")
+        try:
+            # x264 at RF 0 is lossless, so the references carry only the decode and filters
+            references = encode_samples("reference", ['--encoder', 'x264', '--quality', '0',
+                                                      '--encoder-preset', 'ultrafast',
+                                                      '--encopts', f'threads={sample_threads}'])
+            if not references:
+                self.print_warning(f"Could not encode reference samples - using RF {base}")
+                return base
+            
+            low, high = base + QualityPreset.SEARCH_WINDOW[0], base + QualityPreset.SEARCH_WINDOW[1]
+            best = None
+            while low <= high:
+                quality = (low + high) // 2
+                result = measure(quality)
+                if result is None:
+                    self.print_warning(f"Could not measure RF {quality} - using RF {base}")
+                    return base
+                ssim, psnr = result
+                passed = ssim >= target
+                print(f"  RF {quality}: SSIM {ssim:.4f}, PSNR {psnr:.1f} dB {'✓' if passed else '✗'}")
+                if passed:
+                    best = quality
+                    low = quality + 1
+                else:
+                    high = quality - 1
+            
+            chosen = best if best is not None else base + QualityPreset.SEARCH_WINDOW[0]
+            self.print_success(f"Title {title_num}: RF {chosen} (preset {base})")
+            return chosen
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    
+    def compare_video(self, distorted, reference):
+        """SSIM (All) and PSNR (average, dB) of an encode against its reference via ffmpeg's filters"""
+        graph = '[1:v]split[ref1][ref2];[0:v][ref1]ssim[scored];[scored][ref2]psnr'
+        returncode, output, _ = self.run_command(
+            ['ffmpeg', '-nostdin', '-hide_banner', '-i', distorted, '-i', reference,
+             '-lavfi', graph, '-f', 'null', '-'],
+            capture_output=True, merge_stderr=True
+        )
+        ssim = re.search(r'SSIM .*All:([\d.]+)', output or '')
+        psnr = re.search(r'PSNR .*average:([\d.]+|inf)', output or '')
+        if returncode != 0 or not ssim or not psnr:
+            return None
+        return {'ssim': float(ssim.group(1)), 'psnr': float(psnr.group(1))}
+    
+    def media_duration(self, path):
+        """Get a media file's duration in seconds via ffprobe (0 if unknown)"""
+        returncode, stdout, _ = self.run_command(
+            ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=nw=1:nk=1', path],
+            capture_output=True
+        )
+        try:
+            return float(stdout.strip()) if returncode == 0 else 0.0
+        except ValueError:
+            return 0.0
+    
+    def journal_start(self, jobs):
+        """Record the planned jobs for this disc before any work starts"""
+        fingerprint = (self.dvd_info or {}).get('fingerprint')
+        self.journal = {
+            'key': fingerprint or hashlib.sha1(self.current_rip_dir.encode()).hexdigest(),
+            'fingerprint': fingerprint,
+            'device': self.dvd_device,
+            'disc_title': (self.dvd_info or {}).get('title', 'Unknown DVD'),
+            'rip_dir': self.current_rip_dir,
+            'settings': {
+                'format': next(k for k, v in OutputFormat.FORMATS.items() if v is self.selected_format),
+                'quality': next(k for k, v in QualityPreset.PRESETS.items() if v is self.selected_quality),
+                'audio_stream': self.audio_stream,
+                'pipelined': self.pipelined,
+                'crf_search': self.crf_search,
+                'chunked': self.chunked
+            },
+            'jobs': [dict(job, state='planned') for job in jobs],
+            'started': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        with self.journal_lock:
+            self.journal_write()
+    
+    def journal_write(self):
+        """Atomically rewrite the journal; a fully done journal is removed"""
+        path = os.path.join(self.journal_dir, f"{self.journal['key']}.json")
+        if all(job['state'] == 'done' for job in self.journal['jobs']):
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        os.makedirs(self.journal_dir, exist_ok=True)
+        self.journal['updated'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.journal, f, indent=2)
+        os.replace(tmp, path)
+    
+    def journal_update(self, job, **fields):
+        """Update one job's journal entry (a no-op when no journal is kept)"""
+        if not self.journal:
+            return
+        with self.journal_lock:
+            for entry in self.journal['jobs']:
+                if entry['title'] == job['title'] and entry['track'] == job['track']:
+                    entry.update(fields)
+            self.journal_write()
+    
+    def rip_job(self, job, source=None, threads=None):
+        """Rip one planned job, journaling it and verifying the output's duration"""
+        self.journal_update(job, state='running')
+        output = self.rip_title_handbrake(job['title'], job['name'], track_num=job['track'],
+                                          source=source, threads=threads)
+        if not output:
+            self.journal_update(job, state='failed')
             return None
         
+        duration = self.media_duration(output)
+        expected = self.title_seconds(job['title'])
+        if duration and expected and abs(duration - expected) > max(2.0, expected * 0.01):
+            self.print_warning(f"{os.path.basename(output)} is {duration:.0f}s, expected {expected:.0f}s "
+                               f"- left for --resume")
+            self.journal_update(job, state='failed', output=output, duration=round(duration, 2),
+                                rf=self.title_rf.get(job['title']))
+            return output
+        
+        self.journal_update(job, state='done', output=output, size=os.path.getsize(output),
+                            duration=round(duration, 2), rf=self.title_rf.get(job['title']))
+        return output
+    
+    def pending_journals(self):
+        """Journals with unfinished jobs, most recently updated first"""
+        journals = []
+        try:
+            names = [n for n in os.listdir(self.journal_dir) if n.endswith('.json')]
+        except OSError:
+            names = []
+        for name in names:
+            try:
+                with open(os.path.join(self.journal_dir, name)) as f:
+                    journals.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return sorted(journals, key=lambda j: j.get('updated', ''), reverse=True)
+    
+    def resume(self, key=None):
+        """Resume an interrupted batch: completed outputs are kept, the rest re-ripped"""
+        self.print_header("Resume Interrupted Rip")
+        
+        journals = [j for j in self.pending_journals() if not key or j['key'].startswith(key)]
+        if not journals:
+            self.print_info("Nothing to resume")
+            return
+        
+        if len(journals) == 1:
+            journal = journals[0]
+        else:
+            for i, j in enumerate(journals, 1):
+                done = sum(1 for job in j['jobs'] if job['state'] == 'done')
+                print(f"  {i}. {j['disc_title']} - {done}/{len(j['jobs'])} done ({j.get('updated', '?')})")
+            choice = self.get_input("Select the rip to resume", "1")
+            try:
+                journal = journals[int(choice) - 1]
+            except (ValueError, IndexError):
+                self.print_error("Invalid selection")
+                return
+        
+        self.dvd_device = journal['device']
+        if not self.check_dvd_inserted():
+            return
+        if journal['fingerprint'] and self.disc_fingerprint() != journal['fingerprint']:
+            self.print_error(f"This is not the disc being resumed ({journal['disc_title']})")
+            return
+        
+        self.get_dvd_info()
+        settings = journal['settings']
+        self.selected_format = OutputFormat.FORMATS[settings['format']]
+        if not self.format_available(self.selected_format):
+            self.print_error(f"{self.selected_format['name']} is no longer available with the installed encoders")
+            return
+        self.selected_quality = QualityPreset.PRESETS[settings['quality']]
+        self.audio_stream = settings['audio_stream']
+        self.pipelined = settings['pipelined']
+        self.crf_search = settings.get('crf_search', False)
+        self.chunked = settings.get('chunked', False)
+        self.current_rip_dir = journal['rip_dir']
+        os.makedirs(self.current_rip_dir, exist_ok=True)
+        self.track_output(self.current_rip_dir)
+        self.journal = journal
+        
+        # Done means the output is still there at the size that was recorded
+        remaining = [job for job in journal['jobs']
+                     if not (job['state'] == 'done' and job.get('output') and os.path.exists(job['output'])
+                             and os.path.getsize(job['output']) == job.get('size'))]
+        self.print_info(f"{len(journal['jobs']) - len(remaining)} of {len(journal['jobs'])} title(s) "
+                        f"already complete - {len(remaining)} to rip")
+        
+        jobs = [dict((k, job[k]) for k in ('title', 'name', 'track', 'chapters') if k in job) for job in remaining]
+        if any('chapters' in job for job in jobs):
+            # Chapter mode: the title is encoded again and re-split
+            converted = [path for job in jobs for path in self.rip_chapters(job)]
+        else:
+            converted = self.process_jobs(jobs)
+        if converted:
+            self.apply_replaygain()
+            self.fix_permissions()
+            self.catalog_rip()
+        self.show_summary()
+        if not self.disc_ejected and self.yes_no_prompt("\nWould you like to eject the DVD?"):
+            self.eject_dvd()
+    
+    def run_tracked(self, cmd, stage, item, parse):
+        """Run a tool with its progress output turned into telemetry events"""
+        base = {'stage': stage, 'item': item, 'device': self.dvd_device}
+        
+        def on_line(line):
+            event = parse(line)
+            if event:
+                self.telemetry.emit(dict(base, **dict(event, state='running')))
+        
+        start = time.time()
+        returncode, stdout, stderr = self.run_command(cmd, on_line=on_line)
+        final = {'state': 'done', 'percent': 100.0, 'eta_seconds': 0} if returncode == 0 else {'state': 'failed'}
+        self.telemetry.emit(dict(base, elapsed_seconds=round(time.time() - start, 1), **final))
+        return returncode, stdout, stderr
+    
+    def ffmpeg_tracked(self, cmd, stage, item, duration):
+        """Run an ffmpeg command with -progress telemetry"""
+        progress = FfmpegProgress(duration)
+        cmd = cmd[:1] + ['-progress', 'pipe:1', '-nostats'] + cmd[1:]
+        return self.run_tracked(cmd, stage, item, progress.feed)
+    
+    def title_seconds(self, title_num):
+        """Duration of a title in seconds from the disc analysis (0 if unknown)"""
+        title = next((t for t in self.titles if t['number'] == title_num), {})
+        return parse_duration(title.get('duration') or title.get('length'))
+    
+    def extract_audio_ffmpeg(self, title_num, output_path, source=None):
+        """Extract audio from DVD title using FFmpeg"""
+        self.print_info(f"Extracting audio from title {title_num}...")
+        
+        # Zero-based index of the chosen stream, clamped to what this title has
+        title = next((t for t in self.titles if t['number'] == title_num), {})
+        stream_count = len(title.get('audio') or []) or 1
+        audio_index = min(self.audio_stream, stream_count) - 1
+        
+        temp_mkv = None
+        if source:
+            # Staged titles already carry the original audio streams
+            audio_input = ['-i', source]
+        elif self.has_dvdvideo_demuxer():
+            # Demux the audio straight from the title's VOBs - the video
+            # stream is never decoded and nothing is written to /tmp
+            audio_input = ['-f', 'dvdvideo', '-title', str(title_num), '-i', self.dvd_device]
+        else:
+            # First, use HandBrake to extract to a temp MKV with audio
+            temp_mkv = f"/tmp/dvd_audio_temp_{title_num}.mkv"
+            
+            # Extract with HandBrake first (handles DVD structure)
+            cmd = ['HandBrakeCLI', '--input', self.dvd_device, '--title', str(title_num), '--output', temp_mkv,
+                   '--format', 'av_mkv', '--encoder', 'x264', '--quality', '30', '--encoder-preset', 'ultrafast',
+                   '--aencoder', 'copy']
+            
+            returncode, _, _ = self.run_tracked(cmd, 'encode', f"title {title_num}", parse_handbrake_progress)
+            
+            if returncode != 0 or not os.path.exists(temp_mkv):
+                self.print_error("Failed to extract title for audio processing")
+                return None
+            audio_input = ['-i', temp_mkv]
+        
         # Now extract audio with FFmpeg
         ext = self.selected_format['extension']
+        audio_cmd = ['ffmpeg', '-y', '-loglevel', 'error'] + audio_input + ['-map', f'0:a:{audio_index}?', '-vn']
         
         if ext == 'flac':
-            audio_cmd = f'ffmpeg -i "{temp_mkv}" -vn -acodec flac "{output_path}" -y'
+            audio_cmd += ['-acodec', 'flac', output_path]
         else:  # mp3
             bitrate = self.selected_quality['audio_bitrate']
-            audio_cmd = f'ffmpeg -i "{temp_mkv}" -vn -acodec libmp3lame -ab {bitrate}k "{output_path}" -y'
+            audio_cmd += ['-acodec', 'libmp3lame', '-ab', f'{bitrate}k', output_path]
         
-        returncode, _, _ = self.run_command(audio_cmd, show_output=True)
+        returncode, _, _ = self.ffmpeg_tracked(audio_cmd, 'audio', f"title {title_num}",
+                                               self.title_seconds(title_num))
         
         # Clean up temp file
-        if os.path.exists(temp_mkv):
+        if temp_mkv and os.path.exists(temp_mkv):
             os.remove(temp_mkv)
         
         if returncode == 0 and os.path.exists(output_path):
             size_mb = os.path.getsize(output_path) / (1024 * 1024)
+            self.track_output(output_path)
             self.print_success(f"Audio extracted: {os.path.basename(output_path)} ({size_mb:.1f} MB)")
             return output_path
         else:
             self.print_error("Audio extraction failed")
             return None
     
-    def run_batch_mode(self):
-        """Run in batch mode - process all titles automatically"""
-        self.print_header("Batch Mode - Ripping All Titles")
-        
-        if not self.titles:
-            self.print_error("No titles found on DVD")
-            return False
-        
-        # Filter to main content (titles > 1 minute typically)
+    def select_main_titles(self):
+        """Filter to main content (titles > 1 minute typically), each piece of footage once"""
         main_titles = []
         for t in self.titles:
+            if 'same_as' in t or 'plays' in t or 'part_of' in t:
+                continue
             duration = t.get('duration') or t.get('length', '00:00:00')
             # Parse duration to check if > 1 minute
             try:
@@ -531,12 +2488,21 @@ class DVDRipper:
             except:
                 main_titles.append(t)  # Include if we can't parse
         
-        if not main_titles:
-            main_titles = self.titles
+        return main_titles or self.titles
+    
+    def run_batch_mode(self):
+        """Run in batch mode - process all titles automatically"""
+        self.print_header("Batch Mode - Ripping All Titles")
+        
+        if not self.titles:
+            self.print_error("No titles found on DVD")
+            return False
+        
+        main_titles = self.select_main_titles()
         
         self.print_info(f"Processing {len(main_titles)} title(s)...")
         
-        converted = []
+        jobs = []
         for i, title in enumerate(main_titles, 1):
             title_num = title['number']
             duration = title.get('duration') or title.get('length', 'Unknown')
@@ -549,10 +2515,10 @@ class DVDRipper:
             if self.yes_no_prompt(f"Rename '{output_name}'?"):
                 output_name = self.get_input("Enter new name", output_name)
             
-            result = self.rip_title_handbrake(title_num, output_name, track_num=i)
-            if result:
-                converted.append(result)
+            jobs.append({'title': title_num, 'name': output_name, 'track': i})
         
+        self.journal_start(jobs)
+        converted = self.process_jobs(jobs)
         return len(converted) > 0
     
     def run_selective_mode(self):
@@ -591,7 +2557,7 @@ class DVDRipper:
         
         self.print_info(f"\nProcessing {len(selected_titles)} selected title(s)...")
         
-        converted = []
+        jobs = []
         for i, title in enumerate(selected_titles, 1):
             title_num = title['number']
             duration = title.get('duration') or title.get('length', 'Unknown')
@@ -600,67 +2566,571 @@ class DVDRipper:
             
             output_name = self.get_input(f"Enter name for title {title_num}", f"Track {i:02d}")
             
-            result = self.rip_title_handbrake(title_num, output_name, track_num=i)
+            jobs.append({'title': title_num, 'name': output_name, 'track': i})
+        
+        self.journal_start(jobs)
+        converted = self.process_jobs(jobs)
+        return len(converted) > 0
+    
+    def run_chapter_mode(self):
+        """Run in chapter mode - encode one title once, split it into a file per chapter
+        
+        Concert DVDs often hold every song as a chapter of one title. The title
+        is read and encoded in a single pass (HandBrake --markers puts a key
+        frame on every chapter start) and then cut at the chapter boundaries
+        with stream copy.
+        """
+        self.print_header("Chapter Mode")
+        
+        if not self.titles:
+            self.print_error("No titles found on DVD")
+            return False
+        
+        # Default to a Play All title, else the longest one
+        default = next((t for t in self.titles if 'plays' in t), None) or \
+            max(self.titles, key=lambda t: self.title_seconds(t['number']))
+        
+        print(f"\n{Colors.OKCYAN}Available titles:{Colors.ENDC}")
+        for t in self.titles:
+            duration = t.get('duration') or t.get('length', 'Unknown')
+            print(f"  {t['number']:2d}. Duration: {duration}, Chapters: {t.get('chapters', '?')}")
+        
+        choice = self.get_input("\nEnter the title to split into chapters", str(default['number']))
+        title = next((t for t in self.titles if str(t['number']) == choice.strip()), None)
+        if not title:
+            self.print_error(f"No title {choice}")
+            return False
+        
+        # Names are asked for up front so the encode can run unattended
+        count = len([n for n in title.get('chapter_lengths', []) if n >= 1.0]) or title.get('chapters', 0)
+        names = []
+        if count and self.yes_no_prompt(f"Name the {count} chapter(s)?"):
+            for i in range(1, count + 1):
+                names.append(self.get_input(f"Enter name for chapter {i}", f"Track {i:02d}"))
+        
+        job = {'title': title['number'], 'name': f"Title {title['number']} chapters", 'track': 0,
+               'chapters': names}
+        self.journal_start([job])
+        return len(self.rip_chapters(job)) > 0
+    
+    def rip_chapters(self, job):
+        """Encode a chapter-mode job's title and split it, journaled as one job
+        
+        The job is only done once the encoded title's duration matches the
+        title's and the chapter files are cut; otherwise it is left for --resume.
+        """
+        self.journal_update(job, state='running')
+        os.makedirs(self.staging_dir, exist_ok=True)
+        full_path = self.rip_title_handbrake(job['title'], f"title_{job['title']:02d}_full",
+                                             output_dir=self.staging_dir)
+        if not full_path:
+            self.journal_update(job, state='failed')
+            return []
+        
+        names = job.get('chapters') or []
+        try:
+            duration = self.media_duration(full_path)
+            expected = self.title_seconds(job['title'])
+            complete = not (duration and expected and abs(duration - expected) > max(2.0, expected * 0.01))
+            if not complete:
+                self.print_warning(f"Title {job['title']} encoded to {duration:.0f}s, expected {expected:.0f}s "
+                                   f"- left for --resume")
+            
+            spans = self.chapter_spans(full_path, job['title'])
+            if len(spans) < 2:
+                self.print_warning("No chapter table - keeping the title as a single file")
+                name = names[0] if names else "Track 01"
+                output_path = os.path.join(self.current_rip_dir,
+                                           f"01 - {name}.{self.selected_format['extension']}")
+                shutil.move(full_path, output_path)
+                self.track_output(output_path)
+                outputs = [output_path]
+            else:
+                outputs = self.split_chapters(full_path, spans, names)
+        finally:
+            if os.path.exists(full_path):
+                os.remove(full_path)
+        
+        self.journal_update(job, state='done' if outputs and complete else 'failed', outputs=outputs,
+                            duration=round(duration, 2), rf=self.title_rf.get(job['title']))
+        return outputs
+    
+    def chapter_spans(self, path, title_num):
+        """(start, end) seconds of each chapter of an encoded title
+        
+        Read from the file's own chapter table, or built from the lsdvd chapter
+        lengths when the container carries none. Sub-second chapters (common
+        at the end of DVD titles) are dropped.
+        """
+        _, stdout, _ = self.run_command(['ffprobe', '-v', 'error', '-show_chapters', '-of', 'json', path],
+                                        capture_output=True)
+        spans = []
+        try:
+            for chapter in json.loads(stdout or '')['chapters']:
+                spans.append((float(chapter['start_time']), float(chapter['end_time'])))
+        except (ValueError, KeyError, TypeError):
+            pass
+        
+        if not spans:
+            title = next((t for t in self.titles if t['number'] == title_num), {})
+            start = 0.0
+            for length in title.get('chapter_lengths', []):
+                spans.append((start, start + length))
+                start += length
+        return [(start, end) for start, end in spans if end - start >= 1.0]
+    
+    def split_chapters(self, full_path, spans, names):
+        """Cut an encoded title into NN - Name files at chapter boundaries (no re-encode)"""
+        ext = self.selected_format['extension']
+        self.print_info(f"Splitting into {len(spans)} chapter file(s)...")
+        
+        outputs = []
+        for i, (start, end) in enumerate(spans, 1):
+            name = names[i - 1] if i <= len(names) else f"Track {i:02d}"
+            output_path = os.path.join(self.current_rip_dir, f"{i:02d} - {name}.{ext}")
+            cmd = ['ffmpeg', '-y', '-loglevel', 'error', '-ss', f'{start:.3f}', '-i', full_path,
+                   '-t', f'{end - start:.3f}', '-map', '0', '-dn', '-c', 'copy', '-map_chapters', '-1',
+                   '-avoid_negative_ts', 'make_zero', '-metadata', f'title={name}',
+                   '-metadata', f'track={i}/{len(spans)}', output_path]
+            returncode, _, stderr = self.run_command(cmd)
+            
+            if returncode == 0 and os.path.exists(output_path):
+                size_mb = os.path.getsize(output_path) / (1024 * 1024)
+                self.track_output(output_path)
+                self.print_success(f"{os.path.basename(output_path)} ({size_mb:.1f} MB)")
+                outputs.append(output_path)
+            else:
+                self.print_error(f"Failed to split chapter {i}")
+                if stderr:
+                    print(f"  Error: {stderr[-200:]}")
+        return outputs
+    
+    def process_jobs(self, jobs):
+        """Rip the planned titles, pipelined or one at a time"""
+        if self.pipelined:
+            return self.run_pipeline(jobs)
+        
+        converted = []
+        for i, job in enumerate(jobs, 1):
+            self.print_info(f"\n[{i}/{len(jobs)}] Title {job['title']}")
+            result = self.rip_job(job)
             if result:
                 converted.append(result)
+        return converted
+    
+    def measure_file(self, path):
+        """Loudness of a file's first audio stream, decoded by ffmpeg and measured as a stream
+        
+        Surround mixes are measured on ffmpeg's stereo downmix.
+        """
+        cmd = ['ffmpeg', '-nostdin', '-v', 'error', '-i', path, '-map', '0:a:0', '-ac', '2', '-ar', '48000',
+               '-f', 'f32le', '-']
+        meter = LoudnessMeter(48000, 2, '<f4')
+        returncode, _ = self.runner.stream(cmd, on_chunk=meter.update)
+        return meter.result() if returncode == 0 else None
+    
+    def rip_outputs(self):
+        """The files this disc's rip produced in the rip folder
         
-        return len(converted) > 0
+        Those are the outputs in the job journal (titles finished before a
+        resume included) and any this session wrote; files left in the
+        folder by earlier rips are not.
+        """
+        ext = self.selected_format['extension']
+        rip_dir = os.path.abspath(self.current_rip_dir)
+        paths = set(self.created_paths)
+        for job in (self.journal or {}).get('jobs', []):
+            paths.update([job.get('output')] + job.get('outputs', []))
+        return sorted(path for path in (os.path.abspath(p) for p in paths if p)
+                      if os.path.dirname(path) == rip_dir and path.endswith(f".{ext}") and os.path.isfile(path))
+    
+    def apply_replaygain(self):
+        """Tag this rip's outputs with ReplayGain 2.0 track and album gain/peak
+        
+        Only the files this rip produced are measured, in parallel, so the
+        album values cover this disc alone. MKV files are then tagged in
+        place with mkvpropedit, on the measured (first) audio track. FLAC and
+        MP3 are remuxed (stream copy) with the tags added, as Vorbis comments
+        and ID3 TXXX frames. MP4 is remuxed too, so it is only tagged with
+        replaygain_mp4.
+        """
+        if not self.replaygain or not self.current_rip_dir:
+            return
+        if np is None:
+            self.print_warning("NumPy is not installed - skipping ReplayGain analysis")
+            return
+        ext = self.selected_format['extension']
+        if ext == 'mp4' and not self.replaygain_mp4:
+            self.print_info("Skipping ReplayGain for MP4 (each file would be rewritten - use --replaygain-mp4)")
+            return
+        if ext == 'mkv' and not shutil.which('mkvpropedit'):
+            self.print_warning("mkvpropedit is not installed (sudo apt install mkvtoolnix) - "
+                               "skipping ReplayGain tags")
+            return
+        paths = self.rip_outputs()
+        if not paths:
+            return
+        
+        self.print_info(f"Measuring loudness of {len(paths)} file(s)...")
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+            levels = dict(zip(paths, pool.map(self.measure_file, paths)))
+        album = album_loudness(levels.values())
+        
+        commands, staged = [], []
+        for path, result in levels.items():
+            tags = replaygain_tags(result, album)
+            if not tags:
+                continue
+            root, extension = os.path.splitext(path)
+            if ext == 'mkv':
+                tags_path = f"{root}.replaygain.xml"
+                with open(tags_path, 'w') as f:
+                    f.write(matroska_tags(tags))
+                commands.append((['mkvpropedit', '--quiet', path, '--tags', f"track:a1:{tags_path}"], None))
+                staged.append((tags_path, None))
+                continue
+            tagged = f"{root}.replaygain{extension}"
+            cmd = ['ffmpeg', '-nostdin', '-v', 'error', '-y', '-i', path, '-map', '0', '-c', 'copy', '-map_metadata', '0']
+            if ext == 'mp4':
+                cmd += ['-movflags', 'use_metadata_tags']
+            for name, value in tags.items():
+                cmd += ['-metadata', f"{name}={value}"]
+            commands.append((cmd + [tagged], None))
+            staged.append((tagged, path))
+        
+        # A remuxed copy replaces its file; a tags file is removed once written
+        failed = 0
+        for (staged_path, path), (returncode, _, _) in zip(staged, self.runner.run_many(commands)):
+            if returncode == 0 and path is None:
+                os.remove(staged_path)
+            elif returncode == 0 and os.path.exists(staged_path):
+                os.replace(staged_path, path)
+            else:
+                failed += 1
+                if os.path.exists(staged_path):
+                    os.remove(staged_path)
+        
+        if failed:
+            self.print_warning(f"Could not write ReplayGain tags to {failed} file(s)")
+        if album and album['loudness'] is not None:
+            self.print_success(f"ReplayGain: album {album['loudness']:.1f} LUFS "
+                               f"({REPLAYGAIN_REFERENCE - album['loudness']:+.2f} dB), "
+                               f"true peak {20 * math.log10(max(album['peak'], 1e-10)):.1f} dBTP")
+    
+    def has_dvdvideo_demuxer(self):
+        """Check whether ffmpeg can read DVD titles directly (dvdvideo demuxer)"""
+        return bool(self.tools.provides('ffmpeg', 'demuxers', 'dvdvideo'))
+    
+    def stage_audio_options(self, title_num):
+        """Per-stream codec options that let a title's audio be stored in MKV
+        
+        DVD LPCM (pcm_dvd) has no Matroska mapping, so it is converted to
+        little-endian PCM at its own bit depth; every other stream is copied.
+        """
+        returncode, stdout, _ = self.run_command(
+            ['ffprobe', '-v', 'error', '-f', 'dvdvideo', '-title', str(title_num), '-i', self.dvd_device,
+             '-select_streams', 'a', '-show_entries', 'stream=codec_name,sample_fmt,bits_per_raw_sample',
+             '-of', 'json'],
+            capture_output=True, timeout=120
+        )
+        try:
+            streams = json.loads(stdout or '')['streams'] if returncode == 0 else []
+        except (ValueError, KeyError, TypeError):
+            streams = []
+        
+        options = []
+        for i, stream in enumerate(streams):
+            if stream.get('codec_name') == 'pcm_dvd':
+                # 20 and 24-bit LPCM decode to 32-bit samples
+                deep = stream.get('sample_fmt') == 's32' or int(stream.get('bits_per_raw_sample') or 16) > 16
+                options += [f'-c:a:{i}', 'pcm_s24le' if deep else 'pcm_s16le']
+        return options
+    
+    def stage_title(self, title_num):
+        """Copy a title off the disc into local staging
+        
+        Video, subtitles and compressed audio are stream-copied; LPCM audio
+        is rewritten as plain PCM, which Matroska can hold.
+        """
+        staged_path = os.path.join(self.staging_dir, f"title_{title_num:02d}.mkv")
+        
+        cmd = ['ffmpeg', '-y', '-hide_banner', '-loglevel', 'error', '-f', 'dvdvideo', '-title', str(title_num),
+               '-i', self.dvd_device, '-map', '0:v', '-map', '0:a?', '-map', '0:s?', '-c', 'copy']
+        cmd += self.stage_audio_options(title_num) + [staged_path]
+        returncode, _, stderr = self.ffmpeg_tracked(cmd, 'read', f"title {title_num}",
+                                                    self.title_seconds(title_num))
+        
+        if returncode == 0 and os.path.exists(staged_path):
+            size_mb = os.path.getsize(staged_path) / (1024 * 1024)
+            self.print_success(f"Read title {title_num} ({size_mb:.1f} MB)")
+            return staged_path
+        
+        self.print_error(f"Failed to read title {title_num}")
+        if stderr:
+            print(f"  Error: {stderr[:200]}")
+        if os.path.exists(staged_path):
+            os.remove(staged_path)
+        return None
+    
+    def encode_staged(self, job, staged_path):
+        """Encode a staged title and release its staging space"""
+        try:
+            return self.rip_job(job, source=staged_path, threads=self.encode_threads)
+        finally:
+            if os.path.exists(staged_path):
+                os.remove(staged_path)
+    
+    def run_pipeline(self, jobs):
+        """Read titles at drive speed while a worker pool encodes the staged copies"""
+        self.print_header("Pipelined Mode")
+        
+        if not self.has_dvdvideo_demuxer():
+            self.print_warning("ffmpeg has no dvdvideo demuxer - ripping titles directly from the disc")
+            self.pipelined = False
+            return self.process_jobs(jobs)
+        
+        os.makedirs(self.staging_dir, exist_ok=True)
+        self.print_info(f"Encoding with {self.encode_workers} worker(s), "
+                        f"{self.encode_threads} thread(s) each")
+        
+        futures = []
+        with ThreadPoolExecutor(max_workers=self.encode_workers) as pool:
+            for i, job in enumerate(jobs, 1):
+                self.print_info(f"[read {i}/{len(jobs)}] Title {job['title']}")
+                staged_path = self.stage_title(job['title'])
+                if staged_path:
+                    futures.append(pool.submit(self.encode_staged, job, staged_path))
+            
+            self.print_success("Disc read complete - remaining titles are encoding from staging")
+            if self.eject_after_read:
+                self.eject_dvd()
+            
+            converted = [f.result() for f in futures]
+        
+        return [path for path in converted if path]
+    
+    def catalog_rip(self):
+        """Record the rip folder's outputs and the encode settings in the library catalog
+        
+        Outputs are hashed and probed in parallel. Each file's DVD title and
+        the RF it was encoded with come from the job journal (chapter-mode
+        files share their title's), so titles finished before a resume keep
+        theirs.
+        """
+        if not self.current_rip_dir:
+            return
+        ext = self.selected_format['extension']
+        titles = {}
+        for job in (self.journal or {}).get('jobs', []):
+            rf = job.get('rf', self.title_rf.get(job['title']))
+            for output in [job.get('output')] + job.get('outputs', []):
+                if output:
+                    titles[output] = (job['title'], rf)
+        try:
+            paths = sorted(entry.path for entry in os.scandir(self.current_rip_dir)
+                           if entry.is_file() and entry.name.endswith(f".{ext}"))
+            with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+                digests = list(pool.map(file_sha256, paths))
+                durations = list(pool.map(self.media_duration, paths))
+            
+            encoder = self.selected_format['encoder']
+            files = []
+            for path, sha256, duration in zip(paths, digests, durations):
+                track = re.match(r'(\d+) - ', os.path.basename(path))
+                title, rf = titles.get(path, (None, None))
+                files.append({
+                    'path': path,
+                    'title': title,
+                    'track': int(track.group(1)) if track else None,
+                    'format': ext,
+                    'size': os.path.getsize(path),
+                    'duration': duration or None,
+                    'sha256': sha256,
+                    'rf': rf if encoder else None
+                })
+            
+            self.catalog.record({
+                'fingerprint': (self.dvd_info or {}).get('fingerprint'),
+                'volume_id': (self.dvd_info or {}).get('title'),
+                'title': os.path.relpath(self.current_rip_dir, self.base_output_dir).replace(os.sep, ' / '),
+                'path': self.current_rip_dir,
+                'device': self.dvd_device,
+                'settings': {
+                    'format': next(k for k, v in OutputFormat.FORMATS.items() if v is self.selected_format),
+                    'quality': next(k for k, v in QualityPreset.PRESETS.items() if v is self.selected_quality),
+                    'encoder': encoder,
+                    'encoder_preset': self.encoder_preset(encoder) if encoder else None,
+                    'base_rf': self.selected_quality['quality'] + self.selected_format.get('quality_offset', 0),
+                    'ssim_target': self.selected_quality['ssim_target'] if self.crf_search else None,
+                    'aencoder': self.selected_format['aencoder'],
+                    'audio_bitrate': self.selected_quality['audio_bitrate'],
+                    'audio_stream': self.audio_stream,
+                    'pipelined': self.pipelined,
+                    'replaygain': self.replaygain
+                }
+            }, files)
+        except (OSError, sqlite3.Error) as e:
+            self.print_warning(f"Could not update the library catalog: {e}")
+    
+    def find_existing_rip(self, fingerprint=None):
+        """Report an earlier rip of the disc from the library catalog
+        
+        Returns the catalog entry, or None when the disc is new or its rip
+        folder has since been removed. The fingerprint defaults to the
+        analysed disc's.
+        """
+        fingerprint = fingerprint or (self.dvd_info or {}).get('fingerprint')
+        if not fingerprint:
+            return None
+        try:
+            existing = self.catalog.find(fingerprint)
+        except (OSError, sqlite3.Error) as e:
+            self.print_warning(f"Library catalog unavailable: {e}")
+            return None
+        if not existing:
+            return None
+        
+        ripped = time.strftime('%Y-%m-%d %H:%M', time.localtime(existing['ripped']))
+        if not os.path.isdir(existing['path']):
+            self.print_info(f"Ripped before on {ripped}, but {existing['path']} is gone")
+            return None
+        fmt = OutputFormat.FORMATS.get(existing['settings'].get('format'), {}).get('name', 'unknown format')
+        self.print_warning(f"Already in the library: {existing['title']} (ripped {ripped} as {fmt})")
+        self.print_info(f"{existing['files']} file(s), {existing['size'] / (1024 * 1024):.1f} MB, "
+                        f"{existing['duration'] / 60:.1f} min in {existing['path']}")
+        return existing
+    
+    def show_catalog_stats(self, days=30):
+        """Print library totals, size by format and recent rips per day from the catalog"""
+        self.print_header("Library Catalog")
+        try:
+            stats = self.catalog.stats(days)
+        except (OSError, sqlite3.Error) as e:
+            self.print_error(f"Library catalog unavailable: {e}")
+            return
+        
+        total = sum(size or 0 for _, _, size, _ in stats['by_format'])
+        self.print_info(f"{stats['discs']} disc(s), {total / (1024 ** 3):.1f} GB in {self.catalog.path}")
+        
+        print(f"\n{Colors.OKCYAN}Size by format:{Colors.ENDC}")
+        for fmt, count, size, duration in stats['by_format']:
+            hours = f", {duration / 3600:.1f} h" if duration else ""
+            print(f"  {fmt:<6} {count:6d} file(s)  {(size or 0) / (1024 ** 3):8.2f} GB{hours}")
+        
+        print(f"\n{Colors.OKCYAN}Rips per day (last {days} days):{Colors.ENDC}")
+        for day, discs, size in stats['per_day']:
+            print(f"  {day}  {discs:3d} disc(s)  {size / (1024 ** 2):9.1f} MB")
+        if not stats['per_day']:
+            print("  none")
     
     def show_summary(self):
-        """Show ripping summary"""
+        """Show ripping summary from the library catalog"""
         self.print_header("Ripping Summary")
         
         if not self.current_rip_dir or not os.path.exists(self.current_rip_dir):
             self.print_warning("No output directory found")
             return
         
-        # Find all output files
-        extensions = ['mp4', 'mkv', 'flac', 'mp3']
-        files = []
-        for ext in extensions:
-            files.extend(Path(self.current_rip_dir).glob(f"*.{ext}"))
+        try:
+            files = self.catalog.files(self.current_rip_dir)
+        except (OSError, sqlite3.Error) as e:
+            self.print_warning(f"Library catalog unavailable: {e}")
+            return
         
         if not files:
             self.print_warning("No files were created")
             return
         
         total_size = 0
+        total_duration = 0
         print(f"{Colors.OKCYAN}Created files:{Colors.ENDC}")
-        for f in sorted(files):
-            size_mb = f.stat().st_size / (1024 * 1024)
+        for f in files:
+            size_mb = f['size'] / (1024 * 1024)
             total_size += size_mb
-            print(f"  ✓ {f.name} ({size_mb:.1f} MB)")
+            total_duration += f['duration'] or 0
+            length = f", {f['duration'] / 60:.1f} min" if f['duration'] else ""
+            rf = f", RF {f['rf']:g}" if f['rf'] is not None else ""
+            print(f"  ✓ {os.path.basename(f['path'])} ({size_mb:.1f} MB{length}{rf})")
         
-        print(f"\n{Colors.OKGREEN}Total: {len(files)} file(s), {total_size:.1f} MB{Colors.ENDC}")
+        print(f"\n{Colors.OKGREEN}Total: {len(files)} file(s), {total_size:.1f} MB, "
+              f"{total_duration / 60:.1f} min{Colors.ENDC}")
         print(f"{Colors.OKGREEN}Location: {self.current_rip_dir}{Colors.ENDC}")
     
     def eject_dvd(self):
         """Eject the DVD"""
+        if not is_block_device(self.dvd_device):
+            self.print_info("Source is an image - nothing to eject")
+            self.disc_ejected = True
+            return
         self.print_info("Ejecting DVD...")
-        self.run_command(f"eject {self.dvd_device}")
+        self.run_command(['eject', self.dvd_device])
+        self.disc_ejected = True
         self.print_success("DVD ejected")
     
     def run(self):
-        """Main workflow"""
+        """Main workflow: one session, as many discs as the user feeds it"""
         self.print_header("DVD Ripper - Music DVD Content Extraction")
         
-        # Check dependencies
+        # Check dependencies (once per session)
         if not self.check_dependencies():
             return
         
+        drive = self.dvd_device
+        while True:
+            self.rip_disc()
+            self.dvd_device = drive
+            if not self.yes_no_prompt("\nWould you like to rip another DVD?"):
+                break
+            print("\n" * 2)
+            self.wait_for_disc_change()
+    
+    def rip_disc(self):
+        """Rip the disc in the drive"""
+        self.disc_ejected = False
+        self.created_paths = set()
+        self.journal = None
+        self.title_rf = {}
+        
         # Check for DVD
         if not self.check_dvd_inserted():
             return
         
+        # Image mode frees the drive before the disc is even analysed,
+        # so a disc already in the library is caught before the full copy
+        imaging = self.image_first and is_block_device(self.dvd_device)
+        if imaging and self.find_existing_rip(self.disc_fingerprint()) and \
+                not self.yes_no_prompt("\nRip this DVD again anyway?"):
+            self.print_info("Operation cancelled")
+            if self.yes_no_prompt("Would you like to eject the DVD?"):
+                self.eject_dvd()
+            return
+        if imaging:
+            image_path = self.image_dvd()
+            if not image_path:
+                return
+            self.eject_dvd()
+            self.dvd_device = image_path
+            self.print_info(f"Ripping from image: {image_path}")
+        
         # Get DVD info
         self.get_dvd_info()
         
+        # A disc that is already in the library is reported before any questions
+        if not imaging and self.find_existing_rip() and not self.yes_no_prompt("\nRip this DVD again anyway?"):
+            self.print_info("Operation cancelled")
+            if not self.disc_ejected and self.yes_no_prompt("Would you like to eject the DVD?"):
+                self.eject_dvd()
+            return
+        
         # Select output format
         self.select_output_format()
         
         # Select quality
         self.select_quality_preset()
         
+        # Select audio stream (audio-only formats)
+        self.select_audio_stream()
+        
         # Get output name/location
         self.get_output_name()
         
@@ -673,23 +3143,40 @@ class DVDRipper:
         print(f"\n{Colors.OKCYAN}Select ripping mode:{Colors.ENDC}")
         print(f"  1. Batch Mode - Rip all titles automatically")
         print(f"  2. Selective Mode - Choose which titles to rip")
+        print(f"  3. Chapter Mode - Encode one title once, split into a file per chapter")
         
-        mode = self.get_input("Select mode (1/2)", "1")
+        mode = self.get_input("Select mode (1/2/3)", "1")
+        
+        # Chapter mode is a single read and encode, so there is nothing to pipeline
+        self.pipelined = mode != "3" and self.yes_no_prompt(
+            "Use pipelined mode (read the disc first, encode titles in parallel)?"
+        )
+        self.eject_after_read = self.pipelined and self.yes_no_prompt(
+            "Eject the DVD as soon as all titles have been read?"
+        )
         
         if mode == "2":
             success = self.run_selective_mode()
+        elif mode == "3":
+            success = self.run_chapter_mode()
         else:
             success = self.run_batch_mode()
         
         if success:
+            # Loudness tags over everything in the rip folder
+            self.apply_replaygain()
+            
             # Fix permissions
-            self.fix_permissions(self.current_rip_dir)
+            self.fix_permissions()
+            
+            # Record the rip in the library catalog
+            self.catalog_rip()
             
             # Show summary
             self.show_summary()
         
         # Eject
-        if self.yes_no_prompt("\nWould you like to eject the DVD?"):
+        if not self.disc_ejected and self.yes_no_prompt("\nWould you like to eject the DVD?"):
             self.eject_dvd()
         
         self.print_header("Ripping Complete!")
@@ -698,13 +3185,174 @@ class DVDRipper:
             self.print_success("All operations completed successfully")
         else:
             self.print_warning("Some operations may have failed")
+
+class RipFarm:
+    """Unattended rip sessions on several drives sharing one encode pool
+    
+    Each drive gets its own session thread that analyses the disc, reads its
+    titles to staging and ejects; every encode goes through a single pool sized
+    to the machine, so adding drives adds read throughput without
+    oversubscribing the CPU.
+    """
+    
+    def __init__(self, devices):
+        self.devices = devices
+        self.template = DVDRipper()
+        self.pool = None
+    
+    def make_session(self, device):
+        session = DVDRipper()
+        session.dvd_device = device
+        session.label = os.path.basename(os.path.normpath(device))
+        session.staging_dir = os.path.join(self.template.staging_dir, session.label)
+        session.telemetry = self.template.telemetry
+        session.tools = self.template.tools
+        session.selected_format = self.template.selected_format
+        session.selected_quality = self.template.selected_quality
+        session.encode_threads = self.template.encode_threads
+        session.image_dir = self.template.image_dir
+        session.replaygain = self.template.replaygain
+        session.replaygain_mp4 = self.template.replaygain_mp4
+        session.crf_search = self.template.crf_search
+        return session
+    
+    def output_dir(self, session):
+        """Unattended output location: Unknown Artist/<disc title>, never reusing a folder"""
+        album = session.dvd_info['title'].replace(' ', '_').replace('/', '-') or "DVD_Rip"
+        base = os.path.join(session.base_output_dir, "Unknown Artist", album)
+        path, n = base, 2
+        while os.path.exists(path):
+            path = f"{base} ({n})"
+            n += 1
+        os.makedirs(path)
+        session.track_output(path)
+        return path
+    
+    def run_session(self, session):
+        """Rip every main title on one drive; returns the list of outputs"""
+        if not session.disc_present():
+            session.print_warning("No disc - skipping drive")
+            return []
+        
+        # Unattended rips never redo a disc the library already holds
+        imaging = self.template.image_first and is_block_device(session.dvd_device)
+        if imaging and session.find_existing_rip(session.disc_fingerprint()):
+            session.print_warning("Skipping - eject and insert the next disc")
+            session.eject_dvd()
+            return []
+        if imaging:
+            image_path = session.image_dvd()
+            session.eject_dvd()
+            if not image_path:
+                return []
+            session.dvd_device = image_path
+        
+        session.get_dvd_info()
+        if not session.titles:
+            session.print_error("No titles found on DVD")
+            return []
+        
+        if not imaging and session.find_existing_rip():
+            session.print_warning("Skipping - eject and insert the next disc")
+            if not session.disc_ejected:
+                session.eject_dvd()
+            return []
+        
+        session.current_rip_dir = self.output_dir(session)
+        session.print_info(f"Output directory: {session.current_rip_dir}")
+        jobs = [{'title': t['number'], 'name': f"Track {i:02d}", 'track': i}
+                for i, t in enumerate(session.select_main_titles(), 1)]
+        session.journal_start(jobs)
+        
+        results = []
+        if session.has_dvdvideo_demuxer():
+            os.makedirs(session.staging_dir, exist_ok=True)
+            futures = []
+            for job in jobs:
+                staged_path = session.stage_title(job['title'])
+                if staged_path:
+                    futures.append(self.pool.submit(session.encode_staged, job, staged_path))
+            session.print_success("Disc read complete")
+            session.eject_dvd()
+            results = [f.result() for f in futures]
+        else:
+            # Without staging the drive feeds one encode at a time, but that
+            # encode still takes a slot in the shared pool
+            for job in jobs:
+                results.append(self.pool.submit(
+                    session.rip_job, job, threads=session.encode_threads
+                ).result())
+            session.eject_dvd()
+        
+        outputs = [path for path in results if path]
+        if outputs:
+            session.apply_replaygain()
+            session.fix_permissions()
+            session.catalog_rip()
+        session.print_success(f"{len(outputs)}/{len(jobs)} title(s) ripped")
+        return outputs
+    
+    def run(self):
+        template = self.template
+        template.print_header(f"Rip Farm - {len(self.devices)} drive(s)")
+        for device in self.devices:
+            print(f"  • {device}")
         
-        if self.yes_no_prompt("\nWould you like to rip another DVD?"):
-            print("\n" * 2)
-            self.run()
+        if not template.check_dependencies():
+            return
+        
+        # Settings are chosen once and shared by every drive
+        template.select_output_format()
+        template.select_quality_preset()
+        template.print_info(f"Encode pool: {template.encode_workers} worker(s), "
+                            f"{template.encode_threads} thread(s) each")
+        
+        sessions = [self.make_session(device) for device in self.devices]
+        with ThreadPoolExecutor(max_workers=template.encode_workers) as self.pool:
+            with ThreadPoolExecutor(max_workers=len(sessions)) as drives:
+                results = list(drives.map(self.run_session, sessions))
+        
+        template.print_header("Farm Complete!")
+        for session, outputs in zip(sessions, results):
+            template.print_info(f"{session.dvd_device}: {len(outputs)} file(s)"
+                                + (f" in {session.current_rip_dir}" if outputs else ""))
 
 def main():
     """Entry point"""
+    parser = argparse.ArgumentParser(description="Rip music DVDs with HandBrake CLI")
+    parser.add_argument('--farm', nargs='*', metavar='DEVICE',
+                        help="rip every drive at once, unattended (default: all optical drives; "
+                             "ISO images or VIDEO_TS folders can stand in for drives)")
+    parser.add_argument('--image', action='store_true',
+                        help="copy the disc to an image at drive speed, eject, then rip from the image")
+    parser.add_argument('--image-dir', metavar='DIR',
+                        help="where disc images are kept (default: /var/tmp/dvd-ripper-images)")
+    parser.add_argument('--source', metavar='PATH',
+                        help="rip from an image (VIDEO_TS folder or ISO) instead of the drive")
+    parser.add_argument('--resume', nargs='?', const='', metavar='KEY',
+                        help="resume an interrupted rip from its job journal")
+    parser.add_argument('--crf-search', action='store_true',
+                        help="pick each title's RF by encoding short samples at a few values and "
+                             "keeping the highest that meets the quality preset's SSIM target")
+    parser.add_argument('--chunked', action='store_true',
+                        help="split a long title that is encoded on its own into chapter-range chunks "
+                             "encoded in parallel, then join them losslessly")
+    parser.add_argument('--no-replaygain', action='store_true',
+                        help="skip the loudness stage (ReplayGain 2.0 track and album tags)")
+    parser.add_argument('--replaygain-mp4', action='store_true',
+                        help="also write ReplayGain tags to MP4 outputs (remuxes every file)")
+    parser.add_argument('--benchmark', nargs='?', type=int, const=20, metavar='SECONDS',
+                        help="benchmark every encoder preset on a synthetic clip (default 20s) "
+                             "and calibrate the quality presets for this host")
+    parser.add_argument('--catalog-stats', action='store_true',
+                        help="print library totals, size by format and rips per day from the catalog")
+    parser.add_argument('--telemetry', metavar='FILE',
+                        help="append progress events (JSON lines) to FILE")
+    parser.add_argument('--prom-textfile', metavar='FILE',
+                        help="keep a Prometheus textfile with the latest progress metrics")
+    args = parser.parse_args()
+    telemetry = Telemetry('dvd_ripper', args.telemetry, args.prom_textfile)
+    
     print(f"""
 {Colors.HEADER}{Colors.BOLD}
 ╔═══════════════════════════════════════════════════════════╗
@@ -715,10 +3363,54 @@ def main():
     """)
     
     try:
-        ripper = DVDRipper()
-        ripper.run()
+        if args.benchmark:
+            DVDRipper().run_benchmark(args.benchmark)
+            return
+        
+        if args.catalog_stats:
+            DVDRipper().show_catalog_stats()
+            return
+        
+        if args.resume is not None:
+            ripper = DVDRipper()
+            ripper.telemetry = telemetry
+            ripper.replaygain = not args.no_replaygain
+            ripper.replaygain_mp4 = args.replaygain_mp4
+            ripper.resume(args.resume)
+            return
+        
+        if args.farm is not None:
+            devices = args.farm or detect_optical_drives()
+            if not devices:
+                print(f"{Colors.FAIL}No optical drives found{Colors.ENDC}")
+                sys.exit(1)
+            farm = RipFarm(devices)
+            farm.template.telemetry = telemetry
+            farm.template.image_first = args.image
+            farm.template.replaygain = not args.no_replaygain
+            farm.template.replaygain_mp4 = args.replaygain_mp4
+            farm.template.crf_search = args.crf_search
+            if args.image_dir:
+                farm.template.image_dir = args.image_dir
+            farm.run()
+        else:
+            ripper = DVDRipper()
+            ripper.telemetry = telemetry
+            ripper.image_first = args.image
+            ripper.replaygain = not args.no_replaygain
+            ripper.replaygain_mp4 = args.replaygain_mp4
+            ripper.crf_search = args.crf_search
+            ripper.chunked = args.chunked
+            if args.image_dir:
+                ripper.image_dir = args.image_dir
+            if args.source:
+                ripper.dvd_device = args.source
+            ripper.run()
     except KeyboardInterrupt:
+        RUNNER.cancel()
         print(f"\n\n{Colors.WARNING}Operation cancelled by user{Colors.ENDC}")
+        if DVDRipper().pending_journals():
+            print(f"{Colors.OKCYAN}Finished titles are kept - run 'dvd-ripper --resume' to rip the rest{Colors.ENDC}")
         sys.exit(0)
     except Exception as e:
         print(f"\n{Colors.FAIL}Unexpected error: {e}{Colors.ENDC}")
@@ -0,0 +1,93 @@
+"""Tests for dvd-ripper.py
+
+The script is loaded by path, since its file name isn't importable.
+"""
+
+import importlib.util
+import os
+import re
+import shutil
+import subprocess
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+spec = importlib.util.spec_from_file_location('dvd_ripper', os.path.join(ROOT, 'dvd-ripper.py'))
+dvd = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(dvd)
+
+
+@pytest.mark.parametrize('encoder, option', [
+    ('x264', 'threads=4'),
+    ('x265', 'pools=4'),
+    ('svt_av1', 'lp=4'),
+])
+def test_thread_options_per_encoder(encoder, option):
+    assert dvd.thread_options(encoder, 4) == ['--encopts', option]
+
+
+def test_thread_options_uncapped():
+    assert dvd.thread_options('svt_av1', None) == []
+
+
+
+def test_rip_outputs_leave_out_earlier_rips(tmp_path):
+    ripper = dvd.DVDRipper()
+    ripper.base_output_dir = str(tmp_path)
+    ripper.current_rip_dir = str(tmp_path / 'Artist' / 'Album')
+    ripper.selected_format = dvd.OutputFormat.FORMATS['2']
+    os.makedirs(ripper.current_rip_dir)
+    earlier, resumed, new = (os.path.join(ripper.current_rip_dir, f"{name}.mkv")
+                             for name in ('01 - Earlier', '02 - Resumed', '03 - New'))
+    for path in (earlier, resumed, new):
+        open(path, 'w').close()
+    
+    ripper.journal = {'jobs': [{'title': 2, 'track': 2, 'output': resumed}]}
+    ripper.track_output(new)
+    assert ripper.rip_outputs() == [resumed, new]
+
+
+def ffmpeg(*args):
+    subprocess.run(['ffmpeg', '-nostdin', '-v', 'error', '-y'] + list(args), check=True)
+
+
+def stream_codecs(path):
+    """(codec type, codec name) of every stream, read from ffmpeg's input listing"""
+    listing = subprocess.run(['ffmpeg', '-nostdin', '-hide_banner', '-i', path],
+                             capture_output=True, text=True).stderr
+    return re.findall(r'Stream #0:\d+.*?: (Video|Audio|Subtitle): (\w+)', listing)
+
+
+@pytest.mark.skipif(not shutil.which('ffmpeg'), reason="needs ffmpeg")
+@pytest.mark.parametrize('format_key, audio, subtitles', [
+    ('1', 'aac', False),
+    ('2', 'flac', True),
+])
+def test_join_chunks_encodes_staged_lpcm(tmp_path, format_key, audio, subtitles):
+    # A staged title as stage_title leaves it: DVD LPCM rewritten as 24-bit PCM
+    # (ffmpeg can't make bitmap subtitles from scratch, so a text track stands in)
+    subs = tmp_path / 'subs.srt'
+    subs.write_text("1\n00:00:00,500 --> 00:00:03,000\nHello\n")
+    staged = str(tmp_path / 'title_01.mkv')
+    ffmpeg('-f', 'lavfi', '-i', 'testsrc2=size=320x240:rate=25:duration=4',
+           '-f', 'lavfi', '-i', 'sine=frequency=440:sample_rate=48000:duration=4', '-i', str(subs),
+           '-map', '0', '-map', '1', '-map', '2', '-c:v', 'mpeg2video', '-c:a', 'pcm_s24le', '-ac', '2',
+           '-c:s', 'srt', staged)
+    chunks = []
+    for i, start in enumerate((0, 2), 1):
+        chunk = str(tmp_path / f"chunk-{i:02d}.mkv")
+        ffmpeg('-ss', str(start), '-t', '2', '-i', staged, '-map', '0:v', '-c:v', 'mpeg4', chunk)
+        chunks.append(chunk)
+    
+    ripper = dvd.DVDRipper()
+    ripper.selected_format = dvd.OutputFormat.FORMATS[format_key]
+    ripper.selected_quality = dvd.QualityPreset.PRESETS['2']
+    output = str(tmp_path / f"joined.{ripper.selected_format['extension']}")
+    returncode, stderr = ripper.join_chunks(chunks, staged, output, str(tmp_path))
+    
+    assert returncode == 0, stderr
+    codecs = stream_codecs(output)
+    assert ('Video', 'mpeg4') in codecs
+    assert ('Audio', audio) in codecs
+    assert any(kind == 'Subtitle' for kind, _ in codecs) == subtitles